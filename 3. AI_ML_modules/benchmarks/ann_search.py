@@ -0,0 +1,107 @@
+"""Recall and throughput of the IVF ANN index against exact search
+
+Builds an IVFIndex over clustered synthetic embeddings (or the scaled
+content features of a recipe_features.csv) and, for each n_probe setting,
+reports recall@k against exact top-k search together with queries per
+second. Exact search is blocked_top_k over the same vectors.
+
+Usage:
+    python benchmarks/ann_search.py [--items 100000] [--dim 32] [--queries 1000] [--k 10]
+        [--probes 1,2,4,8,16,32] [--metric cosine] [--recipes recipe_features.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'meal_recommendation'))
+
+from ann_index import IVFIndex  # noqa: E402
+from similarity_search import blocked_top_k, normalize_rows  # noqa: E402
+
+
+def synthetic_embeddings(n_items, dim, n_clusters=200, spread=0.5, seed=0):
+    """Gaussian clusters, roughly the shape of learned recipe embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    labels = rng.integers(0, n_clusters, n_items)
+    return (centers[labels] + spread * rng.normal(size=(n_items, dim))).astype(np.float32)
+
+
+def recipe_embeddings(recipe_features_path):
+    """The normalized content features used by build_content_based_model"""
+    import pandas as pd
+    from recommendation_engine import HybridRecommendationEngine
+
+    engine = HybridRecommendationEngine()
+    engine.build_content_based_model(pd.read_csv(recipe_features_path), similarity_mode='blocked')
+    return engine.content_features.astype(np.float32)
+
+
+def recall_at_k(approximate, exact):
+    """Mean share of the exact top-k rows found by the approximate search"""
+    k = exact.shape[1]
+    hits = [len(np.intersect1d(a, e)) for a, e in zip(approximate, exact)]
+    return float(np.mean(hits)) / k
+
+
+def run_benchmark(vectors, n_queries=1000, k=10, probes=(1, 2, 4, 8, 16, 32), metric='cosine',
+                  n_lists=None, seed=0):
+    """One result dict per search configuration, exact search first"""
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)
+    items = normalize_rows(vectors).astype(np.float32) if metric == 'cosine' else vectors
+
+    start = time.perf_counter()
+    exact_rows, _ = blocked_top_k(items[query_rows], items, k, exclude=query_rows)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = IVFIndex(n_lists=n_lists, metric=metric, seed=seed).build(vectors)
+    build_seconds = time.perf_counter() - start
+
+    results = [{'search': 'exact', 'n_probe': '', 'recall@k': 1.0,
+                'qps': round(len(query_rows) / exact_seconds), 'build_s': ''}]
+    for n_probe in probes:
+        start = time.perf_counter()
+        rows, _ = index.query_batch(vectors[query_rows], k, n_probe=n_probe, exclude=query_rows)
+        seconds = time.perf_counter() - start
+        results.append({
+            'search': f'ivf{len(index.centroids)}',
+            'n_probe': n_probe,
+            'recall@k': round(recall_at_k(rows, exact_rows), 4),
+            'qps': round(len(query_rows) / seconds),
+            'build_s': round(build_seconds, 2)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=100000, help='synthetic catalog size')
+    parser.add_argument('--dim', type=int, default=32, help='synthetic embedding size')
+    parser.add_argument('--recipes', help='recipe_features.csv to index instead of synthetic vectors')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--probes', default='1,2,4,8,16,32', help='comma-separated n_probe values')
+    parser.add_argument('--n-lists', type=int, help='IVF lists (default sqrt(items))')
+    parser.add_argument('--metric', choices=['cosine', 'dot'], default='cosine')
+    args = parser.parse_args()
+
+    vectors = recipe_embeddings(args.recipes) if args.recipes else synthetic_embeddings(args.items, args.dim)
+    results = run_benchmark(
+        vectors, n_queries=args.queries, k=args.k, metric=args.metric, n_lists=args.n_lists,
+        probes=[int(value) for value in args.probes.split(',')]
+    )
+
+    print(f"{len(vectors)} items x {vectors.shape[1]} dims, recall@{args.k}")
+    print(f"{'search':10} {'n_probe':>8} {'recall@k':>9} {'qps':>9} {'build s':>8}")
+    for row in results:
+        print(f"{row['search']:10} {row['n_probe']:>8} {row['recall@k']:>9} {row['qps']:>9} {row['build_s']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
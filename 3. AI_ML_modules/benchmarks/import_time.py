@@ -0,0 +1,149 @@
+"""Cold-start import time benchmark for AI_ML_modules
+
+Imports each module in a fresh interpreter (as a newly forked worker would)
+and reports the median wall time plus the heaviest dependencies reported by
+``python -X importtime``. Results can be appended to a CSV to track
+regressions over time, and --budget-ms turns the run into a check.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5] [--output import_times.csv] [--budget-ms 800]
+"""
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+MODULES_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    ('meal_recommendation', 'recommendation_engine'),
+    ('meal_recommendation', 'recipe_catalog'),
+    ('meal_recommendation', 'similarity_search'),
+    ('meal_recommendation', 'collaborative_inference'),
+    ('meal_recommendation', 'recommendation_cache'),
+    ('meal_recommendation', 'recommendation_service'),
+    ('meal_recommendation', 'candidate_generation'),
+    ('meal_recommendation', 'text_similarity'),
+    ('meal_recommendation', 'ncf_training'),
+    ('meal_recommendation', 'implicit_als'),
+    ('meal_recommendation', 'item_similarity'),
+    ('meal_recommendation', 'ann_index'),
+    ('meal_recommendation', 'cold_start'),
+    ('meal_recommendation', 'deadline'),
+    ('meal_recommendation', 'data_preprocessing'),
+    ('meal_recommendation', 'model_evaluation'),
+    ('user_profiling', 'budget_optimizer'),
+    ('user_profiling', 'health_analysis'),
+    ('user_profiling', 'preference_learning'),
+]
+
+HEAVY_PACKAGES = ['tensorflow', 'keras', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'pandas']
+
+
+def time_import(package_dir, module_name):
+    """Import one module in a fresh interpreter; returns (seconds, importtime log)"""
+    command = [sys.executable, '-X', 'importtime', '-c', f'import {module_name}']
+    start = time.perf_counter()
+    result = subprocess.run(
+        command,
+        cwd=os.path.join(MODULES_ROOT, package_dir),
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+        raise RuntimeError(f"import {module_name} failed: {last_line}")
+
+    return elapsed, result.stderr
+
+
+def heavy_dependencies(importtime_log):
+    """Cumulative import time (ms) of known heavy top-level packages"""
+    loaded = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        try:
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue
+        package = parts[2]
+        if package in HEAVY_PACKAGES:
+            loaded[package] = cumulative_us / 1000
+    return loaded
+
+
+def run_benchmark(repeat=5):
+    """Benchmark every module; returns one result dict per module"""
+    results = []
+    for package_dir, module_name in MODULES:
+        timings = []
+        dependencies = {}
+        error = None
+        for _ in range(repeat):
+            try:
+                elapsed, log = time_import(package_dir, module_name)
+            except RuntimeError as exc:
+                error = str(exc)
+                break
+            timings.append(elapsed)
+            dependencies = heavy_dependencies(log)
+
+        results.append({
+            'module': f'{package_dir}.{module_name}',
+            'median_ms': round(statistics.median(timings) * 1000, 1) if timings else None,
+            'min_ms': round(min(timings) * 1000, 1) if timings else None,
+            'heavy_imports': ' '.join(
+                f'{name}={ms:.0f}ms' for name, ms in sorted(dependencies.items(), key=lambda x: -x[1])
+            ),
+            'error': error or ''
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--output', help='CSV file to append results to')
+    parser.add_argument('--budget-ms', type=float, help='fail if any median import exceeds this')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeat)
+
+    print(f"{'module':45} {'median ms':>10} {'min ms':>8}  heavy imports")
+    for row in results:
+        if row['error']:
+            print(f"{row['module']:45} {'ERROR':>10} {'':>8}  {row['error']}")
+        else:
+            print(f"{row['module']:45} {row['median_ms']:>10} {row['min_ms']:>8}  {row['heavy_imports']}")
+
+    if args.output:
+        write_header = not os.path.exists(args.output)
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with open(args.output, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['timestamp', *results[0].keys()])
+            if write_header:
+                writer.writeheader()
+            for row in results:
+                writer.writerow({'timestamp': timestamp, **row})
+
+    if args.budget_ms is not None:
+        over_budget = [
+            row['module'] for row in results
+            if row['median_ms'] is not None and row['median_ms'] > args.budget_ms
+        ]
+        if over_budget:
+            print(f"Over {args.budget_ms} ms budget: {', '.join(over_budget)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
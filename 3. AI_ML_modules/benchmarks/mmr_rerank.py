@@ -0,0 +1,94 @@
+"""Latency of MMR diversity re-ranking against a naive pairwise loop
+
+Re-ranks C candidates down to k picks, the shape of one weekly-plan meal
+slot (k = 7 days x 3 options), with three implementations:
+- naive: Python loops recomputing the max similarity of every candidate to
+  every pick at each step, O(k^2 * C) dot products
+- vectors: mmr_rerank with candidate vectors, one similarity row per pick
+- matrix: mmr_rerank with a precomputed (C, C) similarity matrix
+The picks of all three are checked to agree.
+
+Usage:
+    python benchmarks/mmr_rerank.py [--candidates 1000] [--k 21] [--dim 32] [--diversity 0.3]
+        [--repeats 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'meal_recommendation'))
+
+from similarity_search import mmr_rerank, normalize_rows  # noqa: E402
+
+
+def naive_mmr(relevance, vectors, k, diversity):
+    """Textbook MMR: score every remaining candidate against every pick at each step"""
+    spread = relevance.max() - relevance.min()
+    scaled = (relevance - relevance.min()) / spread if spread > 0 else np.zeros(len(relevance))
+    picks = []
+    remaining = list(range(len(relevance)))
+    for _ in range(min(k, len(relevance))):
+        best, best_score = None, -np.inf
+        for candidate in remaining:
+            redundancy = max((float(vectors[candidate] @ vectors[pick]) for pick in picks), default=0.0)
+            score = (1 - diversity) * scaled[candidate] - diversity * redundancy
+            if score > best_score:
+                best, best_score = candidate, score
+        picks.append(best)
+        remaining.remove(best)
+    return np.array(picks)
+
+
+def time_call(function, repeats):
+    """Median seconds per call"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def run_benchmark(n_candidates=1000, k=21, dim=32, diversity=0.3, repeats=20, seed=0):
+    """One result dict per implementation"""
+    rng = np.random.default_rng(seed)
+    vectors = normalize_rows(rng.normal(size=(n_candidates, dim)))
+    relevance = np.sort(rng.random(n_candidates))[::-1]
+
+    naive_seconds, expected = time_call(lambda: naive_mmr(relevance, vectors, k, diversity), max(1, repeats // 10))
+    results = [{'method': 'naive', 'ms': naive_seconds * 1000, 'matches': True}]
+    for method, function in [
+        ('vectors', lambda: mmr_rerank(relevance, k, diversity, vectors=vectors)),
+        ('matrix', lambda: mmr_rerank(relevance, k, diversity, similarity=vectors @ vectors.T)),
+    ]:
+        seconds, picks = time_call(function, repeats)
+        results.append({'method': method, 'ms': seconds * 1000,
+                        'matches': bool(np.array_equal(picks, expected))})
+    for row in results:
+        row['speedup'] = naive_seconds * 1000 / row['ms']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candidates', type=int, default=1000, help='C, candidates re-ranked')
+    parser.add_argument('--k', type=int, default=21, help='picks (7 days x 3 options)')
+    parser.add_argument('--dim', type=int, default=32, help='feature vector size')
+    parser.add_argument('--diversity', type=float, default=0.3)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.candidates, args.k, args.dim, args.diversity, args.repeats)
+
+    print(f"C={args.candidates}, k={args.k}, dim={args.dim}, diversity={args.diversity}")
+    print(f"{'method':8} {'ms':>9} {'speedup':>8} {'matches':>8}")
+    for row in results:
+        print(f"{row['method']:8} {row['ms']:>9.3f} {row['speedup']:>8.1f} {str(row['matches']):>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
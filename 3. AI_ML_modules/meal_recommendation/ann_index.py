@@ -0,0 +1,213 @@
+import json
+import os
+
+import numpy as np
+
+from similarity_search import normalize_rows, top_k_indices
+
+# 'cosine' normalizes items and queries; 'dot' ranks by raw inner product (e.g. ALS factors)
+ANN_METRICS = ('cosine', 'dot')
+
+# Arrays written by IVFIndex.save
+IVF_ARRAYS = ('centroids', 'vectors', 'rows', 'offsets')
+
+
+def nearest_centroids(vectors, centroids, block_size=4096):
+    """Index of the closest centroid (squared L2) for every row, computed in blocks"""
+    half_norms = 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        # argmin |x - c|^2 == argmax x.c - |c|^2 / 2
+        assignments[start:start + block_size] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return assignments
+
+
+def kmeans(vectors, n_clusters, iterations=10, seed=0, block_size=4096):
+    """Lloyd's k-means; empty clusters are re-seeded from random points"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids, block_size)
+        counts = np.bincount(assignments, minlength=n_clusters)
+        sums = np.column_stack([
+            np.bincount(assignments, weights=vectors[:, column], minlength=n_clusters)
+            for column in range(vectors.shape[1])
+        ])
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index in NumPy
+
+    k-means splits the items into n_lists clusters (default sqrt(n)) and
+    stores the vectors grouped by cluster. A query scores every centroid,
+    then only the items of its n_probe best clusters, so a search touches
+    about n_probe / n_lists of the catalog. n_probe is the recall/latency
+    knob: n_probe = n_lists is exact search. Queries always probe enough
+    clusters to fill k results.
+
+    Items are labelled by row (their position in the vectors given to
+    build, then add). remove renumbers the rows after the removed ones,
+    like np.delete, so labels stay aligned with a catalog table. Centroids
+    are not retrained by add; rebuild once the catalog has changed a lot.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8, metric='cosine', kmeans_iterations=10,
+                 training_sample=65536, block_size=4096, seed=0):
+        if metric not in ANN_METRICS:
+            raise ValueError(f"Unknown ANN metric: {metric}")
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.metric = metric
+        self.kmeans_iterations = kmeans_iterations
+        self.training_sample = training_sample
+        self.block_size = block_size
+        self.seed = seed
+        self.centroids = None
+        self.vectors = None   # items grouped by list
+        self.rows = None      # row label of each stored vector
+        self.offsets = None   # list i holds vectors[offsets[i]:offsets[i + 1]]
+
+    def __len__(self):
+        return 0 if self.rows is None else len(self.rows)
+
+    def prepare(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.metric == 'cosine':
+            vectors = normalize_rows(vectors).astype(np.float32)
+        return vectors
+
+    def build(self, vectors):
+        """Cluster the vectors and index them as rows 0..n-1"""
+        vectors = self.prepare(vectors)
+        if not len(vectors):
+            raise ValueError("Cannot build an ANN index without vectors")
+        n_lists = self.n_lists or int(np.sqrt(len(vectors)))
+        n_lists = max(1, min(n_lists, len(vectors)))
+
+        # Centroids are trained on a sample; every item is then assigned
+        sample = vectors
+        if len(vectors) > self.training_sample:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[rng.choice(len(vectors), self.training_sample, replace=False)]
+        self.centroids = kmeans(sample, n_lists, self.kmeans_iterations, self.seed, self.block_size)
+        self.set_entries(nearest_centroids(vectors, self.centroids, self.block_size), vectors,
+                         np.arange(len(vectors), dtype=np.intp))
+        return self
+
+    def set_entries(self, lists, vectors, rows):
+        """Store entries grouped by list"""
+        order = np.argsort(lists, kind='stable')
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.rows = rows[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=len(self.centroids)))])
+
+    def entry_lists(self):
+        return np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets))
+
+    def add(self, vectors, rows=None):
+        """Index new vectors under the given rows (default: appended after the current rows)"""
+        vectors = self.prepare(vectors)
+        if rows is None:
+            rows = np.arange(len(self), len(self) + len(vectors), dtype=np.intp)
+        lists = nearest_centroids(vectors, self.centroids, self.block_size)
+        self.set_entries(np.concatenate([self.entry_lists(), lists]),
+                         np.vstack([self.vectors, vectors]),
+                         np.concatenate([self.rows, np.asarray(rows, dtype=np.intp)]))
+        return rows
+
+    def remove(self, rows, renumber=True):
+        """Drop rows; later rows move down to close the gaps unless renumber is False"""
+        rows = np.unique(np.asarray(rows, dtype=np.intp))
+        keep = ~np.isin(self.rows, rows)
+        labels = self.rows[keep]
+        if renumber:
+            labels = labels - np.searchsorted(rows, labels)
+        self.set_entries(self.entry_lists()[keep], self.vectors[keep], labels)
+
+    def replace(self, rows, vectors):
+        """Re-index changed vectors under the same rows (rows not yet indexed are added)"""
+        self.remove(rows, renumber=False)
+        return self.add(vectors, rows)
+
+    def centroid_scores(self, queries):
+        scores = queries @ self.centroids.T
+        if self.metric == 'cosine':
+            # Rank clusters by L2 distance, as items were assigned
+            scores -= 0.5 * np.einsum('ij,ij->i', self.centroids, self.centroids)
+        return scores
+
+    def query_batch(self, queries, k, n_probe=None, exclude=None):
+        """Approximate top-k rows for each query
+
+        Returns (rows, scores) of shape (n_queries, k), best first, in the
+        same form as top_k_indices. exclude optionally gives one row per
+        query to skip. n_probe overrides the index default for this call.
+        """
+        queries = np.atleast_2d(self.prepare(queries))
+        n_queries = len(queries)
+        k = max(0, min(int(k), len(self) - (exclude is not None)))
+        best_rows = np.full((n_queries, k), -1, dtype=np.intp)
+        best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+        if k == 0:
+            return best_rows, best_scores
+        if exclude is not None:
+            exclude = np.asarray(exclude, dtype=np.intp)
+
+        # Probe the n_probe best lists, or more until they hold k candidates
+        probe_order = np.argsort(-self.centroid_scores(queries), axis=1, kind='stable')
+        reach = np.cumsum(np.diff(self.offsets)[probe_order], axis=1)
+        n_probes = np.maximum(n_probe or self.n_probe, np.argmax(reach >= k + (exclude is not None), axis=1) + 1)
+        probed = np.zeros(probe_order.shape, dtype=bool)
+        np.put_along_axis(probed, probe_order, np.arange(probe_order.shape[1]) < n_probes[:, None], axis=1)
+
+        for list_id in np.flatnonzero(probed.any(axis=0)):
+            start, stop = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == stop:
+                continue
+            members = np.flatnonzero(probed[:, list_id])
+            rows = self.rows[start:stop]
+            scores = queries[members] @ self.vectors[start:stop].T
+            if exclude is not None:
+                scores[rows[None, :] == exclude[members, None]] = -np.inf
+
+            # Merge the list's candidates into the running top-k
+            candidate_rows = np.hstack([best_rows[members], np.broadcast_to(rows, scores.shape)])
+            selected, best_scores[members] = top_k_indices(np.hstack([best_scores[members], scores]), k)
+            best_rows[members] = np.take_along_axis(candidate_rows, selected, axis=1)
+        return best_rows, best_scores
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in IVF_ARRAYS)
+
+    def save(self, directory, prefix='ann_'):
+        """Write the index arrays as .npy files and its settings as JSON"""
+        for name in IVF_ARRAYS:
+            np.save(os.path.join(directory, f'{prefix}{name}.npy'), getattr(self, name))
+        settings = {
+            'n_lists': self.n_lists,
+            'n_probe': self.n_probe,
+            'metric': self.metric,
+            'kmeans_iterations': self.kmeans_iterations,
+            'training_sample': self.training_sample,
+            'block_size': self.block_size,
+            'seed': self.seed
+        }
+        with open(os.path.join(directory, f'{prefix}index.json'), 'w') as f:
+            json.dump(settings, f)
+        return directory
+
+    @classmethod
+    def load(cls, directory, prefix='ann_', mmap_mode='r'):
+        """Load an index written by save; the arrays are memory-mapped by default"""
+        with open(os.path.join(directory, f'{prefix}index.json'), 'r') as f:
+            index = cls(**json.load(f))
+        for name in IVF_ARRAYS:
+            setattr(index, name, np.load(os.path.join(directory, f'{prefix}{name}.npy'), mmap_mode=mmap_mode))
+        return index
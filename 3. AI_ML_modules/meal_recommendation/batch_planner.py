@@ -0,0 +1,298 @@
+"""Batch weekly plan generation for the whole user base
+
+Fans users out to a process pool. Every worker loads the recipe catalog and
+model weights once (in the pool initializer) and then generates and
+budget-optimizes plans for the users it is handed. Results stream back as
+they complete and are appended to a JSONL file, which doubles as the resume
+checkpoint: a rerun skips every user_id already present in the output.
+Profiles without a user_id cannot be matched and are always planned.
+
+Usage:
+    python batch_planner.py ../data/raw/user_profiles.json plans.jsonl \
+        --recipes ../data/processed/recipe_features.csv --workers 8
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'user_profiling'
+))
+
+from recommendation_engine import ZambianMealRecommender
+from data_preprocessing import iter_json_array
+
+# Per-process state, populated by init_worker
+_worker_state = {}
+
+
+def init_worker(recipe_features_path, collaborative_model_path=None, similarity_mode='blocked'):
+    """Load the recipe catalog and model weights once per worker process
+
+    recipe_features_path is either recipe_features.csv (the content model
+    is fitted in every worker) or a directory written by save_content_model,
+    which workers memory-map and share through the page cache.
+    """
+    from budget_optimizer import BudgetOptimizer
+
+    recommender = ZambianMealRecommender()
+    if os.path.isdir(recipe_features_path):
+        recommender.load_content_model(recipe_features_path)
+    else:
+        recommender.build_content_based_model(
+            pd.read_csv(recipe_features_path), similarity_mode=similarity_mode
+        )
+    if collaborative_model_path:
+        recommender.load_collaborative_model(collaborative_model_path)
+
+    _worker_state['recommender'] = recommender
+    _worker_state['optimizer'] = BudgetOptimizer()
+
+
+def profile_to_preferences(profile):
+    """Convert a user_profiles.json entry or a cleaned profile row into user_preferences"""
+    if 'health_profile' in profile:
+        health = profile.get('health_profile', {})
+        dietary = profile.get('dietary_preferences', {})
+        budget = profile.get('budget_constraints', {})
+        demographics = profile.get('demographics', {})
+        cooking_time = dietary.get('available_cooking_time_weekday')
+
+        preferences = {
+            'health_goals': list(health.get('health_goals', [])),
+            'dietary_restrictions': list(health.get('dietary_restrictions', [])),
+            'allergies': list(health.get('allergies', [])),
+            'budget_range': budget.get('budget_preference', 'medium'),
+            'family_size': demographics.get('family_size', 1)
+        }
+    else:
+        # Flattened rows (e.g. cleaned_user_profiles.csv) use one-hot columns
+        preferences = {
+            'health_goals': [
+                column[len('health_goal_'):] for column, value in profile.items()
+                if column.startswith('health_goal_') and value == 1
+            ],
+            'dietary_restrictions': [
+                column[len('dietary_restriction_'):] for column, value in profile.items()
+                if column.startswith('dietary_restriction_') and value == 1
+            ],
+            'allergies': [],
+            'budget_range': profile.get('budget_range', 'medium'),
+            'family_size': int(profile.get('family_size', 1) or 1)
+        }
+        cooking_time = profile.get('available_cooking_time')
+
+    if cooking_time is not None and not pd.isna(cooking_time):
+        if cooking_time <= 30:
+            preferences['available_time'] = 'low'
+        elif cooking_time <= 60:
+            preferences['available_time'] = 'medium'
+        else:
+            preferences['available_time'] = 'high'
+
+    return preferences
+
+
+def plan_for_user(profile):
+    """Generate and budget-optimize one user's weekly plan inside a worker"""
+    recommender = _worker_state['recommender']
+    optimizer = _worker_state['optimizer']
+    preferences = profile_to_preferences(profile)
+
+    weekly_plan = recommender.generate_weekly_plan(preferences, user_id=profile.get('user_id'))
+
+    # The optimizer works on one chosen meal per slot: take the top option
+    primary_plan = {
+        day: {meal: copy.deepcopy(options[0]) if options else None for meal, options in meals.items()}
+        for day, meals in weekly_plan.items()
+    }
+    budget_range = preferences['budget_range']
+    if budget_range not in optimizer.budget_ranges:
+        budget_range = 'medium'
+    optimized_plan = optimizer.optimize_meal_plan_cost(
+        primary_plan, budget_range, preferences.get('family_size', 1)
+    )
+
+    return {
+        'user_id': profile.get('user_id'),
+        'weekly_plan': weekly_plan,
+        'optimized_plan': optimized_plan,
+        'total_cost': optimizer.calculate_meal_plan_cost(optimized_plan)
+    }
+
+
+def iter_user_profiles(source, chunksize=10000):
+    """Stream user profiles from a JSON/CSV path, a DataFrame or an iterable of dicts
+
+    A JSON path holds either a list of profiles or an object with a 'users'
+    list (the user_profiles.json layout).
+    """
+    if isinstance(source, pd.DataFrame):
+        for profile in source.to_dict('records'):
+            yield profile
+    elif isinstance(source, str) and source.endswith('.csv'):
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            for profile in chunk.to_dict('records'):
+                yield profile
+    elif isinstance(source, str):
+        # Parsed incrementally, so only one profile is held in memory at a time
+        with open(source, 'r') as f:
+            for profile in iter_json_array(f, 'users'):
+                yield profile
+    else:
+        for profile in source:
+            yield profile
+
+
+def truncate_partial_line(output_path):
+    """Drop a half-written final line left behind by a crash"""
+    if not output_path or not os.path.exists(output_path):
+        return
+
+    with open(output_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        # Scan backwards for the last newline without reading the whole file
+        while position > 0:
+            block_start = max(0, position - 65536)
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            if position == end and block.endswith(b'\n'):
+                return
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                f.truncate(block_start + newline + 1)
+                return
+            position = block_start
+        f.truncate(0)
+
+
+def completed_user_ids(output_path):
+    """User IDs already written to a JSONL output (used to resume after a crash)
+
+    Results without a user_id are left out, so they do not mark every
+    other ID-less profile as done.
+    """
+    completed = set()
+    if not output_path or not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r') as f:
+        for line in f:
+            try:
+                user_id = json.loads(line)['user_id']
+            except (ValueError, KeyError):
+                continue
+            if user_id is not None:
+                completed.add(user_id)
+    return completed
+
+
+class BatchPlanGenerator:
+    """Generate weekly plans for a stream of users on a process pool"""
+
+    def __init__(self, recipe_features_path, collaborative_model_path=None, workers=None,
+                 similarity_mode='blocked', max_in_flight=None, max_error_samples=100):
+        self.recipe_features_path = recipe_features_path
+        self.collaborative_model_path = collaborative_model_path
+        self.workers = workers or os.cpu_count() or 1
+        self.similarity_mode = similarity_mode
+        # Bounded submission keeps memory flat for arbitrarily long user streams
+        self.max_in_flight = max_in_flight or self.workers * 4
+        # 'failed' counts every error; only the first max_error_samples are kept
+        self.max_error_samples = max_error_samples
+        self.stats = {'completed': 0, 'failed': 0, 'skipped': 0, 'elapsed_seconds': 0.0,
+                      'plans_per_second': 0.0, 'errors': []}
+
+    def run(self, profiles, output_path=None):
+        """Yield plan results as they complete, appending each to output_path"""
+        # A crash can leave a truncated final line; that user is redone
+        truncate_partial_line(output_path)
+        done_ids = completed_user_ids(output_path)
+        output = open(output_path, 'a') if output_path else None
+        start = time.perf_counter()
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.recipe_features_path, self.collaborative_model_path,
+                          self.similarity_mode)
+            ) as pool:
+                in_flight = {}
+                profile_iter = iter_user_profiles(profiles)
+
+                while True:
+                    for profile in profile_iter:
+                        user_id = profile.get('user_id')
+                        if user_id is not None and user_id in done_ids:
+                            self.stats['skipped'] += 1
+                            continue
+                        in_flight[pool.submit(plan_for_user, profile)] = user_id
+                        if len(in_flight) >= self.max_in_flight:
+                            break
+
+                    if not in_flight:
+                        break
+
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        user_id = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as exc:
+                            self.stats['failed'] += 1
+                            if len(self.stats['errors']) < self.max_error_samples:
+                                self.stats['errors'].append({'user_id': user_id, 'error': repr(exc)})
+                            continue
+
+                        if output:
+                            output.write(json.dumps(result, default=str) + '\n')
+                            output.flush()
+                        self.stats['completed'] += 1
+                        self.update_throughput(start)
+                        yield result
+        finally:
+            self.update_throughput(start)
+            if output:
+                output.close()
+
+    def update_throughput(self, start):
+        """Refresh elapsed time and plans/second"""
+        elapsed = time.perf_counter() - start
+        self.stats['elapsed_seconds'] = elapsed
+        self.stats['plans_per_second'] = self.stats['completed'] / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate weekly plans for all users')
+    parser.add_argument('profiles', help='user_profiles.json or a cleaned profiles CSV')
+    parser.add_argument('output', help='JSONL output; rerun with the same file to resume')
+    parser.add_argument('--recipes', default='../data/processed/recipe_features.csv',
+                        help='recipe features CSV or a saved content model directory')
+    parser.add_argument('--collaborative-model', help='NCF weights or ALS factors saved as .npz')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report-every', type=int, default=1000)
+    args = parser.parse_args()
+
+    generator = BatchPlanGenerator(
+        args.recipes, collaborative_model_path=args.collaborative_model, workers=args.workers
+    )
+    for _ in generator.run(args.profiles, args.output):
+        if generator.stats['completed'] % args.report_every == 0:
+            print(f"{generator.stats['completed']} plans, "
+                  f"{generator.stats['plans_per_second']:.1f} plans/s")
+
+    stats = generator.stats
+    print(f"Done: {stats['completed']} plans, {stats['skipped']} resumed, {stats['failed']} failed "
+          f"in {stats['elapsed_seconds']:.1f}s ({stats['plans_per_second']:.1f} plans/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from recipe_catalog import bitmap_contains, bitmap_count, unpack_bitmap
+from similarity_search import top_k_indices
+
+# Implicit-feedback strength of each interaction type in user_interactions.csv
+INTERACTION_WEIGHTS = {
+    'view': 1.0,
+    'rate': 2.0,
+    'save': 3.0,
+    'cook': 4.0
+}
+
+
+def recipe_popularity(interactions):
+    """Interaction-weighted popularity per recipe_id (a pandas Series)"""
+    weights = interactions['interaction_type'].map(INTERACTION_WEIGHTS).fillna(1.0)
+    return weights.groupby(interactions['recipe_id']).sum()
+
+
+class StageMetrics:
+    """Latency and item counters for one pipeline stage (thread-safe)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.items = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds, items):
+        milliseconds = seconds * 1000
+        with self.lock:
+            self.requests += 1
+            self.total_ms += milliseconds
+            self.max_ms = max(self.max_ms, milliseconds)
+            self.items += items
+
+    def summary(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'mean_ms': self.total_ms / self.requests if self.requests else 0.0,
+                'max_ms': self.max_ms,
+                'mean_items': self.items / self.requests if self.requests else 0.0
+            }
+
+
+class CandidateGenerator:
+    """Stage one of the two-stage recommender: a cheap, bounded candidate pool
+
+    Candidates come from three sources, each with its own budget:
+    - 'content': nearest neighbours of the user's preferred recipes
+    - 'popular': the most interacted-with recipes
+    - 'segment': precomputed rule-score rankings for the user's preference
+      segment (budget range, available time and health goals)
+    Every source is checked against the user's constraint bitmap bit by
+    bit, so generation costs O(budget) rather than O(catalog). Ranked lists
+    are rebuilt lazily whenever the engine's catalog version changes. They
+    and the source counters are shared by concurrent requests (including
+    calls abandoned at a deadline), so they are swapped and updated under
+    lock.
+    """
+
+    DEFAULT_BUDGETS = {'content': 100, 'popular': 100, 'segment': 200}
+
+    def __init__(self, engine, budgets=None, rerank_budget=300, segment_depth=2000):
+        self.engine = engine
+        self.budgets = dict(self.DEFAULT_BUDGETS, **(budgets or {}))
+        self.rerank_budget = rerank_budget
+        self.segment_depth = segment_depth
+        self.popularity = None  # recipe_id -> popularity
+        self.popular_order = None
+        self.segment_lists = {}
+        self.catalog_version = None
+        self.source_counts = {source: 0 for source in self.budgets}
+        self.lock = threading.Lock()
+
+    def set_popularity(self, popularity):
+        """Use a recipe_id -> popularity mapping (e.g. recipe_popularity(interactions))"""
+        self.popularity = pd.Series(popularity, dtype=float)
+        self.popular_order = None
+
+    def refresh(self):
+        """Drop ranked lists built for an older catalog version"""
+        with self.lock:
+            version = self.engine.versions['catalog']
+            if version != self.catalog_version:
+                self.catalog_version = version
+                self.popular_order = None
+                self.segment_lists = {}
+
+    def generate(self, user_preferences, filters=None):
+        """Catalog positions of the candidates for one request, in source order"""
+        self.refresh()
+        engine = self.engine
+        bitmap = engine.user_constraint_bitmap(user_preferences)
+        if filters:
+            bitmap &= engine.recipe_catalog.filter_bitmap(**engine.filter_constraints(filters))
+
+        # Small constrained pools are cheaper to take whole than to sample
+        if bitmap_count(bitmap) <= self.rerank_budget:
+            return np.flatnonzero(unpack_bitmap(bitmap, engine.recipe_catalog.size))
+
+        sources = [
+            ('content', self.content_candidates(user_preferences)),
+            ('popular', self.popular_candidates()),
+            ('segment', self.segment_candidates(user_preferences))
+        ]
+        candidates = {}
+        for source, ranked_positions in sources:
+            taken = self.take_allowed(ranked_positions, bitmap, self.budgets[source], candidates)
+            with self.lock:
+                self.source_counts[source] += taken
+            if len(candidates) >= self.rerank_budget:
+                break
+
+        return np.fromiter(candidates, dtype=np.intp, count=len(candidates))[:self.rerank_budget]
+
+    def take_allowed(self, ranked_positions, bitmap, budget, candidates):
+        """Add up to budget new constraint-satisfying positions, walking the list in chunks"""
+        taken = 0
+        chunk = max(budget, 1)
+        for start in range(0, len(ranked_positions), chunk):
+            block = ranked_positions[start:start + chunk]
+            for position in block[bitmap_contains(bitmap, block)].tolist():
+                if position not in candidates:
+                    candidates[position] = True
+                    taken += 1
+                    if taken >= budget:
+                        return taken
+        return taken
+
+    def content_candidates(self, user_preferences):
+        """Neighbours of the preferred recipes, interleaved best first"""
+        seeds = list(user_preferences.get('preferred_recipes') or [])[:3]
+        if not seeds or self.budgets['content'] <= 0 or self.engine.content_features is None:
+            return np.empty(0, dtype=np.intp)
+
+        depth = math.ceil(self.budgets['content'] / len(seeds))
+        neighbour_ids, _ = self.engine.batch_content_based_recommendations(seeds, top_n=depth)
+        # Column-major order takes every seed's best neighbour before any second-best
+        return self.engine.get_recipe_positions(neighbour_ids.T.ravel())
+
+    def popular_candidates(self):
+        if self.popularity is None or self.budgets['popular'] <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        self.refresh()
+        version = self.catalog_version
+        popular_order = self.popular_order
+        if popular_order is None:
+            catalog = self.engine.recipe_catalog
+            popularity = self.popularity.reindex(catalog.recipe_ids).fillna(0).to_numpy()
+            order = np.argsort(-popularity, kind='stable')
+            popular_order = order[popularity[order] > 0]
+            with self.lock:
+                # A list built while the catalog changed is used once but not kept
+                if self.catalog_version == version:
+                    self.popular_order = popular_order
+        return popular_order
+
+    def segment_candidates(self, user_preferences):
+        if self.budgets['segment'] <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        self.refresh()
+        segment = self.segment_key(user_preferences)
+        with self.lock:
+            version = self.catalog_version
+            ranked_positions = self.segment_lists.get(segment)
+        if ranked_positions is None:
+            budget_range, available_time, health_goals = segment
+            segment_preferences = {
+                'budget_range': budget_range,
+                'available_time': available_time,
+                'health_goals': list(health_goals)
+            }
+            scores = self.engine.calculate_recipe_scores(segment_preferences)
+            top_idx, _ = top_k_indices(scores, self.segment_depth)
+            ranked_positions = top_idx[0]
+            with self.lock:
+                if self.catalog_version == version:
+                    self.segment_lists[segment] = ranked_positions
+        return ranked_positions
+
+    @staticmethod
+    def segment_key(user_preferences):
+        """Preference segment: the inputs of the rule-based recipe score"""
+        return (
+            user_preferences.get('budget_range', 'medium'),
+            user_preferences.get('available_time', 'medium'),
+            tuple(sorted(set(user_preferences.get('health_goals', []))))
+        )
@@ -0,0 +1,163 @@
+import threading
+
+import pandas as pd
+
+from similarity_search import top_k_indices
+
+# Budget ranges a segment table is precomputed for
+BUDGET_RANGES = ('low', 'medium', 'high')
+
+
+class SegmentTables:
+    """Precomputed recommendation lists for cold-start user segments
+
+    A segment is (health cluster, budget_range, dietary restrictions,
+    allergies, strict_budget, health goals, available_time, meal_type),
+    i.e. every preference the engine's rule-based scorer reads, so a
+    table lookup ranks exactly like full scoring would. Users who state
+    health goals are ranked for those goals. For the others the goals are
+    the common goals of their health cluster, which comes from a fitted
+    HealthClusterAnalyzer (anything with predict, features and
+    cluster_profiles); users without health data fall in cluster None.
+    Each table keeps the best `depth` recommendations for the segment's
+    preferences. Serving a new or anonymous user is then at most one
+    cluster prediction and one dictionary lookup.
+
+    Tables remember the preferences and catalog version they were built
+    from. After a catalog edit or a new cluster model, refresh (or the next
+    lookup) rebuilds only the tables whose inputs actually changed. Lookups
+    may run concurrently (deadline fallbacks run next to abandoned calls),
+    so the tables dict is only read and written under lock.
+    """
+
+    def __init__(self, engine, cluster_model=None, depth=50):
+        self.engine = engine
+        self.cluster_model = cluster_model
+        self.depth = depth
+        self.tables = {}
+        self.lock = threading.Lock()
+
+    def user_cluster(self, user_data):
+        """Health cluster of a user, or None without a cluster model or health data"""
+        if self.cluster_model is None or not user_data:
+            return None
+        if not any(pd.notna(user_data.get(feature)) for feature in self.cluster_model.features):
+            return None
+        return int(self.cluster_model.predict(user_data)[0])
+
+    def segment(self, user_preferences, user_data=None):
+        """Segment key of a user; health data defaults to the preferences dict"""
+        health_goals = tuple(sorted(set(user_preferences.get('health_goals') or [])))
+        # Stated goals take precedence, so the cluster only matters without them
+        cluster = None if health_goals else self.user_cluster(
+            user_preferences if user_data is None else user_data
+        )
+        return (
+            cluster,
+            user_preferences.get('budget_range', 'medium'),
+            tuple(sorted(user_preferences.get('dietary_restrictions', []))),
+            tuple(sorted(user_preferences.get('allergies', []))),
+            bool(user_preferences.get('strict_budget', False)),
+            health_goals,
+            user_preferences.get('available_time', 'medium'),
+            user_preferences.get('meal_type') or None
+        )
+
+    def segment_preferences(self, segment):
+        """Preferences the segment's table is ranked for"""
+        (cluster, budget_range, dietary_restrictions, allergies, strict_budget,
+         health_goals, available_time, meal_type) = segment
+        health_goals = list(health_goals)
+        if not health_goals and cluster is not None:
+            health_goals = list(self.cluster_model.cluster_profiles.get(cluster, {}).get('common_goals', []))
+        preferences = {
+            'budget_range': budget_range,
+            'dietary_restrictions': list(dietary_restrictions),
+            'allergies': list(allergies),
+            'strict_budget': strict_budget,
+            'health_goals': health_goals,
+            'available_time': available_time
+        }
+        if meal_type is not None:
+            preferences['meal_type'] = meal_type
+        return preferences
+
+    def is_current(self, segment):
+        with self.lock:
+            table = self.tables.get(segment)
+        return (table is not None
+                and table['catalog_version'] == self.engine.versions['catalog']
+                and table['preferences'] == self.segment_preferences(segment))
+
+    def build_table(self, segment):
+        """Rank the catalog for one segment and store its top `depth` recommendations"""
+        preferences = self.segment_preferences(segment)
+        catalog_version = self.engine.versions['catalog']
+        positions, scores = self.engine.score_candidates(preferences)
+        top_idx, _ = top_k_indices(scores, self.depth)
+        table = {
+            'preferences': preferences,
+            'catalog_version': catalog_version,
+            'recommendations': self.engine.build_recommendations(
+                positions[top_idx[0]], scores[top_idx[0]], preferences
+            )
+        }
+        with self.lock:
+            self.tables[segment] = table
+        return table['recommendations']
+
+    def build(self, users_df=None):
+        """Precompute tables for every segment in users_df, plus every cluster x budget default
+
+        users_df rows hold health data and preference columns
+        (budget_range, dietary_restrictions, ...). Returns the number of
+        tables built.
+        """
+        clusters = [None]
+        if self.cluster_model is not None:
+            clusters += list(range(self.cluster_model.n_clusters))
+        segments = {(cluster, budget, (), (), False, (), 'medium', None)
+                    for cluster in clusters for budget in BUDGET_RANGES}
+        if users_df is not None:
+            for user in users_df.to_dict('records'):
+                user = {key: value for key, value in user.items()
+                        if isinstance(value, (list, tuple)) or pd.notna(value)}
+                segments.add(self.segment(user))
+        for segment in segments:
+            self.build_table(segment)
+        return len(segments)
+
+    def refresh(self):
+        """Rebuild the tables made stale by catalog or cluster model changes
+
+        Returns the number of tables rebuilt.
+        """
+        with self.lock:
+            segments = list(self.tables)
+        stale = [segment for segment in segments if not self.is_current(segment)]
+        for segment in stale:
+            self.build_table(segment)
+        return len(stale)
+
+    def set_cluster_model(self, cluster_model):
+        """Swap in a refitted cluster model; only tables whose goals changed go stale"""
+        self.cluster_model = cluster_model
+        with self.lock:
+            for segment in [segment for segment in self.tables if segment[0] is not None]:
+                if segment[0] >= cluster_model.n_clusters:
+                    del self.tables[segment]
+        # Users may now map to other segments
+        self.engine.bump_version('model', 'cluster_model', cluster_model)
+
+    def lookup(self, user_preferences, user_data=None, top_n=15):
+        """Recommendations for a cold-start user from their segment's table"""
+        segment = self.segment(user_preferences, user_data)
+        if top_n > self.depth:
+            raise ValueError(f"top_n={top_n} is deeper than the segment tables (depth={self.depth})")
+        with self.lock:
+            table = self.tables.get(segment)
+        if table is None or not self.is_current(segment):
+            recommendations = self.build_table(segment)
+        else:
+            recommendations = table['recommendations']
+        return [dict(recommendation) for recommendation in recommendations[:top_n]]
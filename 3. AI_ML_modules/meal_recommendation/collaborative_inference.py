@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: np.reciprocal(1 + np.exp(-x, out=x), out=x),
+    'tanh': lambda x: np.tanh(x, out=x),
+    'linear': lambda x: x
+}
+
+
+def _id_array(ids):
+    """ID vocabulary as a pickle-free array (object IDs are stored as strings)"""
+    ids = np.asarray(ids)
+    return ids.astype(str) if ids.dtype == object else ids
+
+
+class NCFScorer:
+    """Batched NumPy forward pass of the neural collaborative filtering model
+
+    Scores users against the whole recipe catalog without Keras ``predict``.
+    The first dense layer acts on [user_vec, recipe_vec], so its weight is
+    split in two: the recipe half is applied to every recipe embedding once
+    at load time, and each user only adds its own projection before the
+    remaining layers run over (users x recipes) rows in memory-capped chunks.
+    """
+
+    def __init__(self, user_embeddings, recipe_embeddings, dense_layers,
+                 user_ids=None, recipe_ids=None, batch_size=256, max_memory_mb=256):
+        """dense_layers is a list of (weights, bias, activation) tuples"""
+        self.user_embeddings = np.asarray(user_embeddings, dtype=np.float32)
+        self.recipe_embeddings = np.asarray(recipe_embeddings, dtype=np.float32)
+        self.dense_layers = [
+            (np.asarray(weights, dtype=np.float32), np.asarray(bias, dtype=np.float32), activation)
+            for weights, bias, activation in dense_layers
+        ]
+        for _, _, activation in self.dense_layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation in NCF model: {activation}")
+
+        num_users, embedding_size = self.user_embeddings.shape
+        num_recipes = self.recipe_embeddings.shape[0]
+        self.user_ids = pd.Index(user_ids if user_ids is not None else np.arange(num_users))
+        self.recipe_ids = pd.Index(recipe_ids if recipe_ids is not None else np.arange(num_recipes))
+        self.batch_size = batch_size
+        self.max_memory_mb = max_memory_mb
+
+        # Split the first layer into its user and recipe halves
+        first_weights, first_bias, self.first_activation = self.dense_layers[0]
+        self.user_projection = first_weights[:embedding_size]
+        self.recipe_hidden = self.recipe_embeddings @ first_weights[embedding_size:] + first_bias
+        self.widest_layer = max(weights.shape[1] for weights, _, _ in self.dense_layers)
+
+    @classmethod
+    def from_keras_model(cls, model, user_ids=None, recipe_ids=None, **kwargs):
+        """Extract embedding tables and dense weights from a trained Keras model"""
+        user_embeddings = model.get_layer('user_embedding').get_weights()[0]
+        recipe_embeddings = model.get_layer('recipe_embedding').get_weights()[0]
+
+        dense_layers = []
+        for layer in model.layers:
+            if layer.__class__.__name__ == 'Dense':
+                weights, bias = layer.get_weights()
+                dense_layers.append((weights, bias, layer.get_config()['activation']))
+
+        return cls(user_embeddings, recipe_embeddings, dense_layers,
+                   user_ids=user_ids, recipe_ids=recipe_ids, **kwargs)
+
+    def save(self, file_path):
+        """Write the weights and ID vocabularies to a plain .npz file"""
+        arrays = {
+            'user_embeddings': self.user_embeddings,
+            'recipe_embeddings': self.recipe_embeddings,
+            'activations': np.array([activation for _, _, activation in self.dense_layers]),
+            'user_ids': _id_array(self.user_ids),
+            'recipe_ids': _id_array(self.recipe_ids)
+        }
+        for layer, (weights, bias, _) in enumerate(self.dense_layers):
+            arrays[f'dense_{layer}_weights'] = weights
+            arrays[f'dense_{layer}_bias'] = bias
+
+        np.savez(file_path, **arrays)
+
+    @classmethod
+    def load(cls, file_path, **kwargs):
+        """Load weights written by save (or export_collaborative_model)"""
+        with np.load(file_path, allow_pickle=False) as data:
+            activations = data['activations'].tolist()
+            dense_layers = [
+                (data[f'dense_{layer}_weights'], data[f'dense_{layer}_bias'], activation)
+                for layer, activation in enumerate(activations)
+            ]
+            return cls(
+                data['user_embeddings'],
+                data['recipe_embeddings'],
+                dense_layers,
+                user_ids=data['user_ids'],
+                recipe_ids=data['recipe_ids'],
+                **kwargs
+            )
+
+    def user_positions(self, user_ids):
+        """Embedding rows of the given user IDs (-1 for unknown users)"""
+        return self.user_ids.get_indexer(list(user_ids))
+
+    def recipe_positions(self, recipe_ids):
+        """Embedding rows of the given recipe IDs (-1 for unknown recipes)"""
+        return self.recipe_ids.get_indexer(list(recipe_ids))
+
+    def score_users(self, user_indices, recipe_indices=None):
+        """Predict interaction scores for users x recipes
+
+        user_indices and recipe_indices are embedding rows; recipe_indices
+        defaults to every recipe. Returns a float32 (n_users, n_recipes)
+        matrix. Users are processed batch_size at a time and recipes are
+        chunked so that the largest hidden activation block stays under
+        max_memory_mb.
+        """
+        user_indices = np.asarray(user_indices, dtype=np.intp)
+        if recipe_indices is None:
+            recipe_hidden = self.recipe_hidden
+        else:
+            recipe_hidden = self.recipe_hidden[np.asarray(recipe_indices, dtype=np.intp)]
+        num_recipes = recipe_hidden.shape[0]
+
+        scores = np.empty((len(user_indices), num_recipes), dtype=np.float32)
+        max_rows = max(1, int(self.max_memory_mb * 2 ** 20) // (4 * self.widest_layer))
+
+        for user_start in range(0, len(user_indices), self.batch_size):
+            batch = user_indices[user_start:user_start + self.batch_size]
+            user_hidden = self.user_embeddings[batch] @ self.user_projection
+            recipe_chunk = max(1, max_rows // len(batch))
+
+            for recipe_start in range(0, num_recipes, recipe_chunk):
+                recipe_stop = min(recipe_start + recipe_chunk, num_recipes)
+                hidden = user_hidden[:, None, :] + recipe_hidden[None, recipe_start:recipe_stop, :]
+                hidden = ACTIVATIONS[self.first_activation](hidden.reshape(-1, hidden.shape[-1]))
+
+                for weights, bias, activation in self.dense_layers[1:]:
+                    hidden = ACTIVATIONS[activation](hidden @ weights + bias)
+
+                scores[user_start:user_start + len(batch), recipe_start:recipe_stop] = \
+                    hidden.reshape(len(batch), recipe_stop - recipe_start)
+
+        return scores
+
+    def score_user_ids(self, user_ids, recipe_ids=None):
+        """score_users keyed by user/recipe IDs; unknown IDs raise ValueError"""
+        user_idx = self.user_positions(user_ids)
+        if (user_idx < 0).any():
+            unknown = [user_id for user_id, idx in zip(user_ids, user_idx) if idx < 0]
+            raise ValueError(f"Unknown user_id(s): {unknown}")
+
+        recipe_idx = None
+        if recipe_ids is not None:
+            recipe_idx = self.recipe_positions(recipe_ids)
+            if (recipe_idx < 0).any():
+                unknown = [recipe_id for recipe_id, idx in zip(recipe_ids, recipe_idx) if idx < 0]
+                raise ValueError(f"Unknown recipe_id(s): {unknown}")
+
+        return self.score_users(user_idx, recipe_idx)
@@ -1,35 +1,190 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.feature_extraction.text import TfidfVectorizer
 import json
 import re
 
+# Nested food record fields flattened into columns, and their column prefixes
+FOOD_RECORD_PREFIXES = {
+    'nutrients_per_100g': 'nutrient_',
+    'nutrients_per_100g_cooked': 'nutrient_cooked_',
+    'common_serving_sizes': 'serving_'
+}
+WHITESPACE = re.compile(r'\s*')
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+
+class JSONStream:
+    """Incremental reader of consecutive JSON values from a text file
+    
+    Only the unparsed tail of the file is buffered, so memory is bounded
+    by the largest single value plus one read. A value that needs more
+    than max_buffer characters of buffer raises ValueError, so a truncated
+    or malformed file is not read into memory whole.
+    """
+    
+    def __init__(self, file_obj, read_size=1 << 16, max_buffer=1 << 26):
+        self.file_obj = file_obj
+        self.read_size = read_size
+        self.max_buffer = max_buffer
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+    
+    def read_more(self):
+        """Append the next read to the buffer; False at end of file"""
+        chunk = self.file_obj.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        if len(self.buffer) > self.max_buffer:
+            raise ValueError(f"Malformed JSON: value exceeds {self.max_buffer} buffered characters")
+        return True
+    
+    def next_char(self):
+        """Skip whitespace and peek at the next character ('' at end of file)"""
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_more():
+                return ''
+    
+    def expect(self, chars):
+        """Consume the next character, which must be one of chars"""
+        char = self.next_char()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed JSON: expected one of {chars!r}, got {char or 'end of file'!r}")
+        self.position += 1
+        return char
+    
+    def value(self):
+        """Parse and consume the next complete JSON value"""
+        self.next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.read_more():
+                    raise
+                continue
+            # A number cut by the buffer end may continue in the next read: the
+            # decoder accepts the prefix, and stops early at a trailing '.' or 'e'
+            if not self.eof and (end == len(self.buffer) or self.continues_number(value, end)) \
+                    and self.read_more():
+                continue
+            self.position = end
+            return value
+    
+    def continues_number(self, value, end):
+        """Whether a decoded number is followed by a character that could extend it"""
+        return (isinstance(value, (int, float)) and not isinstance(value, bool)
+                and self.buffer[end] in NUMBER_CHARS)
+
+
+def iter_json_array(file_obj, key, read_size=1 << 16, max_buffer=1 << 26):
+    """Yield the elements of the array under a top-level key of a JSON object, one at a time
+    
+    A file whose top-level value is itself an array is streamed as is.
+    Top-level values before the key are parsed and discarded; nothing
+    after the array is read. max_buffer caps the characters buffered for
+    a single value (see JSONStream).
+    """
+    stream = JSONStream(file_obj, read_size, max_buffer)
+    if stream.expect('{[') == '[':
+        yield from iter_stream_array(stream)
+        return
+    if stream.next_char() != '}':
+        while True:
+            name = stream.value()
+            stream.expect(':')
+            if name == key:
+                stream.expect('[')
+                yield from iter_stream_array(stream)
+                return
+            stream.value()
+            if stream.expect(',}') == '}':
+                break
+    raise ValueError(f"No '{key}' array in the JSON object")
+
+
+def iter_stream_array(stream):
+    """Yield the elements of an array whose opening bracket was just consumed"""
+    if stream.next_char() == ']':
+        stream.position += 1
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(',]') == ']':
+            return
+
+
 class MealDataPreprocessor:
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
+        
         self.scaler = StandardScaler()
         self.label_encoders = {}
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
         
-    def load_zambian_foods(self, file_path):
-        """Load and preprocess Zambian food nutritional data"""
-        with open(file_path, 'r') as f:
-            food_data = json.load(f)
+    def load_zambian_foods(self, file_path, chunk_size=None):
+        """Load and preprocess Zambian food nutritional data
         
-        foods_df = pd.DataFrame(food_data['foods'])
+        Returns one row per food with the nested records flattened by
+        normalize_foods. With chunk_size the foods array is parsed
+        incrementally, chunk_size foods at a time, instead of loading the
+        whole file with json.load (see iter_zambian_foods).
+        """
+        if chunk_size is None:
+            with open(file_path, 'r') as f:
+                food_data = json.load(f)
+            return self.normalize_foods(food_data['foods'])
         
-        # Expand nutrients into separate columns
-        nutrient_cols = {}
-        for food in foods_df.itertuples():
-            nutrients = food.nutrients_per_100g
-            for nutrient, value in nutrients.items():
-                if nutrient not in nutrient_cols:
-                    nutrient_cols[nutrient] = []
-                nutrient_cols[nutrient].append(value)
+        chunks = list(self.iter_zambian_foods(file_path, chunk_size))
+        if not chunks:
+            return self.normalize_foods([])
+        return pd.concat(chunks, ignore_index=True)
+    
+    def iter_zambian_foods(self, file_path, chunk_size=1000):
+        """Yield load_zambian_foods' rows as DataFrames of up to chunk_size foods
         
-        for nutrient, values in nutrient_cols.items():
-            foods_df[f'nutrient_{nutrient}'] = values
+        Only the current chunk of food records is held in memory, so large
+        food composition tables can be processed with bounded memory.
+        Chunks only have the columns their own foods use.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
         
+        with open(file_path, 'r') as f:
+            foods = []
+            for food in iter_json_array(f, 'foods'):
+                foods.append(food)
+                if len(foods) == chunk_size:
+                    yield self.normalize_foods(foods)
+                    foods = []
+            if foods:
+                yield self.normalize_foods(foods)
+    
+    def normalize_foods(self, foods):
+        """Flatten food records into one DataFrame in a single json_normalize pass
+        
+        nutrients_per_100g.<nutrient> becomes the float column
+        nutrient_<nutrient>, nutrients_per_100g_cooked.<nutrient> becomes
+        nutrient_cooked_<nutrient> and common_serving_sizes.<size>.<field>
+        becomes serving_<size>_<field>. Values a food does not list are NaN.
+        """
+        foods_df = pd.json_normalize(foods)
+        foods_df = foods_df.drop(columns=[field for field in FOOD_RECORD_PREFIXES if field in foods_df.columns])
+        
+        columns = foods_df.columns.to_series()
+        for field, prefix in FOOD_RECORD_PREFIXES.items():
+            columns = columns.str.replace(rf'^{field}\.', prefix, regex=True)
+        foods_df.columns = columns.str.replace('.', '_', regex=False)
+        
+        numeric = [column for column in foods_df.columns
+                   if column.startswith('nutrient_') or column.endswith('_weight_g')]
+        foods_df[numeric] = foods_df[numeric].apply(pd.to_numeric, errors='coerce').astype(float)
         return foods_df
     
     def load_recipes(self, file_path):
@@ -53,6 +208,8 @@ class MealDataPreprocessor:
         # Encode categorical variables
         categorical_columns = ['budget_range', 'health_goals', 'dietary_restrictions']
         
+        from sklearn.preprocessing import LabelEncoder
+        
         for col in categorical_columns:
             if col in users_df.columns:
                 self.label_encoders[col] = LabelEncoder()
@@ -78,6 +235,7 @@ class MealDataPreprocessor:
         for recipe in recipes_df.itertuples():
             feature_vector = {
                 'recipe_id': recipe.id,
+                'name': getattr(recipe, 'name', ''),
                 'meal_type': recipe.meal_type,
                 'preparation_time': recipe.preparation_time,
                 'difficulty_level': recipe.difficulty_level,
@@ -87,7 +245,11 @@ class MealDataPreprocessor:
                 'protein': recipe.nutrition_facts.get('protein', 0),
                 'carbs': recipe.nutrition_facts.get('carbs', 0),
                 'fats': recipe.nutrition_facts.get('fats', 0),
-                'fiber': recipe.nutrition_facts.get('fiber', 0)
+                'fiber': recipe.nutrition_facts.get('fiber', 0),
+                # Text for the TF-IDF similarity channel (RecipeTextIndex)
+                'ingredient_names': '; '.join(
+                    ingredient.get('name', '') for ingredient in getattr(recipe, 'ingredients', [])
+                )
             }
             
             # Add cultural tags as binary features
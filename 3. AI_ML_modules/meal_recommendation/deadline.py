@@ -0,0 +1,77 @@
+import threading
+import time
+
+# Tiers that can answer a deadline-bound request, best first
+DEADLINE_TIERS = ('hybrid', 'content', 'segment', 'popular')
+
+
+class Deadline:
+    """Latency budget of one request"""
+
+    def __init__(self, deadline_ms):
+        self.expires = time.perf_counter() + deadline_ms / 1000
+
+    def remaining(self):
+        """Seconds left (0 once the deadline has passed)"""
+        return max(0.0, self.expires - time.perf_counter())
+
+
+class TierLatency:
+    """Latency estimates and counters for the full-scoring tiers
+
+    Each estimate is an exponential moving average of observed latencies,
+    including calls that outlived their deadline (recorded when they
+    finally finish). A tier whose estimate exceeds the time left is skipped
+    without being started, and its estimate decays by skip_decay so it is
+    tried again once load drops. in_flight counts calls still running,
+    including abandoned ones, so callers can stop starting new work while
+    the workers are saturated. Abandoned calls finish on worker threads
+    while their caller moves on, so all state is updated under lock.
+    """
+
+    def __init__(self, smoothing=0.2, skip_decay=0.9):
+        self.smoothing = smoothing
+        self.skip_decay = skip_decay
+        self.estimates_ms = {}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.counts = {tier: {'served': 0, 'skipped': 0, 'timeouts': 0} for tier in DEADLINE_TIERS}
+        # 'batch' times whole micro-batches scored by answer_batch
+        for tier in ('cache', 'batch'):
+            self.counts[tier] = {'served': 0, 'skipped': 0, 'timeouts': 0}
+
+    def should_skip(self, tier, remaining_seconds):
+        """Whether tier cannot be expected to finish in the remaining time"""
+        with self.lock:
+            estimate = self.estimates_ms.get(tier)
+            skip = remaining_seconds <= 0 or (estimate is not None and estimate > remaining_seconds * 1000)
+            if skip:
+                self.counts[tier]['skipped'] += 1
+                if estimate is not None:
+                    self.estimates_ms[tier] = estimate * self.skip_decay
+            return skip
+
+    def count(self, tier, event):
+        """Count a 'served', 'skipped' or 'timeouts' event of tier"""
+        with self.lock:
+            self.counts[tier][event] += 1
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finished(self, tier, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            milliseconds = seconds * 1000
+            estimate = self.estimates_ms.get(tier)
+            self.estimates_ms[tier] = milliseconds if estimate is None else (
+                (1 - self.smoothing) * estimate + self.smoothing * milliseconds
+            )
+
+    def summary(self):
+        with self.lock:
+            return {
+                tier: dict(counts, estimate_ms=self.estimates_ms.get(tier))
+                for tier, counts in self.counts.items()
+            }
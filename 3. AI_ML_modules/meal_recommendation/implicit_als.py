@@ -0,0 +1,267 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from candidate_generation import INTERACTION_WEIGHTS
+from collaborative_inference import _id_array
+
+# Per-row solvers: warm-started conjugate gradient or exact batched solves
+ALS_SOLVERS = ('cg', 'exact')
+
+# Ratings (1-5) scale an interaction's strength relative to this neutral rating
+NEUTRAL_RATING = 3.0
+
+
+def interaction_strength(interactions):
+    """Implicit-feedback strength of each interaction row
+
+    interaction_type gives the base weight (INTERACTION_WEIGHTS). A rating,
+    when present (rating > 0), scales it by rating / NEUTRAL_RATING, so a
+    5-star cook counts more than an unrated one and a 1-star one less.
+    """
+    weights = interactions['interaction_type'].map(INTERACTION_WEIGHTS).fillna(1.0).to_numpy(dtype=float)
+    if 'rating' in interactions.columns:
+        ratings = pd.to_numeric(interactions['rating'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        weights = np.where(ratings > 0, weights * ratings / NEUTRAL_RATING, weights)
+    return weights
+
+
+def confidence_matrix(interactions, user_ids=None, recipe_ids=None):
+    """Sparse user x recipe matrix of summed interaction strengths
+
+    Returns (matrix, user_ids, recipe_ids). Without explicit vocabularies
+    the IDs are taken from the interactions in first-seen order; rows with
+    IDs outside given vocabularies are dropped.
+    """
+    from scipy.sparse import csr_matrix
+
+    user_ids = pd.Index(pd.unique(interactions['user_id']) if user_ids is None else user_ids)
+    recipe_ids = pd.Index(pd.unique(interactions['recipe_id']) if recipe_ids is None else recipe_ids)
+    rows = user_ids.get_indexer(interactions['user_id'])
+    columns = recipe_ids.get_indexer(interactions['recipe_id'])
+    known = (rows >= 0) & (columns >= 0)
+
+    # Duplicate (user, recipe) pairs are summed by the COO -> CSR conversion
+    matrix = csr_matrix(
+        (interaction_strength(interactions)[known], (rows[known], columns[known])),
+        shape=(len(user_ids), len(recipe_ids)), dtype=np.float64
+    )
+    return matrix, user_ids, recipe_ids
+
+
+class ImplicitALS:
+    """Implicit-feedback matrix factorization by alternating least squares
+
+    Every observed (user, recipe) pair has preference 1 and confidence
+    1 + alpha * strength, and unobserved pairs have preference 0 and
+    confidence 1 (Hu, Koren & Volinsky). Each half-step fixes one side and
+    solves a factors x factors system per row, touching only the row's
+    interactions. solver='cg' runs cg_steps of conjugate gradient per row,
+    warm-started from the previous iteration, at O(nnz * factors) per step
+    (sparse matrix products); solver='exact' assembles every system and
+    solves them in batches with np.linalg.solve at O(nnz * factors^2).
+    Row chunks are spread over num_threads threads (NumPy and LAPACK
+    release the GIL) and sized to keep each chunk's temporaries under
+    max_memory_mb.
+
+    Serving mirrors NCFScorer (user_positions, recipe_positions,
+    score_users, save/load), so HybridRecommendationEngine can use either
+    as its collaborative backend. Scores are dot products that approximate
+    the 0/1 preference.
+    """
+
+    def __init__(self, factors=64, regularization=0.1, alpha=10.0, iterations=15, num_threads=None,
+                 max_memory_mb=256, solver='cg', cg_steps=3, seed=0):
+        if solver not in ALS_SOLVERS:
+            raise ValueError(f"Unknown ALS solver: {solver}")
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.num_threads = num_threads or os.cpu_count() or 1
+        self.max_memory_mb = max_memory_mb
+        self.solver = solver
+        self.cg_steps = cg_steps
+        self.seed = seed
+        self.user_factors = None
+        self.recipe_factors = None
+        self.user_ids = None
+        self.recipe_ids = None
+
+    def fit(self, interactions, user_ids=None, recipe_ids=None):
+        """Factorize an interactions DataFrame (user_id, recipe_id, interaction_type[, rating])"""
+        matrix, self.user_ids, self.recipe_ids = confidence_matrix(interactions, user_ids, recipe_ids)
+        if not matrix.nnz:
+            raise ValueError("No interactions to factorize")
+
+        # Keep c - 1 = alpha * strength; the constant 1 is folded into the Gram matrix
+        confidence = matrix * self.alpha
+        confidence_t = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.seed)
+        user_factors = rng.normal(0, 0.01, (len(self.user_ids), self.factors))
+        recipe_factors = rng.normal(0, 0.01, (len(self.recipe_ids), self.factors))
+        for _ in range(self.iterations):
+            user_factors = self.solve_factors(confidence, recipe_factors, user_factors)
+            recipe_factors = self.solve_factors(confidence_t, user_factors, recipe_factors)
+
+        self.user_factors = user_factors.astype(np.float32)
+        self.recipe_factors = recipe_factors.astype(np.float32)
+        return self
+
+    def solve_factors(self, confidence, fixed, current=None):
+        """Least-squares factors for every row of confidence (c - 1 values) given the other side
+
+        Row u solves (F'F + reg*I + sum_i (c_ui - 1) f_i f_i') x_u = sum_i c_ui f_i
+        over the rows i of fixed that u interacted with. With current
+        factors and solver='cg' the systems are solved approximately from
+        that starting point; otherwise they are solved exactly.
+        """
+        fixed = np.asarray(fixed, dtype=np.float64)
+        n_factors = fixed.shape[1]
+        gram = fixed.T @ fixed + self.regularization * np.eye(n_factors)
+        use_cg = self.solver == 'cg' and current is not None
+        solved = np.array(current, dtype=np.float64) if use_cg else np.zeros((confidence.shape[0], n_factors))
+        solve = self.conjugate_gradient_rows if use_cg else self.exact_rows
+
+        def solve_chunk(bounds):
+            start, stop = bounds
+            solved[start:stop] = solve(confidence[start:stop], fixed, gram, solved[start:stop])
+
+        # Exact solves stack one factors x factors matrix per interaction
+        bytes_per_entry = 8 * n_factors * (3 if use_cg else n_factors)
+        chunks = self.row_chunks(confidence.indptr, bytes_per_entry)
+        if self.num_threads > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=self.num_threads) as pool:
+                list(pool.map(solve_chunk, chunks))
+        else:
+            for bounds in chunks:
+                solve_chunk(bounds)
+        return solved
+
+    @staticmethod
+    def exact_rows(block, fixed, gram, _):
+        """Assemble and solve every row's normal equations in one batched solve"""
+        solved = np.zeros((block.shape[0], fixed.shape[1]))
+        rows = np.flatnonzero(np.diff(block.indptr))
+        if not len(rows):
+            return solved
+        vectors = fixed[block.indices]
+        segment_starts = block.indptr[rows]
+        # Empty rows add no entries, so each segment ends where the next non-empty row starts
+        outer = np.add.reduceat(
+            np.einsum('n,ni,nj->nij', block.data, vectors, vectors), segment_starts, axis=0
+        )
+        targets = np.add.reduceat((1 + block.data)[:, None] * vectors, segment_starts, axis=0)
+        solved[rows] = np.linalg.solve(gram + outer, targets[:, :, None])[:, :, 0]
+        return solved
+
+    def conjugate_gradient_rows(self, block, fixed, gram, start_factors):
+        """cg_steps of conjugate gradient for all rows at once, from start_factors"""
+        entry_rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        vectors = fixed[block.indices]
+        weighted = block.copy()
+
+        def apply(x):
+            # (F'F + reg*I) x + sum_i (c_ui - 1) (f_i . x) f_i, as a sparse product
+            weighted.data = block.data * np.einsum('ni,ni->n', vectors, x[entry_rows])
+            return x @ gram + weighted @ fixed
+
+        targets = block.copy()
+        targets.data = 1 + block.data
+        x = start_factors.copy()
+        residual = targets @ fixed - apply(x)
+        direction = residual.copy()
+        residual_norm = np.einsum('ij,ij->i', residual, residual)
+        for _ in range(self.cg_steps):
+            if residual_norm.max(initial=0) < 1e-20:
+                break
+            applied = apply(direction)
+            curvature = np.einsum('ij,ij->i', direction, applied)
+            step = np.divide(residual_norm, curvature, out=np.zeros_like(curvature), where=curvature > 0)
+            x += step[:, None] * direction
+            residual -= step[:, None] * applied
+            new_norm = np.einsum('ij,ij->i', residual, residual)
+            ratio = np.divide(new_norm, residual_norm, out=np.zeros_like(new_norm), where=residual_norm > 0)
+            direction = residual + ratio[:, None] * direction
+            residual_norm = new_norm
+        return x
+
+    def row_chunks(self, indptr, bytes_per_entry):
+        """(start, stop) row ranges whose interactions fit in max_memory_mb of temporaries"""
+        budget = max(1, int(self.max_memory_mb * 2 ** 20) // bytes_per_entry)
+        n_rows = len(indptr) - 1
+        chunks = []
+        start = 0
+        while start < n_rows:
+            stop = int(np.searchsorted(indptr, indptr[start] + budget, side='right')) - 1
+            # Also bound the number of rows handled at once
+            stop = min(max(stop, start + 1), start + budget, n_rows)
+            chunks.append((start, stop))
+            start = stop
+        return chunks
+
+    def fold_in(self, interactions):
+        """User factors for new or returning users without retraining
+
+        interactions holds the users' recent rows; recipes outside the
+        trained vocabulary are ignored. Returns (user_ids, factors).
+        """
+        if self.recipe_factors is None:
+            raise ValueError("ALS model not fitted. Call fit first.")
+        matrix, user_ids, _ = confidence_matrix(interactions, recipe_ids=self.recipe_ids)
+        factors = self.solve_factors(matrix * self.alpha, self.recipe_factors)
+        return user_ids, factors.astype(np.float32)
+
+    def add_users(self, interactions):
+        """Fold users in and serve them: known users are replaced, new ones appended"""
+        user_ids, factors = self.fold_in(interactions)
+        positions = self.user_positions(user_ids)
+        known = positions >= 0
+        user_factors = self.user_factors.copy()
+        user_factors[positions[known]] = factors[known]
+        self.user_factors = np.vstack([user_factors, factors[~known]])
+        self.user_ids = self.user_ids.append(user_ids[~known])
+        return self.user_positions(user_ids)
+
+    def user_positions(self, user_ids):
+        """Factor rows of the given user IDs (-1 for unknown users)"""
+        return self.user_ids.get_indexer(list(user_ids))
+
+    def recipe_positions(self, recipe_ids):
+        """Factor rows of the given recipe IDs (-1 for unknown recipes)"""
+        return self.recipe_ids.get_indexer(list(recipe_ids))
+
+    def score_users(self, user_indices, recipe_indices=None):
+        """Predicted preferences for users x recipes as a float32 matrix"""
+        recipe_factors = self.recipe_factors
+        if recipe_indices is not None:
+            recipe_factors = recipe_factors[np.asarray(recipe_indices, dtype=np.intp)]
+        return self.user_factors[np.asarray(user_indices, dtype=np.intp)] @ recipe_factors.T
+
+    def save(self, file_path):
+        """Write the factors and ID vocabularies to a plain .npz file"""
+        np.savez(
+            file_path,
+            backend=np.array('als'),
+            user_factors=self.user_factors,
+            recipe_factors=self.recipe_factors,
+            user_ids=_id_array(self.user_ids),
+            recipe_ids=_id_array(self.recipe_ids),
+            hyperparameters=np.array([self.regularization, self.alpha])
+        )
+
+    @classmethod
+    def load(cls, file_path, **kwargs):
+        """Load factors written by save"""
+        with np.load(file_path, allow_pickle=False) as data:
+            regularization, alpha = data['hyperparameters'].tolist()
+            model = cls(factors=data['user_factors'].shape[1], regularization=regularization,
+                        alpha=alpha, **kwargs)
+            model.user_factors = data['user_factors']
+            model.recipe_factors = data['recipe_factors']
+            model.user_ids = pd.Index(data['user_ids'])
+            model.recipe_ids = pd.Index(data['recipe_ids'])
+        return model
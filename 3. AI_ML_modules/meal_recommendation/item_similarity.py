@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from implicit_als import confidence_matrix
+from similarity_search import top_k_indices
+
+
+class CoInteractionIndex:
+    """Item-item "people who cooked X also cooked Y" neighbours
+
+    Keeps the sparse user x recipe matrix of interaction strengths and, for
+    every recipe, its top_k most similar recipes by cosine similarity of
+    their user columns. Similarities come from sparse products
+    (recipes x users) @ (users x recipes) computed block_size recipes at a
+    time, so only a (block_size, n_recipes) score block is ever dense.
+    Recipes that share no users are never neighbours, so a row may hold
+    fewer than top_k entries (padded with -1).
+
+    New interactions are added incrementally. Recomputed rows are the
+    recipes of the users who interacted plus every row listing a recipe
+    whose column grew. Any other row only saw neighbour scores fall, so its
+    top-k is unchanged.
+    """
+
+    def __init__(self, top_k=50, block_size=512):
+        self.top_k = top_k
+        self.block_size = block_size
+        self.user_ids = None
+        self.recipe_ids = None
+        self.user_items = None   # CSR users x recipes
+        self.item_users = None   # CSR recipes x users
+        self.norms = None
+        self.neighbour_idx = None
+        self.neighbour_scores = None
+
+    def fit(self, interactions):
+        """Build the matrix and every recipe's neighbours from an interactions DataFrame"""
+        matrix, self.user_ids, self.recipe_ids = confidence_matrix(interactions)
+        self.set_matrix(matrix)
+        self.neighbour_idx = np.full((len(self.recipe_ids), self.top_k), -1, dtype=np.intp)
+        self.neighbour_scores = np.zeros((len(self.recipe_ids), self.top_k), dtype=np.float32)
+        self.recompute_rows(np.arange(len(self.recipe_ids)))
+        return self
+
+    def set_matrix(self, matrix):
+        self.user_items = matrix.tocsr()
+        self.item_users = matrix.T.tocsr()
+        self.norms = np.sqrt(np.asarray(self.item_users.multiply(self.item_users).sum(axis=1)).ravel())
+
+    def recompute_rows(self, items):
+        """Recompute the neighbour lists of the given recipe positions"""
+        n_items = len(self.recipe_ids)
+        inverse_norms = np.divide(1.0, self.norms, out=np.zeros_like(self.norms), where=self.norms > 0)
+        for start in range(0, len(items), self.block_size):
+            block = items[start:start + self.block_size]
+            # Sparse co-occurrence for the block, densified one block at a time
+            scores = (self.item_users[block] @ self.user_items).toarray()
+            scores *= inverse_norms[block][:, None]
+            scores *= inverse_norms[None, :]
+            top_idx, top_scores = top_k_indices(scores, min(self.top_k, n_items - 1), exclude=block)
+
+            linked = top_scores > 0
+            self.neighbour_idx[block] = -1
+            self.neighbour_scores[block] = 0
+            width = top_idx.shape[1]
+            self.neighbour_idx[block, :width] = np.where(linked, top_idx, -1)
+            self.neighbour_scores[block, :width] = np.where(linked, top_scores, 0)
+        return len(items)
+
+    def add_interactions(self, interactions):
+        """Add new interactions and refresh the affected neighbour lists
+
+        Returns the number of recipe rows that were recomputed.
+        """
+        new_users = pd.Index(pd.unique(interactions['user_id'])).difference(self.user_ids, sort=False)
+        new_recipes = pd.Index(pd.unique(interactions['recipe_id'])).difference(self.recipe_ids, sort=False)
+        self.user_ids = self.user_ids.append(new_users)
+        self.recipe_ids = self.recipe_ids.append(new_recipes)
+        n_users, n_items = len(self.user_ids), len(self.recipe_ids)
+
+        delta, _, _ = confidence_matrix(interactions, self.user_ids, self.recipe_ids)
+        matrix = self.user_items.copy()
+        matrix.resize((n_users, n_items))
+        self.set_matrix(matrix + delta)
+
+        grown = np.unique(delta.indices)
+        padding = n_items - len(self.neighbour_idx)
+        self.neighbour_idx = np.vstack([self.neighbour_idx, np.full((padding, self.top_k), -1, dtype=np.intp)])
+        self.neighbour_scores = np.vstack([self.neighbour_scores,
+                                           np.zeros((padding, self.top_k), dtype=np.float32)])
+
+        touched_users = np.flatnonzero(np.diff(delta.indptr))
+        affected = np.union1d(
+            np.unique(self.user_items[touched_users].indices),
+            np.flatnonzero(np.isin(self.neighbour_idx, grown).any(axis=1))
+        )
+        return self.recompute_rows(affected)
+
+    def recipe_positions(self, recipe_ids):
+        """Rows of the given recipe IDs (-1 for recipes without interactions)"""
+        return self.recipe_ids.get_indexer(list(recipe_ids))
+
+    def aggregate(self, positions):
+        """Summed neighbour scores of several seed rows as (positions, scores), best first"""
+        positions = np.asarray(positions, dtype=np.intp)
+        neighbours = self.neighbour_idx[positions].ravel()
+        scores = self.neighbour_scores[positions].ravel()
+        linked = neighbours >= 0
+        totals = np.bincount(neighbours[linked], weights=scores[linked], minlength=len(self.recipe_ids))
+        totals[positions] = 0
+        candidates = np.flatnonzero(totals > 0)
+        order = np.lexsort((candidates, -totals[candidates]))
+        return candidates[order], totals[candidates[order]]
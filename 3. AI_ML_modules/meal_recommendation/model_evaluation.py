@@ -1,9 +1,5 @@
 import pandas as pd
 import numpy as np
-from sklearn.metrics import precision_score, recall_score, f1_score, ndcg_score
-from sklearn.model_selection import cross_val_score
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 class ModelEvaluator:
     def __init__(self, recommendation_engine, test_data):
@@ -44,6 +40,8 @@ class ModelEvaluator:
     
     def evaluate_ndcg(self, k=10):
         """Evaluate Normalized Discounted Cumulative Gain"""
+        from sklearn.metrics import ndcg_score
+        
         ndcg_scores = []
         
         for user_id in self.test_data['user_id'].unique():
@@ -83,6 +81,9 @@ class ModelEvaluator:
     
     def plot_metrics_comparison(self, models_metrics):
         """Plot comparison of different models"""
+        # Plotting libraries are only loaded for offline reporting
+        import matplotlib.pyplot as plt
+        
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         
         # Precision comparison
@@ -115,6 +116,69 @@ class ModelEvaluator:
         plt.savefig('../reports/model_comparison.png', dpi=300, bbox_inches='tight')
         plt.show()
 
+# Reduced-precision content model settings compared against float64
+PRECISION_CONFIGURATIONS = {
+    'float32': {'precision': 'float32'},
+    'float32 + float16 scores': {'precision': 'float32', 'score_quantization': 'float16'},
+    'float32 + int8 scores': {'precision': 'float32', 'score_quantization': 'int8'}
+}
+
+def evaluate_similarity_precision(recipe_features, similarity_mode='top_k', k=10, top_k_neighbours=50,
+                                  configurations=None, sample_size=500, seed=0):
+    """Accuracy report for reduced-precision content models
+    
+    Builds a float64 baseline and one model per configuration, queries the
+    top-k similar recipes for a sample of recipes and reports memory use,
+    top-k overlap with the baseline and the largest rank-wise score error.
+    """
+    from recommendation_engine import HybridRecommendationEngine
+    
+    configurations = configurations or PRECISION_CONFIGURATIONS
+    recipe_ids = pd.Index(recipe_features['recipe_id'])
+    rng = np.random.default_rng(seed)
+    sample = recipe_ids[rng.choice(len(recipe_ids), min(sample_size, len(recipe_ids)), replace=False)]
+    
+    def build(settings):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(
+            recipe_features, similarity_mode=similarity_mode,
+            top_k_neighbours=top_k_neighbours, **settings
+        )
+        neighbour_ids, scores = engine.batch_content_based_recommendations(list(sample), top_n=k)
+        return engine.content_model_nbytes(), neighbour_ids, np.asarray(scores, dtype=float)
+    
+    baseline_bytes, baseline_ids, baseline_scores = build({'precision': 'float64'})
+    
+    rows = [{
+        'configuration': 'float64',
+        'memory_bytes': baseline_bytes,
+        'memory_ratio': 1.0,
+        'mean_overlap@k': 1.0,
+        'min_overlap@k': 1.0,
+        'identical_lists': 1.0,
+        'max_score_error': 0.0
+    }]
+    for name, settings in configurations.items():
+        nbytes, neighbour_ids, scores = build(settings)
+        overlaps = np.array([
+            len(set(expected) & set(actual)) / k
+            for expected, actual in zip(baseline_ids.tolist(), neighbour_ids.tolist())
+        ])
+        rows.append({
+            'configuration': name,
+            'memory_bytes': nbytes,
+            'memory_ratio': nbytes / baseline_bytes,
+            'mean_overlap@k': overlaps.mean(),
+            'min_overlap@k': overlaps.min(),
+            'identical_lists': np.mean([
+                expected == actual
+                for expected, actual in zip(baseline_ids.tolist(), neighbour_ids.tolist())
+            ]),
+            'max_score_error': float(np.abs(scores - baseline_scores).max())
+        })
+    
+    return pd.DataFrame(rows)
+
 # Performance monitoring
 class PerformanceMonitor:
     def __init__(self):
@@ -0,0 +1,270 @@
+"""Streaming training of the neural collaborative filtering model
+
+user_interactions.csv is read in fixed-size chunks, so memory stays flat
+however many interactions there are:
+
+1. A first pass builds the ID vocabulary (user/recipe ID -> embedding row)
+   and the timestamp range. Only unique IDs are held in memory.
+2. Interactions after train_end (the last validation_days of the log) are
+   held out for validation, so the model is validated on the future.
+3. Each chunk is mapped through the vocabulary, given negatives_per_positive
+   random negative recipes per interaction and shuffled, then cut into
+   batches for a tf.data pipeline.
+4. Model, optimizer and epoch counter are checkpointed after every epoch.
+   Rerunning with the same checkpoint directory resumes from the last
+   epoch and keeps the saved vocabulary.
+
+Training is CPU only. The trained weights are exported as .npz for the
+TensorFlow-free NCFScorer.
+
+Usage:
+    python ncf_training.py ../data/raw/user_interactions.csv checkpoints/ncf \
+        --recipes ../data/processed/recipe_features.csv --epochs 10
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from recommendation_engine import HybridRecommendationEngine
+
+
+def read_interaction_chunks(interactions_path, chunksize=100000):
+    """Stream (user_id, recipe_id, timestamp) chunks from an interactions CSV"""
+    header = pd.read_csv(interactions_path, nrows=0).columns
+    time_column = 'timestamp' if 'timestamp' in header else 'date'
+    for chunk in pd.read_csv(interactions_path, usecols=['user_id', 'recipe_id', time_column],
+                             dtype={'user_id': str, 'recipe_id': str}, chunksize=chunksize):
+        chunk['timestamp'] = pd.to_datetime(chunk.pop(time_column), utc=True)
+        yield chunk
+
+
+class InteractionVocabulary:
+    """Contiguous embedding rows for user and recipe IDs, in first-seen order"""
+
+    def __init__(self, user_ids=(), recipe_ids=()):
+        self.user_ids = pd.Index(list(user_ids), dtype=object)
+        self.recipe_ids = pd.Index(list(recipe_ids), dtype=object)
+
+    @property
+    def num_users(self):
+        return len(self.user_ids)
+
+    @property
+    def num_recipes(self):
+        return len(self.recipe_ids)
+
+    @classmethod
+    def from_interactions(cls, interactions_path, recipe_ids=(), chunksize=100000):
+        """Build the vocabulary in one streaming pass
+
+        recipe_ids (e.g. the catalog) are placed first, so recipes nobody
+        has interacted with yet still get embeddings and negative samples.
+        Returns (vocabulary, stats) where stats holds the row count and the
+        first and last timestamps.
+        """
+        users = {}
+        recipes = dict.fromkeys(str(recipe_id) for recipe_id in recipe_ids)
+        stats = {'rows': 0, 'first_timestamp': None, 'last_timestamp': None}
+        for chunk in read_interaction_chunks(interactions_path, chunksize):
+            users.update(dict.fromkeys(chunk['user_id']))
+            recipes.update(dict.fromkeys(chunk['recipe_id']))
+            stats['rows'] += len(chunk)
+            first, last = chunk['timestamp'].min(), chunk['timestamp'].max()
+            if stats['first_timestamp'] is None or first < stats['first_timestamp']:
+                stats['first_timestamp'] = first
+            if stats['last_timestamp'] is None or last > stats['last_timestamp']:
+                stats['last_timestamp'] = last
+        return cls(users, recipes), stats
+
+    def encode(self, chunk):
+        """Embedding rows of a chunk's users and recipes (-1 for unknown IDs)"""
+        return (self.user_ids.get_indexer(chunk['user_id']),
+                self.recipe_ids.get_indexer(chunk['recipe_id']))
+
+    def save(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump({'user_ids': list(self.user_ids), 'recipe_ids': list(self.recipe_ids)}, f)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        return cls(data['user_ids'], data['recipe_ids'])
+
+
+def add_negative_samples(users, recipes, num_recipes, negatives_per_positive, rng):
+    """Pair every positive (user, recipe) with random recipes labelled 0
+
+    Negatives are drawn uniformly from the whole recipe vocabulary, so an
+    occasional negative is a recipe the user did interact with; at
+    realistic catalog sizes that noise is negligible.
+    """
+    negative_users = np.repeat(users, negatives_per_positive)
+    negative_recipes = rng.integers(0, num_recipes, len(negative_users))
+    labels = np.zeros(len(users) + len(negative_users), dtype=np.float32)
+    labels[:len(users)] = 1
+    return (np.concatenate([users, negative_users]),
+            np.concatenate([recipes, negative_recipes]),
+            labels)
+
+
+def training_batches(interactions_path, vocabulary, train_end, split='train', negatives_per_positive=4,
+                     batch_size=1024, chunksize=100000, seed=0, stats=None):
+    """Yield shuffled (users, recipes, labels) batches for one pass over the log
+
+    split='train' keeps interactions before train_end and 'validation' the
+    rest. Interactions whose IDs are missing from the vocabulary (new data
+    on a resumed run) are skipped and counted in stats['unknown'].
+    Examples are shuffled within each chunk, so the working set is one
+    chunk with its negatives.
+    """
+    if split not in ('train', 'validation'):
+        raise ValueError(f"Unknown split: {split}")
+
+    rng = np.random.default_rng(seed)
+    for chunk in read_interaction_chunks(interactions_path, chunksize):
+        in_split = chunk['timestamp'] < train_end
+        chunk = chunk[in_split if split == 'train' else ~in_split]
+        users, recipes = vocabulary.encode(chunk)
+        known = (users >= 0) & (recipes >= 0)
+        if stats is not None:
+            stats['unknown'] = stats.get('unknown', 0) + int((~known).sum())
+        if not known.any():
+            continue
+
+        users, recipes, labels = add_negative_samples(
+            users[known], recipes[known], vocabulary.num_recipes, negatives_per_positive, rng
+        )
+        order = rng.permutation(len(labels))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            yield users[batch], recipes[batch], labels[batch]
+
+
+def import_tensorflow_cpu():
+    """Import TensorFlow with every GPU hidden"""
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+    import tensorflow as tf
+
+    try:
+        tf.config.set_visible_devices([], 'GPU')
+    except RuntimeError:
+        # Devices were already initialized by an earlier import
+        pass
+    return tf
+
+
+def make_dataset(batches):
+    """Wrap a batch-generator factory as a prefetching tf.data pipeline"""
+    tf = import_tensorflow_cpu()
+
+    def generate():
+        for users, recipes, labels in batches():
+            yield {'user_input': users.reshape(-1, 1), 'recipe_input': recipes.reshape(-1, 1)}, labels
+
+    dataset = tf.data.Dataset.from_generator(generate, output_signature=(
+        {'user_input': tf.TensorSpec(shape=(None, 1), dtype=tf.int64),
+         'recipe_input': tf.TensorSpec(shape=(None, 1), dtype=tf.int64)},
+        tf.TensorSpec(shape=(None,), dtype=tf.float32)
+    ))
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def train_collaborative_model(interactions_path, checkpoint_dir, recipe_ids=(), epochs=5,
+                              embedding_size=50, batch_size=1024, negatives_per_positive=4,
+                              validation_days=7, chunksize=100000, seed=0, export_path=None):
+    """Train the NCF model of HybridRecommendationEngine from a streamed interaction log
+
+    Resumes from checkpoint_dir when it holds an earlier run. Returns
+    (engine, history), where history has one dict of metrics per epoch
+    trained in this call. With export_path, the weights are also written
+    for NCFScorer.
+    """
+    tf = import_tensorflow_cpu()
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    vocabulary_path = os.path.join(checkpoint_dir, 'vocabulary.json')
+    split_path = os.path.join(checkpoint_dir, 'split.json')
+    if os.path.exists(vocabulary_path):
+        # Resumed runs keep the embedding rows of the first run
+        vocabulary = InteractionVocabulary.load(vocabulary_path)
+        with open(split_path, 'r') as f:
+            train_end = pd.Timestamp(json.load(f)['train_end'])
+    else:
+        vocabulary, stats = InteractionVocabulary.from_interactions(
+            interactions_path, recipe_ids, chunksize
+        )
+        if not stats['rows']:
+            raise ValueError(f"No interactions in {interactions_path}")
+        train_end = stats['last_timestamp'] - pd.Timedelta(days=validation_days)
+        if validation_days <= 0:
+            # Everything is training data
+            train_end = stats['last_timestamp'] + pd.Timedelta(1, 'ns')
+        vocabulary.save(vocabulary_path)
+        with open(split_path, 'w') as f:
+            json.dump({'train_end': train_end.isoformat(), 'validation_days': validation_days}, f)
+
+    engine = HybridRecommendationEngine()
+    model = engine.build_collaborative_model(vocabulary.num_users, vocabulary.num_recipes, embedding_size)
+    epoch = tf.Variable(0, dtype=tf.int64)
+    checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=epoch)
+    manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=3)
+    if manager.latest_checkpoint:
+        checkpoint.restore(manager.latest_checkpoint)
+
+    def batches(split, batch_seed):
+        return lambda: training_batches(
+            interactions_path, vocabulary, train_end, split, negatives_per_positive,
+            batch_size, chunksize, batch_seed
+        )
+
+    # Validation negatives are fixed so epochs are compared on the same examples
+    validation = make_dataset(batches('validation', seed)) if validation_days > 0 else None
+    history = []
+    while int(epoch.numpy()) < epochs:
+        # Negatives depend on the epoch, so a resumed run sees the same stream
+        train = make_dataset(batches('train', (seed, int(epoch.numpy()) + 1)))
+        result = model.fit(train, validation_data=validation, epochs=1, verbose=0)
+        epoch.assign_add(1)
+        manager.save(checkpoint_number=int(epoch.numpy()))
+        metrics = {name: float(values[-1]) for name, values in result.history.items()}
+        history.append(dict(metrics, epoch=int(epoch.numpy())))
+
+    if export_path:
+        engine.export_collaborative_model(
+            export_path, user_ids=vocabulary.user_ids, recipe_ids=vocabulary.recipe_ids
+        )
+    return engine, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the NCF model from user_interactions.csv')
+    parser.add_argument('interactions', help='interaction log CSV (user_id, recipe_id, timestamp)')
+    parser.add_argument('checkpoint_dir', help='checkpoints and vocabulary; rerun to resume')
+    parser.add_argument('--recipes', help='recipe_features.csv, so every catalog recipe gets an embedding')
+    parser.add_argument('--export', help='write the trained weights as .npz for NCFScorer')
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--embedding-size', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--negatives', type=int, default=4, help='negative samples per interaction')
+    parser.add_argument('--validation-days', type=float, default=7)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    args = parser.parse_args()
+
+    recipe_ids = pd.read_csv(args.recipes, usecols=['recipe_id'])['recipe_id'] if args.recipes else ()
+    _, history = train_collaborative_model(
+        args.interactions, args.checkpoint_dir, recipe_ids=recipe_ids, epochs=args.epochs,
+        embedding_size=args.embedding_size, batch_size=args.batch_size,
+        negatives_per_positive=args.negatives, validation_days=args.validation_days,
+        chunksize=args.chunksize, export_path=args.export
+    )
+    for metrics in history:
+        print(', '.join(f'{name}={value:.4f}' if isinstance(value, float) else f'{name}={value}'
+                        for name, value in metrics.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+import numpy as np
+import pandas as pd
+
+# Upper cost bound (per serving) of each cost bucket, aligned with the
+# budget thresholds used in HybridRecommendationEngine.calculate_recipe_score
+COST_BUCKETS = [
+    ('low', 15),
+    ('medium', 25),
+    ('high', np.inf)
+]
+
+# Binary feature columns in recipe_features.csv that describe cultural tags
+CULTURAL_TAG_COLUMNS = {
+    'is_traditional': 'traditional',
+    'is_zambian': 'zambian',
+    'is_modern': 'modern',
+    'is_quick': 'quick'
+}
+
+NUMERIC_COLUMNS = [
+    'preparation_time', 'cost_per_serving', 'ingredient_count',
+    'calories', 'protein', 'carbs', 'fats', 'fiber', 'sugar', 'sodium'
+]
+
+NUTRITION_COLUMNS = ['calories', 'protein', 'carbs', 'fats', 'fiber', 'sugar', 'sodium']
+
+LOW_SODIUM_MG = 140
+
+
+def pack_mask(mask):
+    """Pack a boolean mask into a bitmap of uint64 words"""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+    padding = (-len(packed)) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+
+def unpack_bitmap(bitmap, size):
+    """Unpack a uint64 bitmap into a boolean mask of the given size"""
+    return np.unpackbits(bitmap.view(np.uint8), count=size, bitorder='little').astype(bool)
+
+
+def bitmap_contains(bitmap, positions):
+    """Test individual positions in a bitmap without unpacking all of it"""
+    positions = np.asarray(positions, dtype=np.intp)
+    byte_values = bitmap.view(np.uint8)[positions >> 3]
+    return ((byte_values >> (positions & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def bitmap_count(bitmap):
+    """Number of set bits in a bitmap"""
+    return int(np.unpackbits(bitmap.view(np.uint8)).sum())
+
+
+def _as_list(value):
+    """Normalize list-like cells (lists, arrays, JSON-ish strings, NaN) to lists"""
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return [str(v).lower() for v in value]
+    if isinstance(value, str) and value:
+        return [v.strip().lower() for v in value.strip('[]{}').replace('"', '').split(',') if v.strip()]
+    return []
+
+
+class RecipeCatalog:
+    """In-memory columnar recipe catalog with bitmap indexes for filtering
+
+    Each recipe occupies one row position. Numeric attributes are kept as
+    NumPy columns and every categorical attribute value has a packed bitmap,
+    so constraint filtering is a handful of bitwise AND/OR operations over
+    N/64 words instead of per-recipe Python checks.
+    """
+
+    INDEXED_FIELDS = ['meal_type', 'cultural_tags', 'dietary', 'allergens', 'cost_bucket']
+
+    def __init__(self, recipe_ids, names, meal_types, numeric_columns, cultural_tags,
+                 dietary_flags, allergens):
+        self.recipe_ids = np.asarray(recipe_ids, dtype=object)
+        self.size = len(self.recipe_ids)
+        self.names = np.asarray(names, dtype=object)
+        self.meal_types = np.asarray(meal_types, dtype=object)
+        self.columns = {
+            name: np.asarray(values, dtype=float)
+            for name, values in numeric_columns.items()
+        }
+        self.cultural_tags = cultural_tags
+        self.dietary_flags = dietary_flags
+        self.allergens = allergens
+        self.all_bitmap = pack_mask(np.ones(self.size, dtype=bool))
+        self.empty_bitmap = pack_mask(np.zeros(self.size, dtype=bool))
+        self.bitmaps = self.build_bitmaps()
+
+    @classmethod
+    def from_dataframe(cls, recipes_df):
+        """Build a catalog from recipe_features.csv rows or recipes table rows"""
+        recipes_df = recipes_df.reset_index(drop=True)
+        size = len(recipes_df)
+
+        if 'recipe_id' in recipes_df.columns:
+            recipe_ids = recipes_df['recipe_id'].to_numpy()
+        else:
+            recipe_ids = recipes_df['id'].to_numpy()
+
+        # Nutrients either come as flat columns or as a nutrition_facts JSON column
+        nutrition = {}
+        if 'nutrition_facts' in recipes_df.columns:
+            facts = recipes_df['nutrition_facts'].apply(lambda x: x if isinstance(x, dict) else {})
+            nutrition = pd.DataFrame(facts.tolist(), index=recipes_df.index)
+
+        numeric_columns = {}
+        for column in NUMERIC_COLUMNS:
+            if column in recipes_df.columns:
+                values = recipes_df[column]
+            elif column in nutrition:
+                values = nutrition[column]
+            else:
+                values = pd.Series(0, index=recipes_df.index)
+            values = pd.to_numeric(values, errors='coerce')
+            if column == 'sodium':
+                sodium = values.to_numpy(float)
+            numeric_columns[column] = values.fillna(0).to_numpy(float)
+
+        cultural_tags = cls._list_column(recipes_df, 'cultural_tags')
+        for column, tag in CULTURAL_TAG_COLUMNS.items():
+            if column in recipes_df.columns:
+                flags = recipes_df[column].fillna(0).astype(bool).to_numpy()
+                for position in np.flatnonzero(flags):
+                    if tag not in cultural_tags[position]:
+                        cultural_tags[position].append(tag)
+
+        dietary_flags = cls._list_column(recipes_df, 'dietary_flags')
+        for column in recipes_df.columns:
+            if column.startswith('is_') and column not in CULTURAL_TAG_COLUMNS:
+                flag = column[len('is_'):]
+                flags = recipes_df[column].fillna(0).astype(bool).to_numpy()
+                for position in np.flatnonzero(flags):
+                    dietary_flags[position].append(flag)
+        if 'sodium' in recipes_df.columns or 'sodium' in nutrition:
+            # Compared before filling, so a missing sodium value is not low sodium
+            for position in np.flatnonzero(sodium <= LOW_SODIUM_MG):
+                dietary_flags[position].append('low_sodium')
+
+        meal_types = recipes_df['meal_type'].fillna('').to_numpy() if 'meal_type' in recipes_df.columns \
+            else np.full(size, '', dtype=object)
+        names = recipes_df['name'].to_numpy() if 'name' in recipes_df.columns \
+            else np.full(size, '', dtype=object)
+
+        return cls(
+            recipe_ids=recipe_ids,
+            names=names,
+            meal_types=meal_types,
+            numeric_columns=numeric_columns,
+            cultural_tags=cultural_tags,
+            dietary_flags=dietary_flags,
+            allergens=cls._list_column(recipes_df, 'allergens')
+        )
+
+    @staticmethod
+    def _list_column(recipes_df, column):
+        """Read a list-valued column as one Python list per recipe"""
+        if column not in recipes_df.columns:
+            return [[] for _ in range(len(recipes_df))]
+        return [_as_list(value) for value in recipes_df[column]]
+
+    def build_bitmaps(self):
+        """Build one packed bitmap per value of every indexed field"""
+        cost = self.columns['cost_per_serving']
+        lower = -np.inf
+        cost_masks = {}
+        for bucket, upper in COST_BUCKETS:
+            cost_masks[bucket] = (cost > lower) & (cost <= upper)
+            lower = upper
+
+        return {
+            'meal_type': self._value_bitmaps([[str(v).lower()] for v in self.meal_types]),
+            'cultural_tags': self._value_bitmaps(self.cultural_tags),
+            'dietary': self._value_bitmaps(self.dietary_flags),
+            'allergens': self._value_bitmaps(self.allergens),
+            'cost_bucket': {bucket: pack_mask(mask) for bucket, mask in cost_masks.items()}
+        }
+
+    def _value_bitmaps(self, values_per_recipe):
+        """Build bitmaps for a multi-valued field"""
+        positions = {}
+        for position, values in enumerate(values_per_recipe):
+            for value in values:
+                positions.setdefault(value, []).append(position)
+
+        bitmaps = {}
+        for value, value_positions in positions.items():
+            mask = np.zeros(self.size, dtype=bool)
+            mask[value_positions] = True
+            bitmaps[value] = pack_mask(mask)
+        return bitmaps
+
+    def _with_rows(self, recipe_ids, names, meal_types, columns, cultural_tags,
+                   dietary_flags, allergens, bitmaps):
+        """New catalog from already-computed rows and bitmaps (skips build_bitmaps)"""
+        catalog = RecipeCatalog.__new__(RecipeCatalog)
+        catalog.recipe_ids = recipe_ids
+        catalog.size = len(recipe_ids)
+        catalog.names = names
+        catalog.meal_types = meal_types
+        catalog.columns = columns
+        catalog.cultural_tags = cultural_tags
+        catalog.dietary_flags = dietary_flags
+        catalog.allergens = allergens
+        catalog.all_bitmap = pack_mask(np.ones(catalog.size, dtype=bool))
+        catalog.empty_bitmap = pack_mask(np.zeros(catalog.size, dtype=bool))
+        catalog.bitmaps = bitmaps
+        return catalog
+
+    def _mask(self, field, value):
+        """Unpacked bitmap of one field value"""
+        return unpack_bitmap(self.bitmap(field, value), self.size)
+
+    def append(self, other):
+        """Catalog with the rows of another catalog appended after these"""
+        bitmaps = {}
+        for field in self.INDEXED_FIELDS:
+            values = set(self.bitmaps[field]) | set(other.bitmaps[field])
+            bitmaps[field] = {
+                value: pack_mask(np.concatenate([
+                    self._mask(field, value), other._mask(field, value)
+                ]))
+                for value in values
+            }
+
+        return self._with_rows(
+            np.concatenate([self.recipe_ids, other.recipe_ids]),
+            np.concatenate([self.names, other.names]),
+            np.concatenate([self.meal_types, other.meal_types]),
+            {name: np.concatenate([values, other.columns[name]]) for name, values in self.columns.items()},
+            self.cultural_tags + other.cultural_tags,
+            self.dietary_flags + other.dietary_flags,
+            self.allergens + other.allergens,
+            bitmaps
+        )
+
+    def replace(self, positions, other):
+        """Catalog with the rows at positions replaced by the rows of another catalog"""
+        positions = np.asarray(positions, dtype=np.intp)
+        bitmaps = {}
+        for field in self.INDEXED_FIELDS:
+            bitmaps[field] = {}
+            for value in set(self.bitmaps[field]) | set(other.bitmaps[field]):
+                mask = self._mask(field, value)
+                mask[positions] = other._mask(field, value)
+                if mask.any() or field == 'cost_bucket':
+                    bitmaps[field][value] = pack_mask(mask)
+
+        def replaced(array, new_values):
+            array = array.copy()
+            array[positions] = new_values
+            return array
+
+        def replaced_lists(lists, new_lists):
+            lists = list(lists)
+            for position, values in zip(positions, new_lists):
+                lists[position] = values
+            return lists
+
+        return self._with_rows(
+            replaced(self.recipe_ids, other.recipe_ids),
+            replaced(self.names, other.names),
+            replaced(self.meal_types, other.meal_types),
+            {name: replaced(values, other.columns[name]) for name, values in self.columns.items()},
+            replaced_lists(self.cultural_tags, other.cultural_tags),
+            replaced_lists(self.dietary_flags, other.dietary_flags),
+            replaced_lists(self.allergens, other.allergens),
+            bitmaps
+        )
+
+    def take(self, positions):
+        """Catalog restricted to the rows at positions, in that order"""
+        positions = np.asarray(positions, dtype=np.intp)
+        bitmaps = {}
+        for field in self.INDEXED_FIELDS:
+            bitmaps[field] = {}
+            for value in self.bitmaps[field]:
+                mask = self._mask(field, value)[positions]
+                if mask.any() or field == 'cost_bucket':
+                    bitmaps[field][value] = pack_mask(mask)
+
+        return self._with_rows(
+            self.recipe_ids[positions],
+            self.names[positions],
+            self.meal_types[positions],
+            {name: values[positions] for name, values in self.columns.items()},
+            [self.cultural_tags[position] for position in positions],
+            [self.dietary_flags[position] for position in positions],
+            [self.allergens[position] for position in positions],
+            bitmaps
+        )
+
+    def bitmap(self, field, value):
+        """Bitmap of recipes whose field has the given value"""
+        return self.bitmaps[field].get(str(value).lower(), self.empty_bitmap)
+
+    def any_of(self, field, values):
+        """OR together the bitmaps of several values of a field"""
+        result = self.empty_bitmap.copy()
+        for value in values:
+            result |= self.bitmap(field, value)
+        return result
+
+    def all_of(self, field, values):
+        """AND together the bitmaps of several values of a field"""
+        result = self.all_bitmap.copy()
+        for value in values:
+            result &= self.bitmap(field, value)
+        return result
+
+    def filter_bitmap(self, meal_types=None, cultural_tags=None, dietary=None,
+                      exclude_allergens=None, cost_buckets=None, max_preparation_time=None):
+        """Combine constraints into a single bitmap
+
+        meal_types, cultural_tags and cost_buckets match any of the given
+        values, dietary requires all given flags and exclude_allergens drops
+        recipes containing any of the given allergens. None means no
+        constraint on that field.
+        """
+        result = self.all_bitmap.copy()
+
+        if meal_types:
+            result &= self.any_of('meal_type', meal_types)
+        if cultural_tags:
+            result &= self.any_of('cultural_tags', cultural_tags)
+        if dietary:
+            result &= self.all_of('dietary', dietary)
+        if exclude_allergens:
+            result &= ~self.any_of('allergens', exclude_allergens)
+        if cost_buckets:
+            result &= self.any_of('cost_bucket', cost_buckets)
+        if max_preparation_time is not None:
+            result &= pack_mask(self.columns['preparation_time'] <= max_preparation_time)
+
+        return result
+
+    def filter(self, **constraints):
+        """Row positions of recipes matching the constraints (see filter_bitmap)"""
+        return np.flatnonzero(unpack_bitmap(self.filter_bitmap(**constraints), self.size))
+
+    def to_records(self, positions):
+        """Materialize recipes at the given positions as recipe dicts"""
+        records = []
+        for position in positions:
+            recipe_id = self.recipe_ids[position]
+            if isinstance(recipe_id, np.generic):
+                recipe_id = recipe_id.item()
+            records.append({
+                'id': recipe_id,
+                'recipe_id': recipe_id,
+                'name': self.names[position],
+                'meal_type': self.meal_types[position],
+                'preparation_time': float(self.columns['preparation_time'][position]),
+                'cost_per_serving': float(self.columns['cost_per_serving'][position]),
+                'ingredient_count': float(self.columns['ingredient_count'][position]),
+                'nutrition_facts': {
+                    nutrient: float(self.columns[nutrient][position])
+                    for nutrient in NUTRITION_COLUMNS
+                },
+                'cultural_tags': list(self.cultural_tags[position]),
+                'dietary_flags': list(self.dietary_flags[position]),
+                'allergens': list(self.allergens[position])
+            })
+        return records
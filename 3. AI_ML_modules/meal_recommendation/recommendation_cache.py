@@ -0,0 +1,263 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Preference keys whose values are unordered sets of labels
+SET_VALUED_PREFERENCES = ['health_goals', 'dietary_restrictions', 'allergies']
+
+# Defaults HybridRecommendationEngine applies to missing preference keys
+PREFERENCE_DEFAULTS = {'budget_range': 'medium', 'available_time': 'medium'}
+
+# Attributes left out of state digests: back-references and knobs that do not change results
+STATE_SKIP = {'engine', 'lock', 'batch_size', 'max_memory_mb', 'num_threads'}
+
+
+def normalize_preferences(user_preferences):
+    """Canonical form of a user_preferences dict for cache keys
+
+    Only differences that cannot change the recommendations are removed:
+    set-valued fields are deduplicated and sorted, missing keys take the
+    engine defaults, empty values count as missing and only the first
+    three preferred_recipes (the ones the engine uses) are kept.
+    """
+    normalized = dict(PREFERENCE_DEFAULTS)
+    for key, value in user_preferences.items():
+        if key in SET_VALUED_PREFERENCES:
+            value = sorted(set(value or []))
+        elif key == 'preferred_recipes':
+            value = list(value or [])[:3]
+        elif key == 'strict_budget':
+            value = bool(value)
+        if value in (None, '', [], False) and key not in PREFERENCE_DEFAULTS:
+            continue
+        normalized[key] = value
+    return normalized
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serializable key parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def digest_state(*parts):
+    """Content hash of build inputs or update payloads, stable across processes
+
+    Arrays, sparse matrices and pandas objects are hashed by content,
+    containers recursively and other objects through their attributes
+    (except STATE_SKIP). Engines holding equal data get equal digests.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        update_digest(digest, part, set())
+    return digest.hexdigest()
+
+
+def update_digest(digest, value, seen):
+    """Feed one value of digest_state into digest"""
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            update_digest(digest, value.tolist(), seen)
+            return
+        digest.update(f'array{value.dtype.str}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif value is None or isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        digest.update(f'{type(value).__name__}:{value!r};'.encode())
+    elif isinstance(value, dict):
+        digest.update(f'dict{len(value)}'.encode())
+        for key in sorted(value, key=repr):
+            update_digest(digest, key, seen)
+            update_digest(digest, value[key], seen)
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            update_digest(digest, item, seen)
+    elif isinstance(value, (set, frozenset)):
+        update_digest(digest, sorted(value, key=repr), seen)
+    elif hasattr(value, 'indptr'):
+        # scipy sparse matrix
+        matrix = value.tocsr()
+        update_digest(digest, ('sparse', matrix.shape, matrix.data, matrix.indices, matrix.indptr), seen)
+    elif hasattr(value, 'columns') and hasattr(value, 'iloc'):
+        update_digest(digest, ('frame', list(value.columns), value.index.to_numpy(),
+                               [value.iloc[:, i].to_numpy() for i in range(value.shape[1])]), seen)
+    elif hasattr(value, 'index') and hasattr(value, 'to_numpy'):
+        update_digest(digest, ('series', value.index.to_numpy(), value.to_numpy()), seen)
+    elif hasattr(value, 'to_numpy'):
+        update_digest(digest, ('index', value.to_numpy()), seen)
+    elif hasattr(value, '__dict__') and not isinstance(value, type) and not callable(value):
+        if id(value) in seen:
+            return
+        seen.add(id(value))
+        attributes = {name: attribute for name, attribute in vars(value).items() if name not in STATE_SKIP}
+        update_digest(digest, (type(value).__name__, attributes), seen)
+    else:
+        # Classes, functions and the like: by name, never by address
+        digest.update(getattr(value, '__qualname__', type(value).__name__).encode())
+
+
+class InMemoryCacheBackend:
+    """Process-local LRU store of (expires_at, value) entries"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, expires_at, value, max_entries):
+        """Store an entry and return how many old entries were evicted"""
+        with self.lock:
+            self.entries[key] = (expires_at, copy.deepcopy(value))
+            self.entries.move_to_end(key)
+            evicted = 0
+            while len(self.entries) > max_entries:
+                self.entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SQLiteCacheBackend:
+    """LRU store in a SQLite file, standing in for a shared key-value server
+
+    Several worker processes on one host can point at the same file.
+    Values are stored as JSON.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS recommendation_cache ('
+            'key TEXT PRIMARY KEY, expires_at REAL, last_used REAL, value TEXT)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS recommendation_cache_lru ON recommendation_cache (last_used)'
+        )
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT expires_at, value FROM recommendation_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                'UPDATE recommendation_cache SET last_used = ? WHERE key = ?', (time.time(), key)
+            )
+            return row[0], json.loads(row[1])
+
+    def set(self, key, expires_at, value, max_entries):
+        """Store an entry and return how many old entries were evicted"""
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO recommendation_cache VALUES (?, ?, ?, ?)',
+                (key, expires_at, time.time(), json.dumps(value, default=str))
+            )
+            cursor = self.connection.execute(
+                'DELETE FROM recommendation_cache WHERE key IN ('
+                'SELECT key FROM recommendation_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                (max_entries,)
+            )
+            return max(cursor.rowcount, 0)
+
+    def delete(self, key):
+        with self.lock:
+            self.connection.execute('DELETE FROM recommendation_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute('DELETE FROM recommendation_cache')
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM recommendation_cache').fetchone()[0]
+
+
+class RecommendationCache:
+    """LRU + TTL cache of recommendation results keyed by preference fingerprints
+
+    Keys include the engine's catalog and model state hashes (digests of
+    their build inputs and updates, see digest_state), so a catalog, price
+    or model change makes every
+    older entry unreachable, also for other processes sharing the backend.
+    The engine also clears the cache at that point to free the space.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=300, backend=None, clock=time.time):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend if backend is not None else InMemoryCacheBackend()
+        self.clock = clock
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        # Requests and abandoned deadline calls update stats from several threads
+        self.stats_lock = threading.Lock()
+
+    def key(self, kind, user_preferences, *parts):
+        """Cache key for one call: kind, normalized preferences and extra key parts"""
+        return fingerprint(kind, normalize_preferences(user_preferences), *parts)
+
+    def get(self, key):
+        """Cached value or None"""
+        entry = self.backend.get(key)
+        if entry is not None and entry[0] < self.clock():
+            self.backend.delete(key)
+            self.count('expired')
+            entry = None
+
+        if entry is None:
+            self.count('misses')
+            return None
+        self.count('hits')
+        return copy.deepcopy(entry[1])
+
+    def set(self, key, value):
+        self.count('evictions', self.backend.set(
+            key, self.clock() + self.ttl_seconds, value, self.max_entries
+        ))
+
+    def count(self, stat, amount=1):
+        with self.stats_lock:
+            self.stats[stat] += amount
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.backend)
@@ -1,25 +1,146 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import StandardScaler
-import tensorflow as tf
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Dense, Embedding, Flatten, Concatenate, Dropout
+from collaborative_inference import NCFScorer
+from implicit_als import ImplicitALS
+from item_similarity import CoInteractionIndex
+from ann_index import IVFIndex
+from cold_start import SegmentTables
+from deadline import Deadline, TierLatency
+from recipe_catalog import RecipeCatalog, unpack_bitmap, bitmap_contains
+from recommendation_cache import RecommendationCache, digest_state
+from candidate_generation import CandidateGenerator, StageMetrics, recipe_popularity
+from text_similarity import RecipeTextIndex
+from similarity_search import (
+    top_k_indices, normalize_rows, blocked_top_k, blended_top_k, build_top_k_graph, patch_top_k_graph,
+    graph_from_arrays, quantize_scores, dequantize_scores, mmr_rerank, PRECISIONS, SCORE_QUANTIZATIONS
+)
 import warnings
 warnings.filterwarnings('ignore')
 
+# How user dietary restrictions map onto catalog bitmap indexes:
+# ('dietary', flag) requires the flag, ('allergens', allergen) excludes it
+DIETARY_RESTRICTION_RULES = {
+    'vegetarian': ('dietary', 'vegetarian'),
+    'vegan': ('dietary', 'vegan'),
+    'gluten_free': ('dietary', 'gluten_free'),
+    'low_sodium': ('dietary', 'low_sodium'),
+    'halal': ('dietary', 'halal'),
+    'lactose': ('allergens', 'dairy'),
+    'lactose_intolerant': ('allergens', 'dairy'),
+    'nut_allergy': ('allergens', 'nuts'),
+    'shellfish_allergy': ('allergens', 'shellfish')
+}
+
+# Collaborative scorers by backend name; both share NCFScorer's serving interface
+COLLABORATIVE_BACKENDS = {
+    'ncf': NCFScorer,
+    'als': ImplicitALS
+}
+
+# Version of the on-disk content model layout written by save_content_model
+CONTENT_MODEL_FORMAT = 1
+
+# Cost buckets a user may be served when they ask for a strict budget
+BUDGET_COST_BUCKETS = {
+    'low': ['low'],
+    'medium': ['low', 'medium'],
+    'high': ['low', 'medium', 'high']
+}
+
 class HybridRecommendationEngine:
     def __init__(self):
         self.content_similarity_matrix = None
+        self.content_features = None      # L2-normalized scaled features
+        self.content_neighbours = None    # CSR top-k neighbour graph
+        self.content_ann_index = None     # IVFIndex over the features ('ann' mode)
+        self.ann_options = {}
+        self.similarity_mode = 'dense'
+        self.similarity_block_size = 2048
+        self.content_top_k = 50
+        self.content_feature_columns = []
+        self.precision = 'float32'        # dtype of features and similarity scores
+        self.score_quantization = None    # optional 'float16'/'int8' storage of stored scores
+        self.text_index = None            # TF-IDF channel over recipe text, see build_text_model
+        self.text_weight = 0.0            # share of text similarity in content scores
+        # Refit the scaler once feature means/stds drift this far (in fitted std units)
+        self.rescale_threshold = 0.1
         self.collaborative_model = None
+        self.collaborative_scorer = None  # NumPy serving path for the NCF model
+        self.collaborative_backend = 'ncf'  # 'ncf' or 'als', see COLLABORATIVE_BACKENDS
+        self.co_interaction_index = None  # item-item co-interaction neighbours
+        self.hybrid_weights = {'content': 0.2, 'collaborative': 0.3}
         self.recipe_features = None
+        self.recipe_index = None  # recipe_id -> row position
+        self.recipe_ids = None    # row position -> recipe_id
+        self.recipe_catalog = None
         self.user_profiles = None
-        self.scaler = StandardScaler()
+        self.scaler = None  # StandardScaler, fitted in build_content_based_model
+        # Bumped whenever cached results could go stale
+        self.versions = {'catalog': 0, 'model': 0}
+        # Hash of each component's build inputs and every update since, for cache keys
+        self.state_hashes = {'catalog': None, 'model': None}
+        self.result_cache = None
+        self.candidate_generator = None  # set by enable_two_stage
+        self.segment_tables = None  # cold-start lists, set by enable_cold_start
+        self.popularity = None      # recipe_id -> popularity, for the 'popular' fallback tier
+        self.popular_order = None   # (catalog version, ranked positions, popularity)
+        # Deadline tier latencies per request kind; both kinds share the workers
+        self.tier_latency = {'hybrid': TierLatency(), 'weekly_plan': TierLatency()}
+        self.deadline_workers = 2
+        self.deadline_executor = None
+        self.mmr_candidates = 1000  # top candidates re-ranked when diversity > 0
+        self.pipeline_metrics = None
+        
+    def build_content_based_model(self, recipe_features, similarity_mode='dense',
+                                  top_k_neighbours=50, block_size=2048, precision='float32',
+                                  score_quantization=None, ann_options=None):
+        """Build content-based filtering model
         
-    def build_content_based_model(self, recipe_features):
-        """Build content-based filtering model"""
+        similarity_mode controls what is kept in memory:
+        - 'dense': the full N x N cosine similarity matrix
+        - 'blocked': only the normalized feature matrix; similarities are
+          computed per query in blocks of block_size recipes
+        - 'top_k': the normalized features plus the top_k_neighbours of
+          every recipe in CSR form, i.e. O(N * k) memory
+        - 'ann': the normalized features plus an approximate IVFIndex over
+          them; ann_options (n_lists, n_probe, ...) are passed to IVFIndex
+        
+        precision ('float32' or 'float64') sets the dtype of the features
+        and similarity scores. score_quantization ('float16' or 'int8')
+        additionally compresses the stored similarity matrix or neighbour
+        scores; they are decoded to float32 when read.
+        """
+        if similarity_mode not in ('dense', 'blocked', 'top_k', 'ann'):
+            raise ValueError(f"Unknown similarity_mode: {similarity_mode}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        if score_quantization not in SCORE_QUANTIZATIONS:
+            raise ValueError(f"Unknown score_quantization: {score_quantization}")
+        
+        if not isinstance(recipe_features, pd.DataFrame):
+            recipe_features = pd.DataFrame(recipe_features)
         self.recipe_features = recipe_features
+        self.build_recipe_index(recipe_features['recipe_id'])
+        self.recipe_catalog = RecipeCatalog.from_dataframe(recipe_features)
+        self.bump_version('catalog', recipe_features, similarity_mode, top_k_neighbours, precision,
+                          score_quantization, ann_options, rebuild=True)
+        if self.text_index is not None:
+            self.text_index.reindex(recipe_features)
+        
+        self.similarity_mode = similarity_mode
+        self.similarity_block_size = block_size
+        self.content_top_k = top_k_neighbours
+        self.precision = precision
+        self.score_quantization = score_quantization
+        self.ann_options = dict(ann_options or {})
+        self.content_similarity_matrix = None
+        self.content_features = None
+        self.content_neighbours = None
+        self.content_ann_index = None
         
         # Select numerical features for similarity calculation
         feature_columns = [
@@ -30,18 +151,418 @@ class HybridRecommendationEngine:
         
         # Get available columns
         available_columns = [col for col in feature_columns if col in recipe_features.columns]
+        self.content_feature_columns = available_columns
         
         if available_columns:
+            from sklearn.preprocessing import StandardScaler
+            
+            self.scaler = StandardScaler()
             feature_matrix = recipe_features[available_columns].values
             feature_matrix = self.scaler.fit_transform(feature_matrix)
+            self.content_features = normalize_rows(feature_matrix).astype(PRECISIONS[precision])
             
-            # Calculate cosine similarity between recipes
-            self.content_similarity_matrix = cosine_similarity(feature_matrix)
+            if similarity_mode == 'dense':
+                if precision == 'float64':
+                    from sklearn.metrics.pairwise import cosine_similarity
+                    
+                    # Calculate cosine similarity between recipes
+                    similarity = cosine_similarity(feature_matrix)
+                else:
+                    similarity = self.content_features @ self.content_features.T
+                self.content_similarity_matrix = quantize_scores(similarity, score_quantization)
+            elif similarity_mode == 'top_k':
+                self.content_neighbours = build_top_k_graph(
+                    self.content_features, top_k_neighbours, block_size=block_size
+                )
+                self.content_neighbours.data = quantize_scores(
+                    self.content_neighbours.data, score_quantization
+                )
+            elif similarity_mode == 'ann':
+                self.content_ann_index = IVFIndex(**self.ann_options).build(self.content_features)
         
+        if similarity_mode == 'top_k':
+            return self.content_neighbours
+        if similarity_mode == 'ann':
+            return self.content_ann_index
+        if similarity_mode == 'blocked':
+            return self.content_features
         return self.content_similarity_matrix
     
+    def build_text_model(self, text_weight=0.3, **index_options):
+        """Add a TF-IDF similarity channel over recipe names, descriptions and ingredients
+        
+        The vectorizer is fitted once on the current catalog. Content
+        similarities become (1 - text_weight) * feature cosine +
+        text_weight * text cosine, scored block by block against the
+        sparse matrix. index_options are passed to RecipeTextIndex.
+        """
+        if self.recipe_features is None:
+            raise ValueError("Content-based model not built. Call build_content_based_model first.")
+        if not 0 <= text_weight <= 1:
+            raise ValueError(f"text_weight must be between 0 and 1, got {text_weight}")
+        
+        self.text_index = RecipeTextIndex(**index_options).fit(self.recipe_features)
+        self.text_weight = text_weight
+        self.bump_version('model', 'text', text_weight, index_options)
+        return self.text_index
+    
+    def save_content_model(self, directory):
+        """Write the fitted content model as a directory of .npy arrays
+        
+        Large arrays (normalized features, the similarity matrix or the
+        top-k neighbour lists) are stored as raw .npy files so that
+        load_content_model can memory-map them; worker processes on one
+        host then share a single page-cached copy. meta.json is written
+        last and marks the artifact as complete.
+        """
+        if self.recipe_features is None:
+            raise ValueError("Content-based model not built. Call build_content_based_model first.")
+        
+        os.makedirs(directory, exist_ok=True)
+        recipe_ids = np.asarray(self.recipe_ids)
+        # Object IDs are stored as strings so the arrays load without pickle
+        arrays = {'recipe_ids': recipe_ids.astype(str) if recipe_ids.dtype == object else recipe_ids}
+        if self.content_features is not None:
+            arrays['content_features'] = self.content_features
+        if self.content_similarity_matrix is not None:
+            arrays['similarity_matrix'] = self.content_similarity_matrix
+        if self.content_neighbours is not None:
+            k = self.content_neighbours_k()
+            # scipy keeps int32 CSR indices as given, so a mapped file is not copied on load
+            index_dtype = np.int32 if self.content_neighbours.nnz < 2 ** 31 else np.int64
+            arrays['neighbour_indices'] = self.content_neighbours.indices.reshape(len(self.recipe_ids), k).astype(index_dtype)
+            arrays['neighbour_scores'] = self.content_neighbours.data.reshape(len(self.recipe_ids), k)
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(array))
+        if self.text_index is not None:
+            self.text_index.save(directory)
+        if self.content_ann_index is not None:
+            self.content_ann_index.save(directory)
+        
+        self.recipe_features.to_json(
+            os.path.join(directory, 'recipe_features.json'), orient='records'
+        )
+        
+        meta = {
+            'format': CONTENT_MODEL_FORMAT,
+            'similarity_mode': self.similarity_mode,
+            'top_k_neighbours': self.content_top_k,
+            'block_size': self.similarity_block_size,
+            'precision': self.precision,
+            'score_quantization': self.score_quantization,
+            'feature_columns': self.content_feature_columns,
+            'arrays': sorted(arrays),
+            'text_model': self.text_index is not None,
+            'text_weight': self.text_weight,
+            'ann_model': self.content_ann_index is not None,
+            'ann_options': self.ann_options,
+            'catalog_state': self.state_hashes['catalog'],
+            'scaler': None if self.content_features is None else {
+                'mean': self.scaler.mean_.tolist(),
+                'var': self.scaler.var_.tolist(),
+                'scale': self.scaler.scale_.tolist(),
+                'n_samples_seen': int(np.max(self.scaler.n_samples_seen_))
+            }
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        
+        return directory
+    
+    def load_content_model(self, directory, mmap_mode='r'):
+        """Load a content model written by save_content_model
+        
+        With the default mmap_mode='r' the large arrays are opened as
+        read-only memory maps in constant time; pass mmap_mode=None to
+        read them into private memory instead. Incremental updates copy
+        the arrays they modify.
+        """
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise ValueError(f"No content model found in {directory}")
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('format') != CONTENT_MODEL_FORMAT:
+            raise ValueError(f"Unsupported content model format: {meta.get('format')}")
+        
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode,
+                          allow_pickle=False)
+            for name in meta['arrays']
+        }
+        with open(os.path.join(directory, 'recipe_features.json'), 'r') as f:
+            recipe_features = pd.DataFrame(json.load(f))
+        if recipe_features['recipe_id'].astype(str).tolist() != arrays['recipe_ids'].astype(str).tolist():
+            raise ValueError(f"recipe_features.json does not match recipe_ids.npy in {directory}")
+        
+        self.build_recipe_index(recipe_features['recipe_id'])
+        self.recipe_features = recipe_features
+        self.recipe_catalog = RecipeCatalog.from_dataframe(recipe_features)
+        # Hashed when the artifact was saved; older artifacts are hashed from their tables, not the mapped arrays
+        self.bump_version('catalog', 'artifact', meta.get('catalog_state') or (recipe_features, meta), rebuild=True)
+        self.similarity_mode = meta['similarity_mode']
+        self.similarity_block_size = meta['block_size']
+        self.content_top_k = meta['top_k_neighbours']
+        self.precision = meta.get('precision', 'float64')
+        self.score_quantization = meta.get('score_quantization')
+        self.content_feature_columns = meta['feature_columns']
+        self.content_features = arrays.get('content_features')
+        self.content_similarity_matrix = arrays.get('similarity_matrix')
+        self.content_neighbours = None
+        self.text_index = None
+        self.text_weight = meta.get('text_weight', 0.0)
+        if meta.get('text_model'):
+            self.text_index = RecipeTextIndex.load(directory, mmap_mode=mmap_mode)
+            self.bump_version('model', 'text', self.text_weight, self.state_hashes['catalog'])
+        self.ann_options = meta.get('ann_options', {})
+        self.content_ann_index = None
+        if meta.get('ann_model'):
+            self.content_ann_index = IVFIndex.load(directory, mmap_mode=mmap_mode)
+        
+        if 'neighbour_indices' in arrays:
+            # CSR over the mapped arrays; ravel of a C-contiguous map is a view
+            self.content_neighbours = graph_from_arrays(
+                arrays['neighbour_indices'], arrays['neighbour_scores']
+            )
+        
+        self.scaler = None
+        if meta['scaler'] is not None:
+            from sklearn.preprocessing import StandardScaler
+            
+            self.scaler = StandardScaler()
+            self.scaler.mean_ = np.array(meta['scaler']['mean'])
+            self.scaler.var_ = np.array(meta['scaler']['var'])
+            self.scaler.scale_ = np.array(meta['scaler']['scale'])
+            self.scaler.n_samples_seen_ = meta['scaler']['n_samples_seen']
+            self.scaler.n_features_in_ = len(self.content_feature_columns)
+        
+        return self
+    
+    def add_recipes(self, recipe_features):
+        """Add new recipes to the content model without rebuilding it
+        
+        Returns 'incremental' when only the new rows and columns were
+        computed, or 'rebuild' when the feature statistics drifted past
+        rescale_threshold and the whole model was refitted.
+        """
+        new_rows = self._recipe_frame(recipe_features)
+        known = self.recipe_index.get_indexer(list(new_rows['recipe_id'])) >= 0
+        if known.any():
+            raise ValueError(f"recipe_id(s) already in the content model: "
+                             f"{new_rows['recipe_id'][known].tolist()}")
+        
+        recipe_features = pd.concat([self.recipe_features, new_rows], ignore_index=True)
+        return self.update_content_model(
+            recipe_features,
+            self.recipe_catalog.append(RecipeCatalog.from_dataframe(new_rows)),
+            changed=np.arange(len(self.recipe_features), len(recipe_features))
+        )
+    
+    def update_recipes(self, recipe_features):
+        """Update edited recipes in place (only the given columns change)"""
+        changed_rows = self._recipe_frame(recipe_features)
+        positions = self.get_recipe_positions(changed_rows['recipe_id'])
+        
+        recipe_features = self.recipe_features.reset_index(drop=True)
+        for column in changed_rows.columns:
+            recipe_features.loc[positions, column] = changed_rows[column].to_numpy()
+        
+        return self.update_content_model(
+            recipe_features,
+            self.recipe_catalog.replace(
+                positions, RecipeCatalog.from_dataframe(recipe_features.iloc[positions])
+            ),
+            changed=positions
+        )
+    
+    def remove_recipes(self, recipe_ids):
+        """Drop recipes from the content model"""
+        positions = self.get_recipe_positions(recipe_ids)
+        keep = np.ones(len(self.recipe_features), dtype=bool)
+        keep[positions] = False
+        
+        return self.update_content_model(
+            self.recipe_features[keep].reset_index(drop=True),
+            self.recipe_catalog.take(np.flatnonzero(keep)),
+            removed=positions
+        )
+    
+    def update_prices(self, prices):
+        """Apply new per-serving costs (recipe_id -> cost_per_serving)"""
+        return self.update_recipes(pd.DataFrame({
+            'recipe_id': list(prices.keys()),
+            'cost_per_serving': [float(cost) for cost in prices.values()]
+        }))
+    
+    def bump_version(self, component, *change, rebuild=False):
+        """Record a catalog or model change and drop cached results
+        
+        change (the build inputs or the update payload) is hashed once,
+        here, and chained onto the component's state hash; rebuild starts a
+        new chain. The version counters only order changes within this
+        process, while engines elsewhere (other workers sharing the cache
+        backend, or this one after a restart) that built and updated the
+        same data reach the same hashes, so cache keys use the hashes.
+        """
+        previous = None if rebuild else self.state_hashes[component]
+        self.versions[component] += 1
+        self.state_hashes[component] = digest_state(previous, *change)
+        if self.result_cache is not None:
+            self.result_cache.clear()
+    
+    def enable_result_cache(self, cache=None, **cache_options):
+        """Serve hybrid_recommendations and weekly plans through a RecommendationCache"""
+        self.result_cache = cache if cache is not None else RecommendationCache(**cache_options)
+        return self.result_cache
+    
+    def cached_result(self, kind, user_preferences, user_id, compute, *key_parts):
+        """Return compute(), served from result_cache when one is enabled"""
+        if self.result_cache is None:
+            return compute()
+        
+        key = self.result_cache_key(kind, user_preferences, user_id, *key_parts)
+        return self.result_cache.get_or_compute(key, compute)
+    
+    def result_cache_key(self, kind, user_preferences, user_id, *key_parts):
+        """Cache key of one call under the current catalog and model state"""
+        # Without collaborative scores, users with equal preferences get equal results
+        cache_user = user_id if self.collaborative_scorer is not None else None
+        return self.result_cache.key(
+            kind, user_preferences, cache_user, self.state_hashes,
+            sorted(self.hybrid_weights.items()), self.text_weight, self.mmr_candidates, *key_parts
+        )
+    
+    def _recipe_frame(self, recipe_features):
+        """Validate an add/update batch and return it as a DataFrame"""
+        if self.recipe_index is None:
+            raise ValueError("Content-based model not built. Call build_content_based_model first.")
+        
+        if not isinstance(recipe_features, pd.DataFrame):
+            recipe_features = pd.DataFrame(recipe_features)
+        if 'recipe_id' not in recipe_features.columns:
+            raise ValueError("Recipe updates need a recipe_id column")
+        return recipe_features.reset_index(drop=True)
+    
+    def update_content_model(self, recipe_features, recipe_catalog, changed=(), removed=()):
+        """Patch the content model after rows were changed, appended or removed
+        
+        recipe_features and recipe_catalog are the new tables: surviving
+        rows in their old order followed by appended rows. changed holds
+        new positions whose features changed and removed holds old
+        positions that were dropped. Only the affected similarity rows and
+        columns (or neighbour lists) are recomputed, using the scaler that
+        was fitted at build time.
+        """
+        removed_ids = self.recipe_ids[np.asarray(removed, dtype=np.intp)]
+        self.build_recipe_index(recipe_features['recipe_id'])
+        self.recipe_features = recipe_features
+        self.recipe_catalog = recipe_catalog
+        self.bump_version('catalog', recipe_features.iloc[np.asarray(changed, dtype=np.intp)], removed_ids)
+        if self.text_index is not None:
+            self.text_index.update(recipe_features, changed=changed, removed=removed)
+        
+        if self.content_features is None:
+            return 'incremental'
+        
+        raw_features = recipe_features[self.content_feature_columns].to_numpy(dtype=float)
+        if len(raw_features) < 2 or self.feature_drift(raw_features) > self.rescale_threshold:
+            self.build_content_based_model(
+                recipe_features,
+                similarity_mode=self.similarity_mode,
+                top_k_neighbours=self.content_top_k,
+                block_size=self.similarity_block_size,
+                precision=self.precision,
+                score_quantization=self.score_quantization,
+                ann_options=self.ann_options
+            )
+            return 'rebuild'
+        
+        changed = np.union1d(
+            np.asarray(changed, dtype=np.intp),
+            np.arange(len(self.content_features) - len(removed), len(raw_features))
+        ).astype(np.intp)
+        
+        features = np.delete(self.content_features, removed, axis=0)
+        features = np.vstack([
+            features,
+            np.zeros((len(raw_features) - len(features), features.shape[1]), dtype=features.dtype)
+        ])
+        if len(changed):
+            features[changed] = normalize_rows(self.scaler.transform(raw_features[changed]))
+        self.content_features = features
+        
+        if self.content_similarity_matrix is not None:
+            matrix = self.content_similarity_matrix
+            if not matrix.flags.writeable:
+                # Memory-mapped artifact: patch a private copy
+                matrix = np.array(matrix)
+            if len(removed):
+                matrix = np.delete(np.delete(matrix, removed, axis=0), removed, axis=1)
+            if len(matrix) < len(features):
+                grown = np.empty((len(features), len(features)), dtype=matrix.dtype)
+                grown[:len(matrix), :len(matrix)] = matrix
+                matrix = grown
+            block = quantize_scores(features @ features[changed].T, self.score_quantization)
+            matrix[:, changed] = block
+            matrix[changed, :] = block.T
+            self.content_similarity_matrix = matrix
+        elif self.content_neighbours is not None:
+            # Patch a float copy; the stored lists may be quantized or memory-mapped
+            shape = (self.content_neighbours.shape[0], self.content_neighbours_k())
+            indices = np.array(self.content_neighbours.indices).reshape(shape)
+            scores = np.array(dequantize_scores(
+                self.content_neighbours.data, self.score_quantization, features.dtype
+            )).reshape(shape)
+            graph = graph_from_arrays(indices, scores)
+            self.content_neighbours = patch_top_k_graph(
+                graph, features, self.content_top_k,
+                changed=changed, removed=removed, block_size=self.similarity_block_size
+            )
+            self.content_neighbours.data = quantize_scores(
+                self.content_neighbours.data, self.score_quantization
+            )
+        elif self.content_ann_index is not None:
+            # Centroids are kept; only the changed vectors are reassigned
+            self.content_ann_index.remove(removed)
+            self.content_ann_index.replace(changed, features[changed])
+        
+        return 'incremental'
+    
+    def feature_drift(self, raw_features):
+        """Largest shift of a feature mean or std since the scaler was fitted, in fitted std units"""
+        mean_shift = np.abs(raw_features.mean(axis=0) - self.scaler.mean_)
+        std_shift = np.abs(raw_features.std(axis=0) - np.sqrt(self.scaler.var_))
+        return float(np.max(np.maximum(mean_shift, std_shift) / self.scaler.scale_))
+    
+    def build_recipe_index(self, recipe_ids):
+        """Build the recipe_id <-> row position lookup tables"""
+        recipe_index = pd.Index(recipe_ids)
+        if not recipe_index.is_unique:
+            duplicates = recipe_index[recipe_index.duplicated()].unique().tolist()
+            raise ValueError(f"Duplicate recipe_id values in recipe features: {duplicates}")
+        
+        self.recipe_index = recipe_index
+        self.recipe_ids = recipe_index.to_numpy()
+        return self.recipe_index
+    
+    def get_recipe_positions(self, recipe_ids):
+        """Map recipe IDs to row positions in the content model"""
+        if self.recipe_index is None:
+            raise ValueError("Content-based model not built. Call build_content_based_model first.")
+        
+        positions = self.recipe_index.get_indexer(list(recipe_ids))
+        if (positions < 0).any():
+            unknown = [recipe_id for recipe_id, pos in zip(recipe_ids, positions) if pos < 0]
+            raise ValueError(f"Unknown recipe_id(s): {unknown}")
+        
+        return positions.astype(np.intp)
+    
     def build_collaborative_model(self, num_users, num_recipes, embedding_size=50):
         """Build neural collaborative filtering model"""
+        # Keras is only needed for training; serving uses the exported NumPy weights
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.layers import Input, Dense, Embedding, Flatten, Concatenate, Dropout
+        
         # User input
         user_input = Input(shape=(1,), name='user_input')
         user_embedding = Embedding(num_users, embedding_size, name='user_embedding')(user_input)
@@ -76,50 +597,476 @@ class HybridRecommendationEngine:
         
         return self.collaborative_model
     
-    def content_based_recommendations(self, recipe_id, top_n=10):
-        """Get content-based recommendations"""
-        if self.content_similarity_matrix is None:
+    def build_collaborative_scorer(self, user_ids=None, recipe_ids=None, batch_size=256,
+                                   max_memory_mb=256):
+        """Extract the trained NCF weights into a batched NumPy scorer
+        
+        user_ids / recipe_ids give the ID of each embedding row, so that
+        predictions can be aligned with the recipe catalog.
+        """
+        if self.collaborative_model is None:
+            raise ValueError("Collaborative model not built. Call build_collaborative_model first.")
+        
+        self.collaborative_scorer = NCFScorer.from_keras_model(
+            self.collaborative_model,
+            user_ids=user_ids,
+            recipe_ids=recipe_ids,
+            batch_size=batch_size,
+            max_memory_mb=max_memory_mb
+        )
+        self.collaborative_backend = 'ncf'
+        self.bump_version('model', 'ncf', self.collaborative_scorer)
+        return self.collaborative_scorer
+    
+    def build_als_model(self, interactions, **als_options):
+        """Fit the implicit ALS backend on an interactions DataFrame and serve it
+        
+        A CPU-friendly alternative to the NCF model; als_options are passed
+        to ImplicitALS (factors, regularization, alpha, iterations,
+        num_threads, ...).
+        """
+        self.collaborative_scorer = ImplicitALS(**als_options).fit(interactions)
+        self.collaborative_backend = 'als'
+        self.bump_version('model', 'als', interactions, als_options)
+        return self.collaborative_scorer
+    
+    def fold_in_users(self, interactions):
+        """Compute ALS vectors for new or returning users from their recent interactions"""
+        if self.collaborative_backend != 'als' or self.collaborative_scorer is None:
+            raise ValueError("Folding in users needs the ALS backend. Call build_als_model first.")
+        positions = self.collaborative_scorer.add_users(interactions)
+        self.bump_version('model', 'fold_in', interactions)
+        return positions
+    
+    def build_co_interaction_model(self, interactions, top_k=50, block_size=512):
+        """Build item-item neighbours from recipes cooked by the same users"""
+        self.co_interaction_index = CoInteractionIndex(top_k=top_k, block_size=block_size).fit(interactions)
+        self.bump_version('model', 'co_interaction', interactions, top_k)
+        return self.co_interaction_index
+    
+    def update_co_interaction_model(self, interactions):
+        """Add new interactions to the co-interaction model without a full rebuild"""
+        if self.co_interaction_index is None:
+            raise ValueError("Co-interaction model not built. Call build_co_interaction_model first.")
+        recomputed = self.co_interaction_index.add_interactions(interactions)
+        self.bump_version('model', 'co_interaction_update', interactions)
+        return recomputed
+    
+    def export_collaborative_model(self, file_path, user_ids=None, recipe_ids=None):
+        """Export the trained NCF weights to a TensorFlow-free .npz file"""
+        scorer = self.build_collaborative_scorer(user_ids=user_ids, recipe_ids=recipe_ids)
+        scorer.save(file_path)
+        return file_path
+    
+    def load_collaborative_model(self, file_path, batch_size=256, max_memory_mb=256):
+        """Load exported NCF weights or saved ALS factors for serving (no TensorFlow required)"""
+        with np.load(file_path, allow_pickle=False) as data:
+            backend = str(data['backend']) if 'backend' in data.files else 'ncf'
+        if backend not in COLLABORATIVE_BACKENDS:
+            raise ValueError(f"Unknown collaborative backend in {file_path}: {backend}")
+        
+        options = {'max_memory_mb': max_memory_mb}
+        if backend == 'ncf':
+            options['batch_size'] = batch_size
+        self.collaborative_scorer = COLLABORATIVE_BACKENDS[backend].load(file_path, **options)
+        self.collaborative_backend = backend
+        self.bump_version('model', backend, self.collaborative_scorer)
+        return self.collaborative_scorer
+    
+    def collaborative_scores(self, user_id, positions):
+        """Collaborative predictions for one user over catalog positions
+        
+        Returns None when no collaborative model is loaded or the user is
+        unknown to it. Recipes missing from the model vocabulary score 0.
+        """
+        if self.collaborative_scorer is None or user_id is None:
+            return None
+        
+        scorer = self.collaborative_scorer
+        user_idx = scorer.user_positions([user_id])
+        if user_idx[0] < 0:
+            return None
+        
+        recipe_idx = scorer.recipe_positions(self.recipe_catalog.recipe_ids[positions])
+        known = recipe_idx >= 0
+        scores = np.zeros(len(positions))
+        scores[known] = scorer.score_users(user_idx, recipe_idx[known])[0]
+        return scores
+    
+    def content_based_recommendations(self, recipe_id, top_n=10, diversity=0.0):
+        """Get content-based recommendations
+        
+        diversity > 0 re-ranks the mmr_candidates nearest recipes with
+        maximal marginal relevance (see select_top).
+        """
+        neighbour_ids, scores = self.batch_content_based_recommendations(
+            [recipe_id], top_n=top_n if diversity == 0 else max(top_n, self.mmr_candidates)
+        )
+        if diversity != 0:
+            positions, scores = self.select_top(
+                self.get_recipe_positions(neighbour_ids[0]), scores[0], top_n, diversity
+            )
+            neighbour_ids, scores = self.recipe_ids[positions][None, :], scores[None, :]
+        
+        return [
+            {'recipe_id': similar_recipe_id, 'similarity_score': score}
+            for similar_recipe_id, score in zip(neighbour_ids[0].tolist(), scores[0].tolist())
+        ]
+    
+    def co_interaction_recommendations(self, recipe_ids, top_n=10):
+        """Recipes most often cooked by the users of the seed recipes
+        
+        Neighbour scores are summed over the seeds, and the seeds
+        themselves are excluded. Seeds without interactions contribute
+        nothing. Once a catalog is loaded, recipes missing from it are
+        skipped.
+        """
+        if self.co_interaction_index is None:
+            raise ValueError("Co-interaction model not built. Call build_co_interaction_model first.")
+        
+        index = self.co_interaction_index
+        seeds = index.recipe_positions(recipe_ids)
+        positions, scores = index.aggregate(seeds[seeds >= 0])
+        neighbour_ids = index.recipe_ids[positions]
+        if self.recipe_index is not None:
+            in_catalog = self.recipe_index.get_indexer(neighbour_ids) >= 0
+            neighbour_ids, scores = neighbour_ids[in_catalog], scores[in_catalog]
+        
+        return [
+            {'recipe_id': similar_recipe_id, 'similarity_score': score}
+            for similar_recipe_id, score in zip(neighbour_ids[:top_n].tolist(), scores[:top_n].tolist())
+        ]
+    
+    def batch_content_based_recommendations(self, recipe_ids, top_n=10):
+        """Get top-N similar recipes for many seed recipes in one vectorized call
+        
+        Returns (neighbour_ids, similarity_scores), both of shape
+        (len(recipe_ids), top_n) and ordered best first. Each seed recipe
+        is excluded from its own neighbours.
+        """
+        if self.content_features is None:
             raise ValueError("Content-based model not built. Call build_content_based_model first.")
         
-        # Get similarity scores for the given recipe
-        recipe_idx = self.recipe_features[
-            self.recipe_features['recipe_id'] == recipe_id
-        ].index[0]
+        recipe_idx = self.get_recipe_positions(recipe_ids)
         
-        similarity_scores = list(enumerate(self.content_similarity_matrix[recipe_idx]))
+        if self.text_index is not None and self.text_weight > 0:
+            # Stored similarities are feature-only, so blended scores are computed per block
+            text_matrix = self.text_index.matrix
+            neighbour_idx, scores = blended_top_k([
+                (1 - self.text_weight, self.content_features[recipe_idx], self.content_features),
+                (self.text_weight, text_matrix[recipe_idx], text_matrix)
+            ], top_n, exclude=recipe_idx, block_size=self.similarity_block_size)
+        elif self.content_similarity_matrix is not None:
+            # Partial top-k selection over all seed rows at once
+            similarity_rows = dequantize_scores(
+                self.content_similarity_matrix[recipe_idx], self.score_quantization
+            )
+            neighbour_idx, scores = top_k_indices(similarity_rows, top_n, exclude=recipe_idx)
+        elif self.content_ann_index is not None:
+            neighbour_idx, scores = self.content_ann_index.query_batch(
+                self.content_features[recipe_idx], top_n, exclude=recipe_idx
+            )
+        elif self.content_neighbours is not None and top_n <= self.content_neighbours_k():
+            # Precomputed neighbour lists are stored best first
+            k = self.content_neighbours_k()
+            neighbour_idx = self.content_neighbours.indices.reshape(-1, k)[recipe_idx, :top_n]
+            scores = dequantize_scores(
+                self.content_neighbours.data.reshape(-1, k)[recipe_idx, :top_n],
+                self.score_quantization
+            )
+        else:
+            neighbour_idx, scores = blocked_top_k(
+                self.content_features[recipe_idx], self.content_features, top_n,
+                exclude=recipe_idx, block_size=self.similarity_block_size
+            )
         
-        # Sort by similarity score
-        similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+        neighbour_ids = self.recipe_ids[neighbour_idx]
+        return neighbour_ids, scores
+    
+    def content_model_nbytes(self):
+        """Bytes held by the content features, stored similarities, ANN index and text vectors"""
+        arrays = [self.content_features, self.content_similarity_matrix]
+        if self.content_neighbours is not None:
+            arrays += [self.content_neighbours.data, self.content_neighbours.indices,
+                       self.content_neighbours.indptr]
+        if self.content_ann_index is not None:
+            arrays += [self.content_ann_index.vectors, self.content_ann_index.centroids,
+                       self.content_ann_index.rows, self.content_ann_index.offsets]
+        if self.text_index is not None:
+            arrays += [self.text_index.matrix.data, self.text_index.matrix.indices,
+                       self.text_index.matrix.indptr]
+        return sum(array.nbytes for array in arrays if array is not None)
+    
+    def content_neighbours_k(self):
+        """Number of neighbours stored per recipe in the top-k graph"""
+        if self.content_neighbours is None or self.content_neighbours.shape[0] == 0:
+            return 0
+        return self.content_neighbours.nnz // self.content_neighbours.shape[0]
+    
+    def hybrid_recommendations(self, user_id, user_preferences, top_n=15, filters=None, diversity=0.0):
+        """Generate hybrid recommendations using both content-based and collaborative filtering
         
-        # Get top N similar recipes (excluding the input recipe itself)
-        similar_recipes = []
-        for i, score in similarity_scores[1:top_n+1]:
-            similar_recipe_id = self.recipe_features.iloc[i]['recipe_id']
-            similar_recipes.append({
-                'recipe_id': similar_recipe_id,
-                'similarity_score': score
-            })
+        filters optionally narrows the candidates further, using the filter
+        dict format of ZambianMealRecommender.MEAL_FILTERS. Results are
+        cached when enable_result_cache has been called. diversity (0 to 1)
+        trades score for variety, see select_top.
+        """
+        return self.cached_result(
+            'hybrid', user_preferences, user_id,
+            lambda: self.rank_hybrid_recommendations(user_id, user_preferences, top_n, filters, diversity),
+            top_n, filters, diversity
+        )
+    
+    def hybrid_recommendations_within_deadline(self, user_id, user_preferences, deadline_ms, top_n=15,
+                                               filters=None, diversity=0.0):
+        """hybrid_recommendations from the best tier that answers within deadline_ms
         
-        return similar_recipes
+        Returns {'tier': tier, 'recommendations': [...]}, see
+        answer_within_deadline.
+        """
+        if self.recipe_catalog is None:
+            return {'tier': 'content',
+                    'recommendations': self.hybrid_recommendations(user_id, user_preferences, top_n, filters, diversity)}
+        tier, recommendations = self.answer_within_deadline(
+            'hybrid', user_id, user_preferences, deadline_ms,
+            lambda tier_user_id: self.full_hybrid_recommendations(
+                tier_user_id, user_preferences, top_n, filters, diversity
+            ),
+            lambda positions, scores: self.build_recommendations(
+                *self.select_top(positions, scores, top_n, diversity), user_preferences
+            ),
+            filters=filters, top_n=top_n, diversity=diversity, key_parts=(top_n, filters, diversity)
+        )
+        return {'tier': tier, 'recommendations': recommendations}
     
-    def hybrid_recommendations(self, user_id, user_preferences, top_n=15):
-        """Generate hybrid recommendations using both content-based and collaborative filtering"""
+    def select_top(self, positions, scores, top_n, diversity=0.0):
+        """(positions, scores) of the top_n scored catalog positions
+        
+        With diversity > 0 the best mmr_candidates are re-ranked by
+        maximal marginal relevance over the content features, so each pick
+        trades (1 - diversity) of its scaled score against diversity times
+        its highest cosine similarity to the recipes already picked.
+        diversity=0 is the plain stable top-N.
+        """
+        if diversity == 0:
+            top_idx, _ = top_k_indices(scores, top_n)
+            return positions[top_idx[0]], scores[top_idx[0]]
+        if self.content_features is None:
+            raise ValueError("Diversity re-ranking needs the content-based model. Call build_content_based_model first.")
+        
+        top_idx, _ = top_k_indices(scores, max(top_n, self.mmr_candidates))
+        candidates = top_idx[0]
+        picks = candidates[mmr_rerank(
+            scores[candidates], top_n, diversity, vectors=self.content_features[positions[candidates]]
+        )]
+        return positions[picks], scores[picks]
+    
+    def answer_within_deadline(self, kind, user_id, user_preferences, deadline_ms, full, fallback,
+                               filters=None, top_n=None, diversity=0.0, key_parts=()):
+        """(tier, result) of the best answer available within deadline_ms
+        
+        Tiers are tried best first:
+        - 'cache': a result already in result_cache
+        - 'hybrid': full scoring with collaborative predictions (only for
+          users the collaborative model knows)
+        - 'content': full scoring without them
+        - 'segment': the cold-start table of the user's segment
+        - 'popular': the most popular recipes allowed by the constraints
+        full(user_id) runs a full-scoring tier on a worker thread and is
+        abandoned when the deadline passes; a tier is not started at all
+        when its recent latency exceeds the time left or every worker is
+        still busy. fallback(positions, scores) formats a ranked list from
+        the two fallback tiers, which always answer. Abandoned calls keep
+        running on their worker, so the state they share with later tiers
+        (latency stats, candidate lists, segment tables, cache counters) is
+        updated under locks.
+        """
+        deadline = Deadline(deadline_ms)
+        latency = self.tier_latency[kind]
+        key = None
+        if self.result_cache is not None:
+            key = self.result_cache_key(kind, user_preferences, user_id, *key_parts)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                latency.count('cache', 'served')
+                return 'cache', cached
+        
+        if kind == 'hybrid' and self.is_cold_start(user_id, user_preferences, filters, diversity) \
+                and top_n <= self.segment_tables.depth:
+            latency.count('segment', 'served')
+            return 'segment', self.segment_tables.lookup(user_preferences, top_n=top_n)
+        
+        tiers = ['content']
+        if self.knows_user(user_id):
+            tiers.insert(0, 'hybrid')
+        for tier in tiers:
+            if sum(stats.in_flight for stats in self.tier_latency.values()) >= self.deadline_workers:
+                latency.count(tier, 'skipped')
+                continue
+            if latency.should_skip(tier, deadline.remaining()):
+                continue
+            
+            started = time.perf_counter()
+            latency.started()
+            future = self.deadline_pool().submit(full, user_id if tier == 'hybrid' else None)
+            future.add_done_callback(
+                lambda _, tier=tier, started=started: latency.finished(
+                    tier, time.perf_counter() - started
+                )
+            )
+            try:
+                result = future.result(timeout=deadline.remaining())
+            except FutureTimeout:
+                # The call keeps running on its worker; its latency is still recorded
+                latency.count(tier, 'timeouts')
+                continue
+            
+            if key is not None and tier == tiers[0]:
+                self.result_cache.set(key, result)
+            latency.count(tier, 'served')
+            return tier, result
+        
+        tier, positions, scores = self.fallback_ranking(user_preferences, filters)
+        latency.count(tier, 'served')
+        return tier, fallback(positions, scores)
+    
+    def deadline_pool(self):
+        if self.deadline_executor is None:
+            self.deadline_executor = ThreadPoolExecutor(max_workers=self.deadline_workers)
+        return self.deadline_executor
+    
+    def fallback_ranking(self, user_preferences, filters=None):
+        """(tier, positions, scores) of the cheap fallback tiers
+        
+        The user's segment table when cold-start tables are enabled and no
+        filters apply, otherwise the 'popular' ranking restricted to the
+        recipes the user's constraints and filters allow. That ranking
+        orders by popularity (see set_popularity) and breaks ties, or
+        replaces popularity when none is set, with a prior: the rule-based
+        score for default preferences. Scores are the popularity, or the
+        prior without popularity data.
+        """
+        if self.segment_tables is not None and not filters:
+            table = self.segment_tables.lookup(user_preferences, top_n=self.segment_tables.depth)
+            positions = self.recipe_index.get_indexer([rec['recipe_id'] for rec in table])
+            return 'segment', positions.astype(np.intp), np.array([rec['score'] for rec in table])
+        
+        catalog_version, order, scores = self.popular_order or (None, None, None)
+        if catalog_version != self.versions['catalog']:
+            prior = self.calculate_recipe_scores({})
+            if self.popularity is None:
+                scores = prior
+            else:
+                scores = self.popularity.reindex(self.recipe_catalog.recipe_ids).fillna(0).to_numpy()
+            # lexsort sorts by the last key first; stable, so catalog order breaks remaining ties
+            order = np.lexsort((-prior, -scores))
+            # Built completely before it is published, for readers on other threads
+            self.popular_order = (self.versions['catalog'], order, scores)
+        
+        bitmap = self.user_constraint_bitmap(user_preferences)
+        if filters:
+            bitmap &= self.recipe_catalog.filter_bitmap(**self.filter_constraints(filters))
+        allowed = order[unpack_bitmap(bitmap, self.recipe_catalog.size)[order]]
+        return 'popular', allowed, scores[allowed]
+    
+    def set_popularity(self, popularity):
+        """Use a recipe_id -> popularity mapping (e.g. recipe_popularity(interactions)) for the 'popular' tier"""
+        self.popularity = pd.Series(popularity, dtype=float)
+        self.popular_order = None
+    
+    def enable_two_stage(self, budgets=None, rerank_budget=300, interactions=None):
+        """Recommend via bounded candidate generation followed by re-ranking
+        
+        budgets caps each candidate source ('content', 'popular',
+        'segment'); rerank_budget caps how many candidates the hybrid
+        scorer and the NCF model see. interactions (user_interactions rows)
+        feeds the popularity source.
+        """
+        self.candidate_generator = CandidateGenerator(
+            self, budgets=budgets, rerank_budget=rerank_budget
+        )
+        if interactions is not None:
+            self.candidate_generator.set_popularity(recipe_popularity(interactions))
+            self.set_popularity(self.candidate_generator.popularity)
+        self.pipeline_metrics = {
+            'candidate_generation': StageMetrics(),
+            'reranking': StageMetrics()
+        }
+        self.bump_version('model', 'two_stage', budgets, rerank_budget, interactions)
+        return self.candidate_generator
+    
+    def enable_cold_start(self, cluster_model=None, users_df=None, depth=50):
+        """Serve cold-start users from precomputed per-segment lists
+        
+        Users with no preferred_recipes and no collaborative history are
+        mapped to a segment (every preference the rule-based scorer reads,
+        with health goals taken from their cluster in cluster_model when
+        they state none) and served from its table, so they get the same
+        ranking as full scoring. Tables are built for the segments found in
+        users_df, built on first lookup for new segments and rebuilt on
+        lookup when the catalog changes.
+        """
+        self.segment_tables = SegmentTables(self, cluster_model, depth=depth)
+        self.segment_tables.build(users_df)
+        self.bump_version('model', 'cold_start', cluster_model, depth)
+        return self.segment_tables
+    
+    def is_cold_start(self, user_id, user_preferences, filters=None, diversity=0.0):
+        """Whether a request can be answered from the cold-start segment tables"""
+        if self.segment_tables is None or filters or diversity or user_preferences.get('preferred_recipes'):
+            return False
+        return not self.knows_user(user_id)
+    
+    def knows_user(self, user_id):
+        """Whether the collaborative model has a vector for user_id"""
+        if self.collaborative_scorer is None or user_id is None:
+            return False
+        return self.collaborative_scorer.user_positions([user_id])[0] >= 0
+    
+    def two_stage_recommendations(self, user_id, user_preferences, top_n=15, filters=None, diversity=0.0):
+        """Rank only the generated candidates with the full hybrid scorer"""
+        start = time.perf_counter()
+        candidates = self.candidate_generator.generate(user_preferences, filters)
+        generated = time.perf_counter()
+        self.pipeline_metrics['candidate_generation'].record(generated - start, len(candidates))
+        
+        positions, scores = self.score_candidates(
+            user_preferences, user_id=user_id,
+            content_scores=self.aggregate_content_scores(user_preferences),
+            positions=candidates
+        )
+        # Ties go to the lower catalog position, as in the single-stage ranking
+        order = np.argsort(positions, kind='stable')
+        recommendations = self.build_recommendations(
+            *self.select_top(positions[order], scores[order], top_n, diversity), user_preferences
+        )
+        self.pipeline_metrics['reranking'].record(time.perf_counter() - generated, len(candidates))
+        return recommendations
+    
+    def rank_hybrid_recommendations(self, user_id, user_preferences, top_n=15, filters=None, diversity=0.0):
+        """Uncached hybrid_recommendations"""
+        if self.is_cold_start(user_id, user_preferences, filters, diversity) and top_n <= self.segment_tables.depth:
+            return self.segment_tables.lookup(user_preferences, top_n=top_n)
+        return self.full_hybrid_recommendations(user_id, user_preferences, top_n, filters, diversity)
+    
+    def full_hybrid_recommendations(self, user_id, user_preferences, top_n=15, filters=None, diversity=0.0):
+        """Score and rank the catalog (or generated candidates) for one request"""
+        if self.candidate_generator is not None and self.recipe_catalog is not None:
+            return self.two_stage_recommendations(user_id, user_preferences, top_n, filters, diversity)
+        
         recommendations = []
         
         # Content-based filtering based on user preferences
-        if user_preferences.get('preferred_recipes'):
-            # If user has preferred recipes, use content-based filtering
-            content_recs = []
-            for recipe_id in user_preferences['preferred_recipes'][:3]:
-                content_recs.extend(self.content_based_recommendations(recipe_id, top_n=5))
-            
-            # Aggregate and deduplicate content-based recommendations
-            content_scores = {}
-            for rec in content_recs:
-                if rec['recipe_id'] in content_scores:
-                    content_scores[rec['recipe_id']] += rec['similarity_score']
-                else:
-                    content_scores[rec['recipe_id']] = rec['similarity_score']
+        content_scores = self.aggregate_content_scores(user_preferences)
+        
+        if self.recipe_catalog is not None:
+            positions, scores = self.score_candidates(
+                user_preferences, user_id=user_id, content_scores=content_scores, filters=filters
+            )
+            # Stable top-N keeps catalog order among equal scores, like list.sort
+            return self.build_recommendations(
+                *self.select_top(positions, scores, top_n, diversity), user_preferences
+            )
         
         # Apply user constraints
         filtered_recipes = self.apply_user_constraints(user_preferences)
@@ -142,11 +1089,347 @@ class HybridRecommendationEngine:
         recommendations.sort(key=lambda x: x['score'], reverse=True)
         return recommendations[:top_n]
     
+    def batch_hybrid_recommendations(self, requests):
+        """hybrid_recommendations for many requests in one pass
+        
+        requests is a list of dicts with user_id, user_preferences and
+        optional top_n (default 15), filters and diversity. Requests with
+        diversity are ranked one by one. Content neighbours of every
+        preferred recipe are looked up in one call, collaborative scores for
+        all known users come from a single NCF forward pass, and the top-N
+        of every request is selected from one padded score matrix. Returns
+        one recommendation list per request, in order.
+        """
+        return self.answer_hybrid_batch(requests)[1]
+    
+    def batch_hybrid_recommendations_within_deadline(self, requests, deadline_ms):
+        """batch_hybrid_recommendations answered within deadline_ms
+        
+        Returns one {'tier': tier, 'recommendations': [...]} per request, see
+        answer_batch for the tiers.
+        """
+        tiers, results = self.answer_hybrid_batch(requests, deadline_ms)
+        return [{'tier': tier, 'recommendations': result} for tier, result in zip(tiers, results)]
+    
+    def answer_hybrid_batch(self, requests, deadline_ms=None):
+        """(tiers, recommendation lists) of a batch, see answer_batch"""
+        def segment_lookup(request):
+            if (self.is_cold_start(request.get('user_id'), request['user_preferences'], request.get('filters'),
+                                   request.get('diversity', 0.0))
+                    and request.get('top_n', 15) <= self.segment_tables.depth):
+                return self.segment_tables.lookup(request['user_preferences'], top_n=request.get('top_n', 15))
+            return None
+        
+        return self.answer_batch(
+            'hybrid', requests,
+            lambda request: (request.get('top_n', 15), request.get('filters'), request.get('diversity', 0.0)),
+            self.score_hybrid_batch,
+            lambda request, positions, scores: self.build_recommendations(
+                *self.select_top(positions, scores, request.get('top_n', 15), request.get('diversity', 0.0)),
+                request['user_preferences']
+            ),
+            deadline_ms, segment_lookup if self.segment_tables is not None else None
+        )
+    
+    def answer_batch(self, kind, requests, key_parts, score_batch, fallback, deadline_ms=None, shortcut=None):
+        """(tiers, results) of a batch of requests, one of each per request
+        
+        Requests are answered from result_cache ('cache') when possible,
+        then by shortcut(request) when it returns a result ('segment'), and
+        the rest are scored together by score_batch(requests), whose results
+        are cached under key_parts(request) ('hybrid' for users the
+        collaborative model knows, 'content' otherwise). With deadline_ms
+        the batch is scored on a deadline worker, like a full tier of
+        answer_within_deadline: it is not started when its recent latency
+        exceeds the time left or every worker is busy, and is abandoned when
+        the deadline passes. The requests it leaves unanswered get
+        fallback(request, positions, scores) of their fallback_ranking.
+        """
+        latency = self.tier_latency[kind]
+        deadline = None if deadline_ms is None else Deadline(deadline_ms)
+        tiers = [None] * len(requests)
+        results = [None] * len(requests)
+        keys = [None] * len(requests)
+        pending = []
+        for i, request in enumerate(requests):
+            if self.result_cache is not None:
+                keys[i] = self.result_cache_key(
+                    kind, request['user_preferences'], request.get('user_id'), *key_parts(request)
+                )
+                results[i] = self.result_cache.get(keys[i])
+                if results[i] is not None:
+                    tiers[i] = 'cache'
+                    continue
+            if shortcut is not None:
+                results[i] = shortcut(request)
+                if results[i] is not None:
+                    tiers[i] = 'segment'
+                    if keys[i] is not None:
+                        self.result_cache.set(keys[i], results[i])
+                    continue
+            pending.append(i)
+        
+        scored = None
+        if pending and deadline is None:
+            scored = score_batch([requests[i] for i in pending])
+        elif pending:
+            scored = self.score_batch_within_deadline(latency, deadline, score_batch, [requests[i] for i in pending])
+        
+        for row, i in enumerate(pending):
+            request = requests[i]
+            if scored is not None:
+                results[i] = scored[row]
+                tiers[i] = 'hybrid' if self.knows_user(request.get('user_id')) else 'content'
+                if keys[i] is not None:
+                    self.result_cache.set(keys[i], results[i])
+            else:
+                tiers[i], positions, scores = self.fallback_ranking(
+                    request['user_preferences'], request.get('filters')
+                )
+                results[i] = fallback(request, positions, scores)
+        
+        if deadline is not None:
+            for tier in tiers:
+                latency.count(tier, 'served')
+        return tiers, results
+    
+    def score_batch_within_deadline(self, latency, deadline, score_batch, requests):
+        """score_batch(requests) on a deadline worker, or None when it cannot finish in time"""
+        if sum(stats.in_flight for stats in self.tier_latency.values()) >= self.deadline_workers:
+            latency.count('batch', 'skipped')
+            return None
+        if latency.should_skip('batch', deadline.remaining()):
+            return None
+        
+        started = time.perf_counter()
+        latency.started()
+        future = self.deadline_pool().submit(score_batch, requests)
+        future.add_done_callback(
+            lambda _: latency.finished('batch', time.perf_counter() - started)
+        )
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeout:
+            latency.count('batch', 'timeouts')
+            return None
+    
+    def score_hybrid_batch(self, requests):
+        """Uncached full_hybrid_recommendations for many requests, batched where possible"""
+        results = [None] * len(requests)
+        if self.recipe_catalog is None or self.candidate_generator is not None:
+            individual, pending = list(range(len(requests))), []
+        else:
+            individual = [i for i, request in enumerate(requests) if request.get('diversity')]
+            pending = [i for i, request in enumerate(requests) if not request.get('diversity')]
+        for i in individual:
+            request = requests[i]
+            results[i] = self.full_hybrid_recommendations(
+                request.get('user_id'), request['user_preferences'],
+                request.get('top_n', 15), request.get('filters'), request.get('diversity', 0.0)
+            )
+        
+        if not pending:
+            return results
+        
+        score_matrix = self.batch_score_matrix([requests[i] for i in pending])
+        top_n = max(requests[i].get('top_n', 15) for i in pending)
+        top_idx, top_scores = top_k_indices(score_matrix, top_n)
+        for row, i in enumerate(pending):
+            request = requests[i]
+            n = request.get('top_n', 15)
+            valid = np.isfinite(top_scores[row, :n])
+            results[i] = self.build_recommendations(
+                top_idx[row, :n][valid], top_scores[row, :n][valid], request['user_preferences']
+            )
+        
+        return results
+    
+    def batch_score_matrix(self, requests):
+        """(requests, catalog) hybrid scores, -inf where a request's constraints or filters exclude a recipe
+        
+        Content neighbours for every request come from one lookup and
+        collaborative scores from one NCF forward pass.
+        """
+        content_scores = self.batch_aggregate_content_scores(
+            [request['user_preferences'] for request in requests]
+        )
+        collaborative = self.batch_collaborative_scores(
+            [request.get('user_id') for request in requests]
+        )
+        
+        score_matrix = np.full((len(requests), self.recipe_catalog.size), -np.inf)
+        for row, request in enumerate(requests):
+            positions, scores = self.score_candidates(
+                request['user_preferences'], content_scores=content_scores[row],
+                filters=request.get('filters')
+            )
+            if collaborative[row] is not None:
+                scores += self.hybrid_weights['collaborative'] * collaborative[row][positions]
+            score_matrix[row, positions] = scores
+        return score_matrix
+    
+    def batch_aggregate_content_scores(self, preferences_list):
+        """aggregate_content_scores for many users with one neighbour lookup"""
+        seeds = [list(prefs.get('preferred_recipes') or [])[:3] for prefs in preferences_list]
+        all_seeds = [recipe_id for user_seeds in seeds for recipe_id in user_seeds]
+        if not all_seeds:
+            return [{} for _ in preferences_list]
+        
+        neighbour_ids, similarity_scores = self.batch_content_based_recommendations(all_seeds, top_n=5)
+        
+        content_scores = []
+        start = 0
+        for user_seeds in seeds:
+            scores = {}
+            stop = start + len(user_seeds)
+            for recipe_id, score in zip(neighbour_ids[start:stop].ravel().tolist(),
+                                        similarity_scores[start:stop].ravel().tolist()):
+                scores[recipe_id] = scores.get(recipe_id, 0) + score
+            content_scores.append(scores)
+            start = stop
+        return content_scores
+    
+    def batch_collaborative_scores(self, user_ids):
+        """Full-catalog collaborative predictions for many users in one NCF pass
+        
+        Returns one array per user, or None for users the model does not know.
+        """
+        results = [None] * len(user_ids)
+        if self.collaborative_scorer is None:
+            return results
+        
+        scorer = self.collaborative_scorer
+        user_idx = scorer.user_positions(user_ids)
+        known_rows = np.flatnonzero(user_idx >= 0)
+        if not len(known_rows):
+            return results
+        
+        recipe_idx = scorer.recipe_positions(self.recipe_catalog.recipe_ids)
+        known_recipes = recipe_idx >= 0
+        scores = np.zeros((len(known_rows), self.recipe_catalog.size))
+        scores[:, known_recipes] = scorer.score_users(user_idx[known_rows], recipe_idx[known_recipes])
+        for row, i in enumerate(known_rows):
+            results[i] = scores[row]
+        return results
+    
+    def aggregate_content_scores(self, user_preferences):
+        """Summed similarity (recipe_id -> score) of neighbours of the user's preferred recipes"""
+        content_scores = {}
+        
+        if user_preferences.get('preferred_recipes'):
+            # If user has preferred recipes, use content-based filtering
+            neighbour_ids, similarity_scores = self.batch_content_based_recommendations(
+                user_preferences['preferred_recipes'][:3], top_n=5
+            )
+            
+            # Aggregate and deduplicate content-based recommendations
+            for recipe_id, score in zip(neighbour_ids.ravel().tolist(), similarity_scores.ravel().tolist()):
+                content_scores[recipe_id] = content_scores.get(recipe_id, 0) + score
+        
+        return content_scores
+    
+    def score_candidates(self, user_preferences, user_id=None, content_scores=None, filters=None,
+                         positions=None):
+        """Score every constrained catalog recipe in one vectorized pass
+        
+        Returns (positions, scores). The rule-based recipe score is blended
+        with the aggregated content similarity (recipe_id -> score) and the
+        collaborative prediction for user_id, weighted by self.hybrid_weights.
+        positions restricts scoring to already-selected candidates.
+        """
+        if positions is None:
+            positions = self.constrained_positions(user_preferences, filters)
+        scores = self.calculate_recipe_scores(user_preferences, positions)
+        
+        if content_scores:
+            content = pd.Series(
+                list(content_scores.values()), index=self.get_recipe_positions(list(content_scores))
+            )
+            scores += self.hybrid_weights['content'] * content.reindex(positions, fill_value=0).to_numpy()
+        
+        collaborative = self.collaborative_scores(user_id, positions)
+        if collaborative is not None:
+            scores += self.hybrid_weights['collaborative'] * collaborative
+        
+        return positions, scores
+    
+    def build_recommendations(self, positions, scores, user_preferences):
+        """Materialize recommendation dicts for already-ranked catalog positions"""
+        nutrition_scores = self.calculate_nutrition_scores(user_preferences, positions)
+        
+        recommendations = []
+        for recipe, score, nutrition_score in zip(
+            self.recipe_catalog.to_records(positions),
+            np.asarray(scores).tolist(),
+            nutrition_scores.tolist()
+        ):
+            recommendations.append({
+                'recipe_id': recipe['id'],
+                'name': recipe['name'],
+                'score': score,
+                'meal_type': recipe['meal_type'],
+                'preparation_time': recipe['preparation_time'],
+                'cost_per_serving': recipe['cost_per_serving'],
+                'nutrition_score': nutrition_score
+            })
+        
+        return recommendations
+    
     def apply_user_constraints(self, user_preferences):
         """Apply user dietary and budget constraints"""
-        # This would filter the recipe database based on user preferences
-        # For now, return all recipes (in practice, this would query the database)
-        return []  # Placeholder
+        if self.recipe_catalog is None:
+            return []
+        
+        positions = self.constrained_positions(user_preferences)
+        return self.recipe_catalog.to_records(positions)
+    
+    def constrained_positions(self, user_preferences, filters=None):
+        """Catalog row positions of recipes that satisfy the user's constraints"""
+        bitmap = self.user_constraint_bitmap(user_preferences)
+        if filters:
+            bitmap &= self.recipe_catalog.filter_bitmap(**self.filter_constraints(filters))
+        
+        return np.flatnonzero(unpack_bitmap(bitmap, self.recipe_catalog.size))
+    
+    def user_constraint_bitmap(self, user_preferences):
+        """Catalog bitmap of recipes allowed by the user's dietary and budget constraints"""
+        required_flags = []
+        excluded_allergens = list(user_preferences.get('allergies', []))
+        
+        for restriction in user_preferences.get('dietary_restrictions', []):
+            field, value = DIETARY_RESTRICTION_RULES.get(restriction, ('dietary', restriction))
+            if field == 'allergens':
+                excluded_allergens.append(value)
+            else:
+                required_flags.append(value)
+        
+        cost_buckets = None
+        if user_preferences.get('strict_budget'):
+            cost_buckets = BUDGET_COST_BUCKETS.get(user_preferences.get('budget_range', 'medium'))
+        
+        meal_type = user_preferences.get('meal_type')
+        
+        return self.recipe_catalog.filter_bitmap(
+            meal_types=[meal_type] if meal_type else None,
+            dietary=required_flags,
+            exclude_allergens=excluded_allergens,
+            cost_buckets=cost_buckets
+        )
+    
+    @staticmethod
+    def filter_constraints(filters):
+        """Translate a meal filter dict into RecipeCatalog.filter_bitmap arguments"""
+        constraints = {}
+        for key, value in filters.items():
+            if key == 'meal_type':
+                constraints['meal_types'] = [value]
+            elif key == 'preparation_time__lte':
+                constraints['max_preparation_time'] = value
+            elif key == 'cultural_tags__contains':
+                constraints['cultural_tags'] = list(value)
+            else:
+                raise ValueError(f"Unsupported recipe filter: {key}")
+        return constraints
     
     def calculate_recipe_score(self, recipe, user_preferences):
         """Calculate overall score for a recipe based on user preferences"""
@@ -192,6 +1475,58 @@ class HybridRecommendationEngine:
         
         return score
     
+    def calculate_recipe_scores(self, user_preferences, positions=None):
+        """Vectorized calculate_recipe_score over catalog rows
+        
+        Returns one score per position (all recipes if positions is None).
+        Terms are accumulated in the same order as the scalar version so
+        results are bit-for-bit identical.
+        """
+        catalog = self.recipe_catalog
+        if positions is None:
+            positions = np.arange(catalog.size)
+        columns = catalog.columns
+        score = np.zeros(len(positions))
+        
+        # Budget alignment
+        user_budget = user_preferences.get('budget_range', 'medium')
+        recipe_cost = columns['cost_per_serving'][positions]
+        
+        if user_budget == 'low':
+            score += np.where(recipe_cost <= 15, 0.3, 0.0)
+        elif user_budget == 'medium':
+            score += np.where(recipe_cost <= 25, 0.3, 0.0)
+        elif user_budget == 'high':
+            score += 0.3
+        
+        # Health goals alignment
+        health_goals = user_preferences.get('health_goals', [])
+        
+        if 'weight_loss' in health_goals:
+            score += np.where(columns['calories'][positions] <= 400, 0.2, 0.0)
+        if 'muscle_gain' in health_goals:
+            score += np.where(columns['protein'][positions] >= 20, 0.2, 0.0)
+        if 'diabetes_management' in health_goals:
+            score += np.where(columns['sugar'][positions] <= 10, 0.2, 0.0)
+        
+        # Preparation time alignment
+        user_time_preference = user_preferences.get('available_time', 'medium')
+        prep_time = columns['preparation_time'][positions]
+        
+        if user_time_preference == 'low':
+            score += np.where(prep_time <= 30, 0.1, 0.0)
+        elif user_time_preference == 'medium':
+            score += np.where(prep_time <= 60, 0.1, 0.0)
+        elif user_time_preference == 'high':
+            score += 0.1
+        
+        # Cultural preference
+        cultural_bitmap = catalog.any_of('cultural_tags', ['zambian', 'traditional'])
+        cultural_match = bitmap_contains(cultural_bitmap, positions)
+        score += np.where(cultural_match, 0.1, 0.0)
+        
+        return score
+    
     def calculate_nutrition_score(self, recipe, user_preferences):
         """Calculate nutrition score based on user health goals"""
         nutrition_facts = recipe.get('nutrition_facts', {})
@@ -237,54 +1572,284 @@ class HybridRecommendationEngine:
                 score += 0.25
         
         return min(score, max_score)
+    
+    def calculate_nutrition_scores(self, user_preferences, positions=None):
+        """Vectorized calculate_nutrition_score over catalog rows"""
+        catalog = self.recipe_catalog
+        if positions is None:
+            positions = np.arange(catalog.size)
+        columns = catalog.columns
+        health_goals = user_preferences.get('health_goals', [])
+        
+        score = np.zeros(len(positions))
+        max_score = 1.0
+        
+        # Weight loss goal
+        if 'weight_loss' in health_goals:
+            calories = columns['calories'][positions]
+            score += np.select([calories <= 400, calories <= 600], [0.25, 0.15], 0.0)
+        
+        # Muscle gain goal
+        if 'muscle_gain' in health_goals:
+            protein = columns['protein'][positions]
+            score += np.select([protein >= 25, protein >= 15], [0.25, 0.15], 0.0)
+        
+        # Diabetes management
+        if 'diabetes_management' in health_goals:
+            carbs = columns['carbs'][positions]
+            fiber = columns['fiber'][positions]
+            score += np.select(
+                [(carbs <= 30) & (fiber >= 5), (carbs <= 50) & (fiber >= 3)],
+                [0.25, 0.15], 0.0
+            )
+        
+        # General health
+        if 'general_health' in health_goals:
+            protein = columns['protein'][positions]
+            carbs = columns['carbs'][positions]
+            fats = columns['fats'][positions]
+            fiber = columns['fiber'][positions]
+            balanced = (
+                (10 <= protein) & (protein <= 30) & (40 <= carbs) & (carbs <= 60) &
+                (20 <= fats) & (fats <= 40) & (fiber >= 5)
+            )
+            score += np.where(balanced, 0.25, 0.0)
+        
+        return np.minimum(score, max_score)
 
 # Specialized recommendation engines
 class ZambianMealRecommender(HybridRecommendationEngine):
     """Specialized recommender for Zambian cuisine"""
     
+    DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+    
+    MEAL_FILTERS = {
+        # Zambian breakfast typically lighter, often tea with bread or leftovers
+        'breakfast': {
+            'meal_type': 'breakfast',
+            'preparation_time__lte': 20,
+            'cultural_tags__contains': ['zambian', 'quick']
+        },
+        # Lunch often includes nshima with relish
+        'lunch': {
+            'meal_type': 'lunch',
+            'cultural_tags__contains': ['zambian', 'traditional']
+        },
+        # Dinner is typically the main meal with nshima
+        'dinner': {
+            'meal_type': 'dinner',
+            'cultural_tags__contains': ['zambian', 'traditional']
+        }
+    }
+    
     def __init__(self):
         super().__init__()
         self.staple_foods = ['nshima', 'maize', 'cassava', 'sweet_potato']
     
-    def generate_weekly_plan(self, user_preferences):
-        """Generate a weekly meal plan following Zambian eating patterns"""
+    def generate_weekly_plan(self, user_preferences, user_id=None, options_per_meal=3, diversity=0.0):
+        """Generate a weekly meal plan following Zambian eating patterns (cached like hybrid_recommendations)
+        
+        diversity > 0 ranks each meal pool with maximal marginal relevance,
+        so a week repeats fewer near-identical recipes.
+        """
+        return self.cached_result(
+            'weekly_plan', user_preferences, user_id,
+            lambda: self.build_weekly_plan(user_preferences, user_id, options_per_meal, diversity),
+            options_per_meal, diversity
+        )
+    
+    def weekly_plan_within_deadline(self, user_preferences, deadline_ms, user_id=None, options_per_meal=3,
+                                    diversity=0.0):
+        """generate_weekly_plan from the best tier that answers within deadline_ms
+        
+        Fallback plans are assigned from the segment or popular ranking.
+        Returns {'tier': tier, 'weekly_plan': {...}}, see
+        answer_within_deadline.
+        """
+        if self.recipe_catalog is None:
+            return {'tier': 'content', 'weekly_plan': self.generate_weekly_plan(
+                user_preferences, user_id, options_per_meal, diversity
+            )}
+        tier, weekly_plan = self.answer_within_deadline(
+            'weekly_plan', user_id, user_preferences, deadline_ms,
+            lambda tier_user_id: self.build_weekly_plan(
+                user_preferences, tier_user_id, options_per_meal, diversity
+            ),
+            lambda positions, scores: self.assign_weekly_meals(
+                self.rank_meal_pools(positions, scores, options_per_meal, diversity),
+                user_preferences, options_per_meal
+            ),
+            diversity=diversity, key_parts=(options_per_meal, diversity)
+        )
+        return {'tier': tier, 'weekly_plan': weekly_plan}
+    
+    def batch_weekly_plans(self, requests):
+        """generate_weekly_plan for many requests in one pass
+        
+        requests is a list of dicts with user_preferences and optional
+        user_id, options_per_meal (default 3) and diversity. Requests with
+        diversity are planned one by one; the rest are scored together into
+        one padded score matrix (see batch_score_matrix) and every meal pool
+        of every request is ranked by one top-N selection over it. Returns
+        one weekly plan per request, in order.
+        """
+        return self.answer_weekly_plan_batch(requests)[1]
+    
+    def batch_weekly_plans_within_deadline(self, requests, deadline_ms):
+        """batch_weekly_plans answered within deadline_ms, one {'tier': tier, 'weekly_plan': {...}} per request
+        
+        See answer_batch for the tiers.
+        """
+        tiers, results = self.answer_weekly_plan_batch(requests, deadline_ms)
+        return [{'tier': tier, 'weekly_plan': result} for tier, result in zip(tiers, results)]
+    
+    def answer_weekly_plan_batch(self, requests, deadline_ms=None):
+        """(tiers, weekly plans) of a batch, see answer_batch"""
+        return self.answer_batch(
+            'weekly_plan', requests,
+            lambda request: (request.get('options_per_meal', 3), request.get('diversity', 0.0)),
+            self.score_weekly_plan_batch,
+            lambda request, positions, scores: self.assign_weekly_meals(
+                self.rank_meal_pools(positions, scores, request.get('options_per_meal', 3),
+                                     request.get('diversity', 0.0)),
+                request['user_preferences'], request.get('options_per_meal', 3)
+            ),
+            deadline_ms
+        )
+    
+    def score_weekly_plan_batch(self, requests):
+        """Uncached build_weekly_plan for many requests, batched where possible"""
+        results = [None] * len(requests)
+        if self.recipe_catalog is None:
+            individual, pending = list(range(len(requests))), []
+        else:
+            individual = [i for i, request in enumerate(requests) if request.get('diversity')]
+            pending = [i for i, request in enumerate(requests) if not request.get('diversity')]
+        for i in individual:
+            request = requests[i]
+            results[i] = self.build_weekly_plan(
+                request['user_preferences'], request.get('user_id'),
+                request.get('options_per_meal', 3), request.get('diversity', 0.0)
+            )
+        
+        if not pending:
+            return results
+        
+        score_matrix = self.batch_score_matrix([requests[i] for i in pending])
+        depths = [len(self.DAYS) * requests[i].get('options_per_meal', 3) * len(self.MEAL_FILTERS)
+                  for i in pending]
+        meal_pools = {}
+        for meal, filters in self.MEAL_FILTERS.items():
+            meal_bitmap = self.recipe_catalog.filter_bitmap(**self.filter_constraints(filters))
+            in_pool = np.flatnonzero(unpack_bitmap(meal_bitmap, self.recipe_catalog.size))
+            top_idx, top_scores = top_k_indices(score_matrix[:, in_pool], max(depths))
+            meal_pools[meal] = (in_pool[top_idx], top_scores)
+        
+        for row, i in enumerate(pending):
+            pools = {}
+            for meal, (pool_positions, pool_scores) in meal_pools.items():
+                valid = np.isfinite(pool_scores[row, :depths[row]])
+                pools[meal] = (pool_positions[row, :depths[row]][valid], pool_scores[row, :depths[row]][valid])
+            results[i] = self.assign_weekly_meals(
+                pools, requests[i]['user_preferences'], requests[i].get('options_per_meal', 3)
+            )
+        
+        return results
+    
+    def build_weekly_plan(self, user_preferences, user_id=None, options_per_meal=3, diversity=0.0):
+        """Uncached generate_weekly_plan
+        
+        The candidate pool is scored once for the whole plan, split into
+        ranked per-meal pools with MEAL_FILTERS, and then assigned to days
+        so that no recipe repeats within a meal slot until its pool runs out
+        and no recipe appears twice on the same day.
+        """
+        if self.recipe_catalog is None:
+            weekly_plan = {}
+            for day in self.DAYS:
+                weekly_plan[day] = {
+                    'breakfast': self.recommend_breakfast(user_preferences),
+                    'lunch': self.recommend_lunch(user_preferences),
+                    'dinner': self.recommend_dinner(user_preferences)
+                }
+            return weekly_plan
+        
+        content_scores = self.aggregate_content_scores(user_preferences)
+        positions, scores = self.score_candidates(
+            user_preferences, user_id=user_id, content_scores=content_scores
+        )
+        
+        pools = self.rank_meal_pools(positions, scores, options_per_meal, diversity)
+        return self.assign_weekly_meals(pools, user_preferences, options_per_meal)
+    
+    def rank_meal_pools(self, positions, scores, options_per_meal=3, diversity=0.0):
+        """Partition scored candidates into ranked per-meal pools
+        
+        Each pool is truncated to the deepest slice the weekly assignment
+        can consume, so ranking cost does not grow with the catalog. With
+        diversity > 0 that slice is chosen by select_top's MMR re-ranking.
+        """
+        pool_depth = len(self.DAYS) * options_per_meal * len(self.MEAL_FILTERS)
+        pools = {}
+        
+        for meal, filters in self.MEAL_FILTERS.items():
+            meal_bitmap = self.recipe_catalog.filter_bitmap(**self.filter_constraints(filters))
+            in_pool = unpack_bitmap(meal_bitmap, self.recipe_catalog.size)[positions]
+            pools[meal] = self.select_top(positions[in_pool], scores[in_pool], pool_depth, diversity)
+        
+        return pools
+    
+    def assign_weekly_meals(self, pools, user_preferences, options_per_meal=3):
+        """Assign ranked pool entries to days with no-repeat and same-day diversity rules"""
+        used = {meal: set() for meal in pools}
         weekly_plan = {}
-        days = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
         
-        for day in days:
-            day_plan = {
-                'breakfast': self.recommend_breakfast(user_preferences),
-                'lunch': self.recommend_lunch(user_preferences),
-                'dinner': self.recommend_dinner(user_preferences)
-            }
+        for day in self.DAYS:
+            used_today = set()
+            day_plan = {}
+            
+            for meal, (ranked_positions, ranked_scores) in pools.items():
+                chosen = []
+                for allow_repeats in (False, True):
+                    for idx, position in enumerate(ranked_positions.tolist()):
+                        if len(chosen) == options_per_meal:
+                            break
+                        if position in used_today or idx in chosen:
+                            continue
+                        if not allow_repeats and position in used[meal]:
+                            continue
+                        chosen.append(idx)
+                    
+                    if len(chosen) == options_per_meal:
+                        break
+                    # Pool exhausted: start recycling this meal's recipes
+                    used[meal].clear()
+                
+                chosen_positions = ranked_positions[chosen]
+                used[meal].update(chosen_positions.tolist())
+                used_today.update(chosen_positions.tolist())
+                day_plan[meal] = self.build_recommendations(
+                    chosen_positions, ranked_scores[chosen], user_preferences
+                )
+            
             weekly_plan[day] = day_plan
         
         return weekly_plan
     
     def recommend_breakfast(self, user_preferences):
         """Recommend breakfast options"""
-        # Zambian breakfast typically lighter, often tea with bread or leftovers
-        breakfast_filters = {
-            'meal_type': 'breakfast',
-            'preparation_time__lte': 20,
-            'cultural_tags__contains': ['zambian', 'quick']
-        }
-        return self.hybrid_recommendations(None, user_preferences, top_n=3)
+        return self.hybrid_recommendations(
+            None, user_preferences, top_n=3, filters=self.MEAL_FILTERS['breakfast']
+        )
     
     def recommend_lunch(self, user_preferences):
         """Recommend lunch options"""
-        # Lunch often includes nshima with relish
-        lunch_filters = {
-            'meal_type': 'lunch',
-            'cultural_tags__contains': ['zambian', 'traditional']
-        }
-        return self.hybrid_recommendations(None, user_preferences, top_n=3)
+        return self.hybrid_recommendations(
+            None, user_preferences, top_n=3, filters=self.MEAL_FILTERS['lunch']
+        )
     
     def recommend_dinner(self, user_preferences):
         """Recommend dinner options"""
-        # Dinner is typically the main meal with nshima
-        dinner_filters = {
-            'meal_type': 'dinner',
-            'cultural_tags__contains': ['zambian', 'traditional']
-        }
-        return self.hybrid_recommendations(None, user_preferences, top_n=3)
\ No newline at end of file
+        return self.hybrid_recommendations(
+            None, user_preferences, top_n=3, filters=self.MEAL_FILTERS['dinner']
+        )
\ No newline at end of file
@@ -0,0 +1,354 @@
+"""Asyncio HTTP service around the meal recommenders
+
+Concurrent requests are queued and a MicroBatcher collects them for a few
+milliseconds, then hands the whole batch to one worker thread that scores
+it with ZambianMealRecommender.batch_hybrid_recommendations or
+batch_weekly_plans (one NCF pass and one top-N selection for the batch).
+The event loop never blocks on scoring. Every request carries a deadline,
+which is passed on to the recommender's deadline tiers, so a batch that
+cannot be scored in time is answered from the cheaper fallback tiers and
+responses are {'tier': ..., 'recommendations' or 'weekly_plan': ...}.
+/metrics reports queue depth and batch sizes.
+
+Usage:
+    python recommendation_service.py --recipes ../data/processed/recipe_features.csv --port 8000
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pandas as pd
+
+from recommendation_engine import ZambianMealRecommender
+
+
+def load_recommender(recipe_features_path, collaborative_model_path=None, similarity_mode='blocked'):
+    """Build a recommender from recipe_features.csv or a saved content model directory"""
+    recommender = ZambianMealRecommender()
+    if os.path.isdir(recipe_features_path):
+        recommender.load_content_model(recipe_features_path)
+    else:
+        recommender.build_content_based_model(
+            pd.read_csv(recipe_features_path), similarity_mode=similarity_mode
+        )
+    if collaborative_model_path:
+        recommender.load_collaborative_model(collaborative_model_path)
+    return recommender
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for a synchronous batch function
+
+    process_batch takes a list of request payloads and returns one result
+    (or Exception instance) per payload. It runs on a single worker thread,
+    so batches are processed one at a time.
+    """
+
+    def __init__(self, process_batch, max_batch_size=64, max_wait_ms=5, max_queue_size=1024,
+                 executor=None):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.queue = None
+        self.task = None
+        self.stats = {'requests': 0, 'completed': 0, 'failed': 0, 'timeouts': 0, 'rejected': 0,
+                      'batches': 0, 'batched_requests': 0, 'max_batch_size': 0,
+                      'last_batch_size': 0, 'last_batch_ms': 0.0}
+
+    def start(self):
+        """Start the batching loop on the running event loop"""
+        if self.task is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def submit(self, payload, deadline_ms=None):
+        """Queue one request and wait for its result
+
+        Raises asyncio.QueueFull when the queue is at capacity and
+        asyncio.TimeoutError when the deadline passes before the result.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = None if deadline_ms is None else loop.time() + deadline_ms / 1000
+
+        self.stats['requests'] += 1
+        try:
+            self.queue.put_nowait((payload, future, deadline))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise
+
+        try:
+            if deadline is None:
+                return await future
+            return await asyncio.wait_for(future, max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            # Keep collecting until the batch is full or the wait window closes
+            window_end = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = window_end - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Requests whose caller already gave up are not scored
+            now = loop.time()
+            live = [
+                (payload, future) for payload, future, deadline in batch
+                if not future.done() and (deadline is None or deadline > now)
+            ]
+            for _, future, deadline in batch:
+                if not future.done() and deadline is not None and deadline <= now:
+                    future.cancel()
+            if not live:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.process_batch, [payload for payload, _ in live]
+                )
+            except Exception as exc:
+                results = [exc] * len(live)
+            self.record_batch(len(live), time.perf_counter() - start)
+
+            for (_, future), result in zip(live, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    self.stats['failed'] += 1
+                    future.set_exception(result)
+                else:
+                    self.stats['completed'] += 1
+                    future.set_result(result)
+
+    def record_batch(self, size, seconds):
+        self.stats['batches'] += 1
+        self.stats['batched_requests'] += size
+        self.stats['max_batch_size'] = max(self.stats['max_batch_size'], size)
+        self.stats['last_batch_size'] = size
+        self.stats['last_batch_ms'] = seconds * 1000
+
+    def metrics(self):
+        """Counters plus current queue depth and mean batch size"""
+        metrics = dict(self.stats)
+        metrics['queue_depth'] = self.queue.qsize() if self.queue is not None else 0
+        metrics['mean_batch_size'] = (
+            self.stats['batched_requests'] / self.stats['batches'] if self.stats['batches'] else 0.0
+        )
+        return metrics
+
+
+class RecommendationService:
+    """Batched async front end for a ZambianMealRecommender"""
+
+    def __init__(self, recommender, max_batch_size=64, max_wait_ms=5, max_queue_size=1024,
+                 default_deadline_ms=1000, deadline_margin_ms=10):
+        self.recommender = recommender
+        self.default_deadline_ms = default_deadline_ms
+        # Time reserved for the fallback tiers and the reply after the recommender's deadline
+        self.deadline_margin_ms = deadline_margin_ms
+        # One scoring thread shared by both endpoints
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.recommendation_batcher = MicroBatcher(
+            self.score_recommendations, max_batch_size, max_wait_ms, max_queue_size, executor
+        )
+        self.plan_batcher = MicroBatcher(
+            self.score_weekly_plans, max_batch_size, max_wait_ms, max_queue_size, executor
+        )
+
+    def score_recommendations(self, requests):
+        """Batch worker: hybrid recommendations for a list of requests"""
+        try:
+            return self.hybrid_batch(requests)
+        except ValueError:
+            # One bad request (e.g. an unknown preferred recipe) must not fail the others
+            return [self.isolate(self.hybrid_batch, request) for request in requests]
+
+    def score_weekly_plans(self, requests):
+        """Batch worker: weekly plans for a list of requests"""
+        try:
+            return self.plan_batch(requests)
+        except ValueError:
+            return [self.isolate(self.plan_batch, request) for request in requests]
+
+    def hybrid_batch(self, requests):
+        return self.recommender.batch_hybrid_recommendations_within_deadline(
+            requests, self.remaining_ms(requests)
+        )
+
+    def plan_batch(self, requests):
+        return self.recommender.batch_weekly_plans_within_deadline(requests, self.remaining_ms(requests))
+
+    def remaining_ms(self, requests):
+        """Time left for the batch: until its earliest request expires, less deadline_margin_ms"""
+        expires = min(request['expires'] for request in requests)
+        return max(0.0, (expires - time.perf_counter()) * 1000 - self.deadline_margin_ms)
+
+    @staticmethod
+    def isolate(process_batch, request):
+        """Run a single request through a batch function, returning its error instead of raising"""
+        try:
+            return process_batch([request])[0]
+        except ValueError as exc:
+            return exc
+
+    async def recommend(self, user_id, user_preferences, top_n=15, filters=None, deadline_ms=None,
+                        diversity=0.0):
+        if deadline_ms is None:
+            deadline_ms = self.default_deadline_ms
+        return await self.recommendation_batcher.submit(
+            {'user_id': user_id, 'user_preferences': user_preferences,
+             'top_n': top_n, 'filters': filters, 'diversity': diversity,
+             'expires': time.perf_counter() + deadline_ms / 1000},
+            deadline_ms
+        )
+
+    async def weekly_plan(self, user_id, user_preferences, options_per_meal=3, deadline_ms=None,
+                          diversity=0.0):
+        if deadline_ms is None:
+            deadline_ms = self.default_deadline_ms
+        return await self.plan_batcher.submit(
+            {'user_id': user_id, 'user_preferences': user_preferences,
+             'options_per_meal': options_per_meal, 'diversity': diversity,
+             'expires': time.perf_counter() + deadline_ms / 1000},
+            deadline_ms
+        )
+
+    def start(self):
+        self.recommendation_batcher.start()
+        self.plan_batcher.start()
+
+    async def stop(self):
+        await self.recommendation_batcher.stop()
+        await self.plan_batcher.stop()
+
+    def metrics(self):
+        metrics = {
+            'recommendations': self.recommendation_batcher.metrics(),
+            'weekly_plans': self.plan_batcher.metrics()
+        }
+        if self.recommender.result_cache is not None:
+            metrics['cache'] = dict(self.recommender.result_cache.stats)
+        metrics['deadline_tiers'] = {
+            kind: latency.summary() for kind, latency in self.recommender.tier_latency.items()
+        }
+        if self.recommender.pipeline_metrics is not None:
+            metrics['pipeline'] = {
+                stage: stage_metrics.summary()
+                for stage, stage_metrics in self.recommender.pipeline_metrics.items()
+            }
+            metrics['pipeline']['candidate_sources'] = dict(
+                self.recommender.candidate_generator.source_counts
+            )
+        return metrics
+
+
+def create_app(service):
+    """FastAPI application exposing a RecommendationService"""
+    from fastapi import Body, FastAPI, HTTPException
+
+    @asynccontextmanager
+    async def lifespan(app):
+        service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+
+    app = FastAPI(title='Zambian meal recommendations', lifespan=lifespan)
+
+    async def call(coroutine):
+        try:
+            return await coroutine
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail='Deadline exceeded')
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail='Too many queued requests')
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    @app.post('/recommendations')
+    async def recommendations(payload: dict = Body(...)):
+        return await call(service.recommend(
+            payload.get('user_id'),
+            payload.get('user_preferences', {}),
+            top_n=payload.get('top_n', 15),
+            filters=payload.get('filters'),
+            deadline_ms=payload.get('deadline_ms'),
+            diversity=payload.get('diversity', 0.0)
+        ))
+
+    @app.post('/weekly-plan')
+    async def weekly_plan(payload: dict = Body(...)):
+        return await call(service.weekly_plan(
+            payload.get('user_id'),
+            payload.get('user_preferences', {}),
+            options_per_meal=payload.get('options_per_meal', 3),
+            deadline_ms=payload.get('deadline_ms'),
+            diversity=payload.get('diversity', 0.0)
+        ))
+
+    @app.get('/metrics')
+    async def metrics():
+        return service.metrics()
+
+    @app.get('/health')
+    async def health():
+        return {'status': 'ok', 'recipes': service.recommender.recipe_catalog.size}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve meal recommendations over HTTP')
+    parser.add_argument('--recipes', default='../data/processed/recipe_features.csv',
+                        help='recipe features CSV or a saved content model directory')
+    parser.add_argument('--collaborative-model', help='NCF weights or ALS factors saved as .npz')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--deadline-ms', type=float, default=1000)
+    parser.add_argument('--cache-size', type=int, default=0, help='result cache entries (0 disables)')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    recommender = load_recommender(args.recipes, args.collaborative_model)
+    if args.cache_size:
+        recommender.enable_result_cache(max_entries=args.cache_size)
+    service = RecommendationService(
+        recommender, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+        default_deadline_ms=args.deadline_ms
+    )
+    uvicorn.run(create_app(service), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
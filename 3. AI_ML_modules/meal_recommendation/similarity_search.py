@@ -0,0 +1,303 @@
+import numpy as np
+
+# Storage precisions for features and similarity scores
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
+
+# Cosine scores lie in [-1, 1]; int8 codes store round(score * 127)
+SCORE_QUANTIZATIONS = (None, 'float16', 'int8')
+INT8_SCORE_SCALE = 127
+
+
+def _is_sparse(matrix):
+    """scipy.sparse check that does not import scipy"""
+    return hasattr(matrix, 'tocsr')
+
+
+def top_k_indices(scores, k, exclude=None):
+    """Select the k highest scores per row using partial selection.
+
+    Returns a pair of (indices, scores) arrays of shape (n_rows, k), ordered
+    best first. Ties are broken on the lower column index, matching a stable
+    descending sort. ``exclude`` optionally gives one column per row to skip
+    (e.g. the query recipe itself).
+    """
+    scores = np.atleast_2d(np.asarray(scores))
+    if scores.dtype.kind != 'f':
+        scores = scores.astype(float)
+    n_rows, n_cols = scores.shape
+
+    if exclude is not None:
+        scores = scores.copy()
+        scores[np.arange(n_rows), np.asarray(exclude)] = -np.inf
+        n_cols_available = n_cols - 1
+    else:
+        n_cols_available = n_cols
+
+    k = max(0, min(int(k), n_cols_available))
+    if k == 0:
+        return (np.empty((n_rows, 0), dtype=np.intp),
+                np.empty((n_rows, 0), dtype=scores.dtype))
+
+    # Partial selection: O(N) per row instead of a full O(N log N) sort
+    if k < n_cols:
+        kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+        # Keep everything above the k-th score, then fill with the
+        # lowest-index ties so the result is deterministic
+        above = scores > kth
+        ties = scores == kth
+        slots_left = k - above.sum(axis=1, keepdims=True)
+        selected = above | (ties & (np.cumsum(ties, axis=1) <= slots_left))
+        candidates = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        candidates = np.tile(np.arange(n_cols), (n_rows, 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    # Only the k selected entries are sorted
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return indices, top_scores
+
+
+def mmr_rerank(relevance, k, diversity=0.3, vectors=None, similarity=None):
+    """Order candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    (1 - diversity) * relevance - diversity * (max similarity to the picks so far).
+    Relevance is min-max scaled to [0, 1] first, so it is comparable with
+    cosine similarity. Pass either the (C, C) candidate similarity matrix
+    or the (C, d) L2-normalized candidate vectors, whose similarity rows are
+    computed only for the k picks. The running max-similarity vector is
+    updated with one row per pick, so selection costs O(k * C) after the
+    similarities. Returns the positions of the k picks (into the candidate
+    arrays) in pick order. diversity=0 is the plain top-k by relevance.
+    """
+    relevance = np.asarray(relevance, dtype=float)
+    n_candidates = len(relevance)
+    k = max(0, min(int(k), n_candidates))
+    if similarity is None and vectors is None:
+        raise ValueError("mmr_rerank needs candidate vectors or a similarity matrix")
+    if not 0 <= diversity <= 1:
+        raise ValueError(f"diversity must be between 0 and 1, got {diversity}")
+
+    spread = np.ptp(relevance) if n_candidates else 0.0
+    scaled = (relevance - relevance.min()) / spread if spread > 0 else np.zeros(n_candidates)
+    gains = (1 - diversity) * scaled
+    penalty = np.zeros(n_candidates)
+    available = np.ones(n_candidates, dtype=bool)
+    picks = np.empty(k, dtype=np.intp)
+    for step in range(k):
+        # Ties go to the earlier candidate, as in a stable sort
+        pick = int(np.argmax(np.where(available, gains - diversity * penalty, -np.inf)))
+        picks[step] = pick
+        available[pick] = False
+        row = similarity[pick] if similarity is not None else vectors @ vectors[pick]
+        penalty = np.maximum(penalty, row) if step else np.asarray(row, dtype=float)
+    return picks
+
+
+def quantize_scores(scores, quantization):
+    """Encode similarity scores for compact storage (None keeps them as is)"""
+    if quantization is None:
+        return scores
+    if quantization == 'float16':
+        return np.asarray(scores, dtype=np.float16)
+    if quantization == 'int8':
+        return np.round(np.clip(scores, -1, 1) * INT8_SCORE_SCALE).astype(np.int8)
+    raise ValueError(f"Unknown score quantization: {quantization}")
+
+
+def dequantize_scores(scores, quantization, dtype=np.float32):
+    """Decode scores written by quantize_scores"""
+    if quantization is None:
+        return scores
+    if quantization == 'int8':
+        return scores.astype(dtype) / INT8_SCORE_SCALE
+    return scores.astype(dtype)
+
+
+def normalize_rows(matrix):
+    """L2-normalize rows so inner products are cosine similarities.
+
+    All-zero rows are left as zeros, matching sklearn's cosine_similarity.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def blocked_top_k(query_vectors, item_vectors, k, exclude=None, block_size=2048):
+    """Top-k inner products of queries against items without an N x N matrix.
+
+    Items are scanned in blocks of ``block_size`` rows, so the working set
+    is one (n_queries, block_size) score block plus the running top-k.
+    ``exclude`` optionally gives one item position per query to skip.
+    """
+    return blended_top_k([(1.0, query_vectors, item_vectors)], k, exclude=exclude,
+                         block_size=block_size)
+
+
+def blended_top_k(channels, k, exclude=None, block_size=2048):
+    """Top-k of a weighted sum of inner-product channels, scanned in item blocks.
+
+    ``channels`` is a list of (weight, query_vectors, item_vectors) triples
+    over the same items. Vectors may be dense arrays or scipy.sparse CSR
+    matrices; a sparse channel only densifies its (n_queries, block_size)
+    score block, never the item-by-item matrix.
+    """
+    channels = [
+        (weight, query_vectors if _is_sparse(query_vectors) else np.atleast_2d(query_vectors), item_vectors)
+        for weight, query_vectors, item_vectors in channels
+    ]
+    n_queries = channels[0][1].shape[0]
+    n_items = channels[0][2].shape[0]
+    exclude = None if exclude is None else np.asarray(exclude)
+    k = min(k, n_items - 1 if exclude is not None else n_items)
+
+    best_idx = np.empty((n_queries, 0), dtype=np.intp)
+    best_scores = np.empty((n_queries, 0), dtype=np.result_type(*[
+        vectors.dtype for _, query_vectors, item_vectors in channels
+        for vectors in (query_vectors, item_vectors)
+    ]))
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        block_scores = None
+        for weight, query_vectors, item_vectors in channels:
+            scores = query_vectors @ item_vectors[start:stop].T
+            if _is_sparse(scores):
+                scores = scores.toarray()
+            if weight != 1.0:
+                scores = scores * weight
+            block_scores = scores if block_scores is None else block_scores + scores
+        block_scores = block_scores.astype(best_scores.dtype, copy=False)
+
+        if exclude is not None:
+            rows = np.nonzero((exclude >= start) & (exclude < stop))[0]
+            block_scores[rows, exclude[rows] - start] = -np.inf
+
+        # Running entries always hold lower item positions than the block,
+        # so positional tie-breaking in top_k_indices stays global
+        merged_scores = np.hstack([best_scores, block_scores])
+        merged_idx = np.hstack([
+            best_idx,
+            np.broadcast_to(np.arange(start, stop), (n_queries, stop - start))
+        ])
+        keep, best_scores = top_k_indices(merged_scores, k)
+        best_idx = np.take_along_axis(merged_idx, keep, axis=1)
+
+    return best_idx, best_scores
+
+
+def build_top_k_graph(item_vectors, k, block_size=2048):
+    """Precompute the k nearest neighbours of every item as a CSR matrix.
+
+    Row i holds the neighbours of item i (itself excluded), stored best
+    first, so memory grows as O(N * k) rather than O(N^2).
+    """
+    n_items = item_vectors.shape[0]
+    k = min(k, max(n_items - 1, 0))
+    indices = np.empty((n_items, k), dtype=np.intp)
+    data = np.empty((n_items, k), dtype=item_vectors.dtype)
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        rows = np.arange(start, stop)
+        indices[start:stop], data[start:stop] = blocked_top_k(
+            item_vectors[start:stop], item_vectors, k,
+            exclude=rows, block_size=block_size
+        )
+
+    return graph_from_arrays(indices, data)
+
+
+def graph_from_arrays(indices, data):
+    """Wrap (n_items, k) neighbour arrays as a CSR graph with k entries per row
+
+    The arrays are not copied, so memory-mapped neighbour lists stay mapped.
+    """
+    from scipy.sparse import csr_matrix
+
+    n_items, k = indices.shape
+    if k:
+        indptr = np.arange(0, n_items * k + 1, k, dtype=indices.dtype)
+    else:
+        indptr = np.zeros(n_items + 1, dtype=indices.dtype)
+    # scipy.sparse rejects float16 data, so build over a same-size integer view
+    stored = data.view(np.int16) if data.dtype == np.float16 else data
+    graph = csr_matrix((stored.ravel(), indices.ravel(), indptr), shape=(n_items, n_items))
+    if stored is not data:
+        graph.data = data.ravel()
+    return graph
+
+
+def patch_top_k_graph(graph, item_vectors, k, changed=(), removed=(), block_size=2048):
+    """Update a top-k graph after some items were added, changed or removed.
+
+    ``graph`` is indexed by the old item positions and ``removed`` lists old
+    positions that are gone. ``item_vectors`` are the current vectors, with
+    the surviving items first (in their old order) followed by any appended
+    items, and ``changed`` lists current positions whose vectors changed.
+    Appended items count as changed.
+
+    Only rows that referenced a removed or changed item, plus the changed
+    rows themselves, are recomputed against every item. All other rows keep
+    their list and just merge in their similarities to the changed items,
+    so a small edit costs O(N * n_changed) instead of a rebuild.
+    """
+    n_items = item_vectors.shape[0]
+    k = min(k, max(n_items - 1, 0))
+    stored_k = graph.nnz // graph.shape[0] if graph.shape[0] else 0
+    if k == 0 or k > stored_k:
+        # Nothing to patch, or lists too short to merge into (the catalog
+        # used to be smaller than k)
+        return build_top_k_graph(item_vectors, k, block_size=block_size)
+
+    indices = graph.indices.reshape(-1, stored_k)[:, :k].astype(np.intp)
+    data = np.array(graph.data.reshape(-1, stored_k)[:, :k], dtype=item_vectors.dtype)
+    stale = np.zeros(len(indices), dtype=bool)
+
+    removed = np.asarray(removed, dtype=np.intp)
+    if len(removed):
+        keep = np.ones(len(indices), dtype=bool)
+        keep[removed] = False
+        new_positions = np.cumsum(keep) - 1
+        stale = np.isin(indices, removed).any(axis=1)[keep]
+        indices = new_positions[indices[keep]]
+        data = data[keep]
+
+    n_appended = n_items - len(indices)
+    changed = np.union1d(
+        np.asarray(changed, dtype=np.intp),
+        np.arange(len(indices), n_items)
+    ).astype(np.intp)
+    indices = np.vstack([indices, np.zeros((n_appended, k), dtype=np.intp)])
+    data = np.vstack([data, np.zeros((n_appended, k), dtype=data.dtype)])
+    stale = np.concatenate([stale, np.ones(n_appended, dtype=bool)])
+
+    stale |= np.isin(indices, changed).any(axis=1)
+    stale[changed] = True
+    # Stale lists may point at removed positions, so recompute them from scratch
+    rows = np.flatnonzero(stale)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        indices[block], data[block] = blocked_top_k(
+            item_vectors[block], item_vectors, k, exclude=block, block_size=block_size
+        )
+
+    # Every other row only needs the changed items as extra candidates
+    rows = np.flatnonzero(~stale)
+    if len(changed) and len(rows):
+        changed_vectors = item_vectors[changed]
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            merged_scores = np.hstack([data[block], item_vectors[block] @ changed_vectors.T])
+            merged_idx = np.hstack([
+                indices[block], np.broadcast_to(changed, (len(block), len(changed)))
+            ])
+            keep_idx, data[block] = top_k_indices(merged_scores, k)
+            indices[block] = np.take_along_axis(merged_idx, keep_idx, axis=1)
+
+    return graph_from_arrays(indices, data)
@@ -0,0 +1,149 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Recipe columns whose text feeds the TF-IDF channel, when present
+TEXT_COLUMNS = ('name', 'description', 'ingredients', 'ingredient_names')
+
+# Arrays of the L2-normalized TF-IDF matrix in a saved text model
+TEXT_MATRIX_ARRAYS = ('data', 'indices', 'indptr')
+
+
+def _field_text(value):
+    """Flatten one text cell: ingredient lists hold strings or {'name': ...} dicts"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return ' '.join(
+            item.get('name', '') if isinstance(item, dict) else str(item) for item in value
+        )
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    return str(value)
+
+
+def recipe_text(recipe_features):
+    """One document per recipe: names, descriptions and ingredient names joined"""
+    columns = [column for column in TEXT_COLUMNS if column in recipe_features.columns]
+    if not columns:
+        return pd.Series([''] * len(recipe_features), index=recipe_features.index)
+    return pd.Series(
+        [' '.join(_field_text(value) for value in row)
+         for row in zip(*(recipe_features[column] for column in columns))],
+        index=recipe_features.index
+    )
+
+
+class RecipeTextIndex:
+    """TF-IDF vectors of recipe text kept as a sparse CSR matrix
+
+    The vocabulary and idf weights are fitted once; recipes added or edited
+    later are transformed with them, so rows stay comparable without a
+    refit. Rows are L2-normalized, so inner products are cosine
+    similarities.
+    """
+
+    def __init__(self, max_features=5000, ngram_range=(1, 2), min_df=1, dtype='float32'):
+        self.max_features = max_features
+        self.ngram_range = tuple(ngram_range)
+        self.min_df = min_df
+        self.dtype = dtype
+        self.vectorizer = None
+        self.matrix = None
+
+    @property
+    def size(self):
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    def make_vectorizer(self, vocabulary=None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        return TfidfVectorizer(
+            max_features=self.max_features, ngram_range=self.ngram_range, min_df=self.min_df,
+            stop_words='english', sublinear_tf=True, dtype=np.dtype(self.dtype),
+            vocabulary=vocabulary
+        )
+
+    def fit(self, recipe_features):
+        """Fit the vocabulary on recipe_features and vectorize every row"""
+        self.vectorizer = self.make_vectorizer()
+        self.matrix = self.vectorizer.fit_transform(recipe_text(recipe_features)).tocsr()
+        return self
+
+    def transform(self, recipe_features):
+        """Vectorize recipes with the fitted vocabulary"""
+        if self.vectorizer is None:
+            raise ValueError("Text model not fitted. Call fit first.")
+        return self.vectorizer.transform(recipe_text(recipe_features)).tocsr()
+
+    def reindex(self, recipe_features):
+        """Re-vectorize a whole new catalog without refitting"""
+        self.matrix = self.transform(recipe_features)
+        return self.matrix
+
+    def update(self, recipe_features, changed=(), removed=()):
+        """Follow an engine catalog edit
+
+        recipe_features is the new table: surviving rows in their old order
+        followed by appended rows. changed holds new positions whose text
+        may have changed and removed holds old positions that were dropped.
+        """
+        from scipy.sparse import vstack
+
+        keep = np.ones(self.size, dtype=bool)
+        keep[np.asarray(removed, dtype=np.intp)] = False
+        matrix = self.matrix[np.flatnonzero(keep)]
+        appended = np.arange(matrix.shape[0], len(recipe_features))
+        changed = np.setdiff1d(np.asarray(changed, dtype=np.intp), appended)
+
+        if len(changed):
+            # Swap the edited rows for their new vectors in one row-selection pass
+            new_rows = self.transform(recipe_features.iloc[changed])
+            order = np.arange(matrix.shape[0])
+            order[changed] = matrix.shape[0] + np.arange(len(changed))
+            matrix = vstack([matrix, new_rows], format='csr')[order]
+        if len(appended):
+            matrix = vstack([matrix, self.transform(recipe_features.iloc[appended])], format='csr')
+        self.matrix = matrix.tocsr()
+        return self.matrix
+
+    def save(self, directory, prefix='text_'):
+        """Write the CSR arrays as .npy files and the vectorizer as JSON"""
+        for name in TEXT_MATRIX_ARRAYS:
+            np.save(os.path.join(directory, f'{prefix}{name}.npy'), getattr(self.matrix, name))
+
+        vectorizer = {
+            'max_features': self.max_features,
+            'ngram_range': list(self.ngram_range),
+            'min_df': self.min_df,
+            'dtype': self.dtype,
+            'n_features': self.matrix.shape[1],
+            'vocabulary': {term: int(column) for term, column in self.vectorizer.vocabulary_.items()},
+            'idf': self.vectorizer.idf_.tolist()
+        }
+        with open(os.path.join(directory, f'{prefix}vectorizer.json'), 'w') as f:
+            json.dump(vectorizer, f)
+        return directory
+
+    @classmethod
+    def load(cls, directory, prefix='text_', mmap_mode='r'):
+        """Load a text model written by save; the CSR arrays are memory-mapped by default"""
+        from scipy.sparse import csr_matrix
+
+        with open(os.path.join(directory, f'{prefix}vectorizer.json'), 'r') as f:
+            vectorizer = json.load(f)
+
+        index = cls(vectorizer['max_features'], vectorizer['ngram_range'],
+                    vectorizer['min_df'], vectorizer['dtype'])
+        index.vectorizer = index.make_vectorizer(vocabulary=vectorizer['vocabulary'])
+        index.vectorizer.idf_ = np.array(vectorizer['idf'])
+        arrays = [
+            np.load(os.path.join(directory, f'{prefix}{name}.npy'), mmap_mode=mmap_mode)
+            for name in TEXT_MATRIX_ARRAYS
+        ]
+        index.matrix = csr_matrix(
+            tuple(arrays), shape=(len(arrays[2]) - 1, vectorizer['n_features'])
+        )
+        return index
@@ -1,11 +1,11 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import json
 
 class HealthProfileAnalyzer:
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
+        
         self.scaler = StandardScaler()
         self.health_clusters = None
         
@@ -189,9 +189,15 @@ class HealthClusterAnalyzer:
     """Cluster users based on health profiles for targeted recommendations"""
     
     def __init__(self, n_clusters=4):
+        from sklearn.cluster import KMeans
+        from sklearn.preprocessing import StandardScaler
+        
         self.n_clusters = n_clusters
         self.kmeans = KMeans(n_clusters=n_clusters, random_state=42)
         self.scaler = StandardScaler()
+        self.features = []
+        self.feature_means = None
+        self.cluster_profiles = {}
         
     def fit(self, users_df):
         """Fit clustering model to user data"""
@@ -200,7 +206,9 @@ class HealthClusterAnalyzer:
         features = [f for f in features if f in users_df.columns]
         
         if features:
-            X = users_df[features].fillna(users_df[features].mean())
+            self.features = features
+            self.feature_means = users_df[features].mean()
+            X = users_df[features].fillna(self.feature_means)
             X_scaled = self.scaler.fit_transform(X)
             
             self.kmeans.fit(X_scaled)
@@ -211,6 +219,20 @@ class HealthClusterAnalyzer:
         
         return users_df
     
+    def predict(self, users):
+        """Health cluster of each user (a DataFrame, list of dicts or one dict)
+        
+        Missing or unknown features are filled with the training means.
+        """
+        if not self.features:
+            raise ValueError("Cluster model not fitted. Call fit first.")
+        
+        if isinstance(users, dict):
+            users = [users]
+        users_df = pd.DataFrame(users).reindex(columns=self.features)
+        X = users_df.apply(pd.to_numeric, errors='coerce').fillna(self.feature_means)
+        return self.kmeans.predict(self.scaler.transform(X))
+    
     def analyze_clusters(self, users_df, features):
         """Analyze characteristics of each cluster"""
         cluster_profiles = {}
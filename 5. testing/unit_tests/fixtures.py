@@ -0,0 +1,55 @@
+"""Synthetic recipe catalogs shared by the unit tests"""
+import numpy as np
+import pandas as pd
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner']
+DISHES = ['Nshima', 'Stew', 'Relish', 'Porridge']
+INGREDIENTS = ['maize meal', 'rape leaves', 'tomatoes', 'onions', 'groundnuts', 'kapenta',
+               'pumpkin leaves', 'beans', 'sweet potatoes', 'chicken', 'okra', 'cassava']
+FLAGS = ('is_traditional', 'is_zambian', 'is_quick', 'is_vegetarian')
+
+def random_recipes(n_recipes=300, seed=0, start=0, id_width=4, cycle_meals=False, flags=FLAGS, text=False):
+    """Random recipe_features rows with ids R<start> onwards, zero-padded to id_width
+
+    cycle_meals repeats breakfast, lunch, dinner instead of drawing meal
+    types, so every meal gets a third of the recipes. flags are random 0/1
+    columns. text adds dish names and ingredient lists for the text
+    similarity channel.
+    """
+    rng = np.random.default_rng(seed)
+    ids = range(start, start + n_recipes)
+    recipes = pd.DataFrame({
+        'recipe_id': [f'R{i:0{id_width}d}' for i in ids],
+        'name': [f'{rng.choice(DISHES)} {i}' if text else f'Recipe {i}' for i in ids],
+        'meal_type': np.resize(MEAL_TYPES, n_recipes) if cycle_meals else rng.choice(MEAL_TYPES, n_recipes),
+        'preparation_time': rng.integers(5, 90, n_recipes),
+        'cost_per_serving': rng.uniform(10, 60, n_recipes).round(2),
+        'calories': rng.integers(150, 700, n_recipes),
+        'protein': rng.integers(2, 40, n_recipes),
+        'sugar': rng.integers(0, 30, n_recipes)
+    })
+    for flag in flags:
+        recipes[flag] = rng.integers(0, 2, n_recipes)
+    if text:
+        recipes['ingredients'] = [[{'name': name} for name in rng.choice(INGREDIENTS, 3, replace=False)]
+                                  for _ in range(n_recipes)]
+    return recipes
+
+def recipe_families(n_recipes=300, n_families=20, seed=17):
+    """random_recipes in near-duplicate families, so a plain top-N repeats them
+
+    Recipes of a family share their numeric features up to 1% noise. Every
+    recipe is quick and traditional, so all of them pass the weekly meal
+    filters.
+    """
+    recipes = random_recipes(n_recipes, seed, id_width=3, cycle_meals=True, flags=('is_vegetarian',))
+    rng = np.random.default_rng(seed)
+    family = rng.integers(0, n_families, n_recipes)
+    base = rng.uniform(0, 1, (n_families, 4))[family] + 0.01 * rng.normal(size=(n_recipes, 4))
+    recipes['preparation_time'] = (5 + 55 * base[:, 0]).round()
+    recipes['cost_per_serving'] = (10 + 50 * base[:, 1]).round(2)
+    recipes['calories'] = (150 + 550 * base[:, 2]).round()
+    recipes['protein'] = (2 + 38 * base[:, 3]).round()
+    recipes['is_quick'] = 1
+    recipes['is_traditional'] = 1
+    return recipes.drop(columns='sugar')
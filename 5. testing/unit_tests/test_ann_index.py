@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+
+from ann_index import IVFIndex, kmeans, nearest_centroids
+from recommendation_engine import HybridRecommendationEngine
+from similarity_search import blocked_top_k, normalize_rows
+from fixtures import random_recipes
+
+def clustered_vectors(n_items=3000, dim=16, n_clusters=30, seed=4):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    return (centers[rng.integers(0, n_clusters, n_items)] + 0.4 * rng.normal(size=(n_items, dim))).astype(np.float32)
+
+def recall(approximate, exact):
+    return np.mean([len(np.intersect1d(a, e)) for a, e in zip(approximate, exact)]) / exact.shape[1]
+
+class TestIVFIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = clustered_vectors()
+        self.items = normalize_rows(self.vectors).astype(np.float32)
+        self.queries = np.arange(0, 3000, 30)
+        self.exact_rows, self.exact_scores = blocked_top_k(
+            self.items[self.queries], self.items, 10, exclude=self.queries
+        )
+        self.index = IVFIndex(n_lists=50, n_probe=4).build(self.vectors)
+
+    def test_kmeans_assigns_to_nearest_centroid(self):
+        """Test clustering output and the blocked nearest-centroid assignment"""
+        centroids = kmeans(self.items, 20, iterations=5)
+        assignments = nearest_centroids(self.items, centroids, block_size=77)
+
+        distances = ((self.items[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        np.testing.assert_array_equal(assignments, distances.argmin(axis=1))
+        self.assertEqual(np.diff(self.index.offsets).sum(), 3000)
+
+    def test_probe_knob_trades_recall(self):
+        """Test that more probes raise recall and probing every list is exact"""
+        low, _ = self.index.query_batch(self.vectors[self.queries], 10, n_probe=1, exclude=self.queries)
+        high, _ = self.index.query_batch(self.vectors[self.queries], 10, exclude=self.queries)
+        rows, scores = self.index.query_batch(self.vectors[self.queries], 10, n_probe=50, exclude=self.queries)
+
+        self.assertLessEqual(recall(low, self.exact_rows), recall(high, self.exact_rows))
+        self.assertGreater(recall(high, self.exact_rows), 0.95)
+        self.assertEqual(recall(rows, self.exact_rows), 1.0)
+        np.testing.assert_allclose(scores, self.exact_scores, atol=1e-5)
+        self.assertFalse((rows == self.queries[:, None]).any())
+
+    def test_small_lists_still_fill_k(self):
+        """Test that queries probe extra lists until k candidates exist"""
+        index = IVFIndex(n_lists=1000, n_probe=1).build(self.vectors[:1000])
+        rows, scores = index.query_batch(self.vectors[:5], 20, exclude=np.arange(5))
+
+        self.assertTrue((rows >= 0).all())
+        self.assertTrue(np.isfinite(scores).all())
+        self.assertEqual(index.query_batch(self.vectors[:2], 5000)[0].shape, (2, 1000))
+
+    def test_add_remove_and_replace(self):
+        """Test row labels through additions, replacements and renumbering removals"""
+        extra = clustered_vectors(10, seed=5)
+        rows = self.index.add(extra)
+        np.testing.assert_array_equal(rows, np.arange(3000, 3010))
+        found, _ = self.index.query_batch(extra, 1, n_probe=50)
+        np.testing.assert_array_equal(found[:, 0], rows)
+
+        self.index.replace([7], extra[:1])
+        self.assertEqual(sorted(self.index.query_batch(extra[:1], 2, n_probe=50)[0][0].tolist()), [7, 3000])
+
+        self.index.remove([0, 7])
+        self.assertEqual(len(self.index), 3008)
+        np.testing.assert_array_equal(np.sort(self.index.rows), np.arange(3008))
+        found, _ = self.index.query_batch(extra[1:], 1, n_probe=50)
+        np.testing.assert_array_equal(found[:, 0], np.arange(2999, 3008))
+
+    def test_save_load_roundtrip(self):
+        """Test that a reloaded, memory-mapped index answers identically"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.index.save(tmp_dir)
+            loaded = IVFIndex.load(tmp_dir)
+
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            self.assertEqual(loaded.n_probe, 4)
+            for expected, actual in zip(self.index.query_batch(self.vectors[:20], 5),
+                                        loaded.query_batch(self.vectors[:20], 5)):
+                np.testing.assert_array_equal(actual, expected)
+        with self.assertRaises(ValueError):
+            IVFIndex(metric='l1')
+
+class TestANNSimilarityMode(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(400, seed=12)
+        self.seeds = ['R0001', 'R0042', 'R0399']
+        # Probing every list makes the index exact, so results can be compared
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_based_model(
+            self.recipe_features, similarity_mode='ann', ann_options={'n_lists': 20, 'n_probe': 20}
+        )
+        self.engine.rescale_threshold = np.inf
+
+    def assert_matches_blocked(self, engine):
+        blocked = HybridRecommendationEngine()
+        blocked.build_content_based_model(engine.recipe_features, similarity_mode='blocked')
+        blocked.content_features = engine.content_features
+        expected_ids, expected_scores = blocked.batch_content_based_recommendations(self.seeds, 8)
+        actual_ids, actual_scores = engine.batch_content_based_recommendations(self.seeds, 8)
+        np.testing.assert_allclose(actual_scores, expected_scores, atol=1e-5)
+        self.assertEqual(set(actual_ids.ravel()), set(expected_ids.ravel()))
+
+    def test_ann_mode_updates_and_roundtrip(self):
+        """Test the 'ann' mode through incremental edits and a memory-mapped reload"""
+        self.assert_matches_blocked(self.engine)
+        self.assertGreater(self.engine.content_model_nbytes(), self.engine.content_features.nbytes)
+
+        self.engine.add_recipes(self.recipe_features.iloc[:5].assign(
+            recipe_id=[f'N{i}' for i in range(5)], calories=[200, 300, 400, 500, 600]
+        ))
+        self.engine.update_recipes([{'recipe_id': 'R0042', 'calories': 690}])
+        self.engine.remove_recipes(['R0000', 'R0100'])
+        self.assertEqual(len(self.engine.content_ann_index), 403)
+        self.assert_matches_blocked(self.engine)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.engine.save_content_model(tmp_dir)
+            loaded = HybridRecommendationEngine().load_content_model(tmp_dir)
+            self.assertEqual(loaded.ann_options, {'n_lists': 20, 'n_probe': 20})
+            self.assert_matches_blocked(loaded)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import pandas as pd
+
+from batch_planner import BatchPlanGenerator, iter_user_profiles, profile_to_preferences
+from recommendation_engine import ZambianMealRecommender
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '3. AI_ML_modules')
+RECIPE_FEATURES_PATH = os.path.join(MODULES_DIR, 'data', 'processed', 'recipe_features.csv')
+USER_PROFILES_PATH = os.path.join(MODULES_DIR, 'data', 'raw', 'user_profiles.json')
+
+class TestBatchPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.profiles = pd.DataFrame({
+            'user_id': [f'ZM{i:03d}' for i in range(6)],
+            'budget_range': ['low', 'medium', 'high', 'medium', 'low', 'high'],
+            'family_size': [1, 2, 3, 4, 5, 6],
+            'available_cooking_time': [20, 45, 90, 30, 60, 15],
+            'health_goal_weight_loss': [1, 0, 1, 0, 1, 0]
+        })
+
+    def test_profile_conversion(self):
+        """Test converting nested and flattened profiles to preferences"""
+        nested = {
+            'user_id': 'ZM001',
+            'demographics': {'family_size': 4},
+            'health_profile': {'health_goals': ['weight_loss'], 'dietary_restrictions': [],
+                               'allergies': ['shellfish']},
+            'dietary_preferences': {'available_cooking_time_weekday': 45},
+            'budget_constraints': {'budget_preference': 'medium'}
+        }
+        self.assertEqual(profile_to_preferences(nested), {
+            'health_goals': ['weight_loss'], 'dietary_restrictions': [], 'allergies': ['shellfish'],
+            'budget_range': 'medium', 'family_size': 4, 'available_time': 'medium'
+        })
+
+        flat = profile_to_preferences(self.profiles.to_dict('records')[0])
+        self.assertEqual(flat['health_goals'], ['weight_loss'])
+        self.assertEqual(flat['available_time'], 'low')
+
+    def test_streams_plans_and_resumes(self):
+        """Test pooled generation, streamed output and resume after a partial run"""
+        generator = BatchPlanGenerator(RECIPE_FEATURES_PATH, workers=2)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'plans.jsonl')
+            # Simulate a crash after two plans, with a truncated final line
+            first = list(generator.run(self.profiles.head(2), output_path))
+            with open(output_path, 'a') as f:
+                f.write('{"user_id": "ZM00')
+
+            resumed = BatchPlanGenerator(RECIPE_FEATURES_PATH, workers=2)
+            rest = list(resumed.run(self.profiles, output_path))
+
+            with open(output_path) as f:
+                written = [json.loads(line)['user_id'] for line in f]
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(resumed.stats['skipped'], 2)
+        self.assertEqual(resumed.stats['completed'], 4)
+        self.assertGreater(resumed.stats['plans_per_second'], 0)
+        self.assertEqual(sorted(written), sorted(self.profiles['user_id']))
+        for result in first + rest:
+            self.assertEqual(list(result['weekly_plan']), ZambianMealRecommender.DAYS)
+
+    def test_profiles_without_user_id_are_not_skipped(self):
+        """Test that resuming never matches profiles that have no user_id"""
+        anonymous = self.profiles.head(3).drop(columns=['user_id'])
+        generator = BatchPlanGenerator(RECIPE_FEATURES_PATH, workers=2)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'plans.jsonl')
+            list(generator.run(anonymous.head(1), output_path))
+
+            resumed = BatchPlanGenerator(RECIPE_FEATURES_PATH, workers=2)
+            list(resumed.run(anonymous, output_path))
+
+        self.assertEqual(resumed.stats['skipped'], 0)
+        self.assertEqual(resumed.stats['completed'], 3)
+
+    def test_error_samples_are_capped(self):
+        """Test that failures are all counted but only a bounded sample is kept"""
+        broken = self.profiles.assign(family_size='many')
+        generator = BatchPlanGenerator(RECIPE_FEATURES_PATH, workers=2, max_error_samples=2)
+
+        self.assertEqual(list(generator.run(broken)), [])
+
+        self.assertEqual(generator.stats['failed'], 6)
+        self.assertEqual(len(generator.stats['errors']), 2)
+        self.assertIn('ValueError', generator.stats['errors'][0]['error'])
+
+    def test_json_profiles_are_streamed(self):
+        """Test reading profiles incrementally from both JSON layouts"""
+        with open(USER_PROFILES_PATH) as f:
+            expected = json.load(f)['users']
+        self.assertEqual(list(iter_user_profiles(USER_PROFILES_PATH)), expected)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'profiles.json')
+            with open(path, 'w') as f:
+                json.dump(self.profiles.to_dict('records'), f)
+            self.assertEqual(list(iter_user_profiles(path)), self.profiles.to_dict('records'))
+
+            with open(path, 'w') as f:
+                json.dump({'version': '1.0'}, f)
+            with self.assertRaises(ValueError):
+                list(iter_user_profiles(path))
+
+if __name__ == '__main__':
+    unittest.main()
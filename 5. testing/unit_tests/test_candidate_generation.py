@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from candidate_generation import recipe_popularity
+from recipe_catalog import bitmap_contains, pack_mask
+from recommendation_engine import HybridRecommendationEngine
+from fixtures import random_recipes
+
+PREFERENCES = [
+    {'budget_range': 'low', 'health_goals': ['weight_loss'], 'available_time': 'low'},
+    {'budget_range': 'medium', 'preferred_recipes': ['R00010', 'R02000']},
+    {'budget_range': 'high', 'health_goals': ['muscle_gain'], 'dietary_restrictions': ['vegetarian']}
+]
+
+class TestBitmapLookups(unittest.TestCase):
+
+    def test_bitmap_contains_matches_mask(self):
+        """Test per-position bit tests against the unpacked mask"""
+        mask = np.random.default_rng(1).integers(0, 2, 1000).astype(bool)
+        positions = np.arange(1000)
+
+        np.testing.assert_array_equal(bitmap_contains(pack_mask(mask), positions), mask)
+
+class TestTwoStageRecommendations(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(3000, seed=21, id_width=5)
+        self.single_stage = HybridRecommendationEngine()
+        self.single_stage.build_content_based_model(self.recipe_features, similarity_mode='blocked')
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_based_model(self.recipe_features, similarity_mode='blocked')
+        interactions = pd.DataFrame({
+            'recipe_id': ['R00005', 'R00005', 'R00700', 'R02999'],
+            'interaction_type': ['cook', 'view', 'save', 'view']
+        })
+        self.generator = self.engine.enable_two_stage(rerank_budget=300, interactions=interactions)
+
+    def test_matches_single_stage_ranking(self):
+        """Test that re-ranking the candidates reproduces the full ranking"""
+        for preferences in PREFERENCES:
+            with self.subTest(preferences=preferences):
+                expected = self.single_stage.hybrid_recommendations(None, preferences, top_n=15)
+                actual = self.engine.hybrid_recommendations(None, preferences, top_n=15)
+
+                self.assertEqual(actual, expected)
+
+    def test_candidates_respect_budgets_and_constraints(self):
+        """Test candidate counts, sources and constraint filtering"""
+        preferences = dict(PREFERENCES[2], preferred_recipes=['R00005'])
+        candidates = self.generator.generate(preferences, filters={'meal_type': 'lunch'})
+
+        self.assertLessEqual(len(candidates), 300)
+        self.assertEqual(len(set(candidates.tolist())), len(candidates))
+        catalog = self.engine.recipe_catalog
+        self.assertTrue(all(catalog.meal_types[position] == 'lunch' for position in candidates))
+        self.assertTrue(all('vegetarian' in catalog.dietary_flags[position] for position in candidates))
+        self.assertGreater(self.generator.source_counts['content'], 0)
+        self.assertGreater(self.generator.source_counts['segment'], 0)
+
+    def test_stage_metrics_are_recorded(self):
+        """Test that both stages report latency and item counts"""
+        for preferences in PREFERENCES:
+            self.engine.hybrid_recommendations(None, preferences)
+
+        generation = self.engine.pipeline_metrics['candidate_generation'].summary()
+        reranking = self.engine.pipeline_metrics['reranking'].summary()
+        self.assertEqual(generation['requests'], 3)
+        self.assertEqual(reranking['requests'], 3)
+        self.assertLessEqual(generation['mean_items'], 300)
+        self.assertGreater(generation['mean_ms'], 0)
+
+    def test_popularity_and_catalog_changes(self):
+        """Test that the popular list follows catalog edits"""
+        popularity = recipe_popularity(pd.DataFrame({
+            'recipe_id': ['R00001', 'R00001', 'R00002'],
+            'interaction_type': ['cook', 'view', 'save']
+        }))
+        self.assertEqual(popularity.to_dict(), {'R00001': 5.0, 'R00002': 3.0})
+
+        self.assertEqual(self.generator.popular_candidates().tolist(), [5, 700, 2999])
+        self.engine.rescale_threshold = np.inf
+        self.engine.remove_recipes(['R00700'])
+        self.assertEqual(self.generator.popular_candidates().tolist(), [5, 2998])
+
+if __name__ == '__main__':
+    unittest.main()
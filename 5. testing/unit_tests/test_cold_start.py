@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '3. AI_ML_modules')
+sys.path.append(os.path.join(MODULES_DIR, 'meal_recommendation'))
+sys.path.append(os.path.join(MODULES_DIR, 'user_profiling'))
+
+import numpy as np
+import pandas as pd
+
+from health_analysis import HealthClusterAnalyzer
+from recommendation_engine import HybridRecommendationEngine
+from fixtures import random_recipes
+
+def user_table(n_users=90, seed=15):
+    rng = np.random.default_rng(seed)
+    users = pd.DataFrame({
+        'age': rng.integers(18, 75, n_users),
+        'weight': rng.uniform(45, 120, n_users).round(1),
+        'height': rng.uniform(150, 195, n_users).round(1),
+        'budget_range': rng.choice(['low', 'medium', 'high'], n_users),
+        'dietary_restrictions': [['vegetarian'] if flag else [] for flag in rng.integers(0, 2, n_users)]
+    })
+    users['health_goals'] = [['weight_loss'] if weight > 85 else ['muscle_gain'] for weight in users['weight']]
+    return users
+
+class TestSegmentTables(unittest.TestCase):
+
+    def setUp(self):
+        self.users = user_table()
+        self.clusters = HealthClusterAnalyzer(n_clusters=3)
+        self.clusters.fit(self.users)
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_based_model(random_recipes(200, seed=14))
+        self.tables = self.engine.enable_cold_start(self.clusters, self.users, depth=20)
+
+    def reference(self, preferences, top_n=10):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(self.engine.recipe_features)
+        return engine.hybrid_recommendations(None, preferences, top_n=top_n)
+
+    def test_lookup_matches_full_scoring_for_the_segment(self):
+        """Test that a table lookup equals ranking the catalog for the segment preferences"""
+        user = {'budget_range': 'low', 'dietary_restrictions': ['vegetarian'], 'age': 62, 'weight': 95}
+        segment = self.tables.segment(user)
+        self.assertEqual(segment[0], int(self.clusters.predict(user)[0]))
+        self.assertIn(self.tables.segment(self.users.iloc[0].to_dict()), self.tables.tables)
+
+        recommendations = self.engine.hybrid_recommendations(None, user, top_n=10)
+        self.assertEqual(recommendations, self.reference(self.tables.segment_preferences(segment)))
+
+        anonymous = self.engine.hybrid_recommendations('nobody', {'budget_range': 'high'}, top_n=5)
+        self.assertEqual(anonymous, self.reference({'budget_range': 'high'}, top_n=5))
+
+    def test_stated_preferences_are_kept(self):
+        """Test that stated goals, time and meal type rank like full scoring"""
+        for preferences in [{'budget_range': 'low', 'health_goals': ['muscle_gain'], 'available_time': 'low'},
+                            {'health_goals': ['weight_loss'], 'age': 62, 'weight': 95, 'meal_type': 'lunch'},
+                            {'budget_range': 'high', 'available_time': 'high'}]:
+            recommendations = self.engine.hybrid_recommendations(None, preferences, top_n=5)
+            self.assertEqual(recommendations, self.reference(preferences, top_n=5))
+
+        segment = self.tables.segment({'health_goals': ['muscle_gain'], 'age': 62, 'weight': 95})
+        self.assertIsNone(segment[0])
+        self.assertEqual(self.tables.segment_preferences(segment)['health_goals'], ['muscle_gain'])
+
+    def test_warm_and_filtered_requests_are_fully_scored(self):
+        """Test that users with history, filters or deep requests skip the tables"""
+        self.assertFalse(self.engine.is_cold_start(None, {'preferred_recipes': ['R0001']}))
+        self.assertFalse(self.engine.is_cold_start(None, {}, filters={'meal_type': 'lunch'}))
+        deep = self.engine.hybrid_recommendations(None, {'budget_range': 'high'}, top_n=30)
+        self.assertEqual(len(deep), 30)
+
+        requests = [{'user_id': None, 'user_preferences': {'budget_range': 'low', 'age': 30}, 'top_n': 5},
+                    {'user_id': None, 'user_preferences': {'preferred_recipes': ['R0002']}, 'top_n': 5}]
+        self.assertEqual(self.engine.batch_hybrid_recommendations(requests),
+                         [self.engine.hybrid_recommendations(None, r['user_preferences'], top_n=5)
+                          for r in requests])
+
+    def test_incremental_refresh(self):
+        """Test that catalog edits and cluster changes rebuild only affected tables"""
+        self.assertEqual(self.tables.refresh(), 0)
+
+        self.engine.remove_recipes(['R0003'])
+        self.assertEqual(self.tables.refresh(), len(self.tables.tables))
+        self.assertEqual(self.tables.refresh(), 0)
+        self.assertNotIn('R0003', [rec['recipe_id'] for rec in self.tables.lookup({'budget_range': 'high'})])
+
+        version = self.engine.versions['model']
+        profiles = {cluster: dict(profile) for cluster, profile in self.clusters.cluster_profiles.items()}
+        changed_goal = 'weight_loss' if profiles[0]['common_goals'] != ['weight_loss'] else 'muscle_gain'
+        profiles[0]['common_goals'] = [changed_goal]
+        self.clusters.cluster_profiles = profiles
+        self.tables.set_cluster_model(self.clusters)
+
+        self.assertGreater(self.engine.versions['model'], version)
+        self.assertEqual(self.tables.refresh(), sum(segment[0] == 0 for segment in self.tables.tables))
+        with self.assertRaises(ValueError):
+            self.tables.lookup({}, top_n=21)
+
+class TestHealthClusterPredict(unittest.TestCase):
+
+    def test_predict_matches_fit_labels(self):
+        """Test cluster assignment of new users, with missing features filled"""
+        users = user_table()
+        clusters = HealthClusterAnalyzer(n_clusters=3)
+        clusters.fit(users)
+
+        np.testing.assert_array_equal(clusters.predict(users), users['health_cluster'])
+        self.assertEqual(len(clusters.predict({'age': 40})), 1)
+        with self.assertRaises(ValueError):
+            HealthClusterAnalyzer().predict({'age': 40})
+
+if __name__ == '__main__':
+    unittest.main()
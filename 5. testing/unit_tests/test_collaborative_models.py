@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import subprocess
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+
+from collaborative_inference import NCFScorer
+
+def random_ncf_weights(num_users=12, num_recipes=40, embedding_size=8, seed=0):
+    """Random weights with the layer layout of build_collaborative_model"""
+    rng = np.random.default_rng(seed)
+    user_embeddings = rng.normal(size=(num_users, embedding_size))
+    recipe_embeddings = rng.normal(size=(num_recipes, embedding_size))
+    dense_layers = [
+        (rng.normal(size=(2 * embedding_size, 16)), rng.normal(size=16), 'relu'),
+        (rng.normal(size=(16, 8)), rng.normal(size=8), 'relu'),
+        (rng.normal(size=(8, 1)), rng.normal(size=1), 'sigmoid')
+    ]
+    return user_embeddings, recipe_embeddings, dense_layers
+
+def reference_forward(user_embeddings, recipe_embeddings, dense_layers, user, recipe):
+    """Per-pair forward pass, as Keras predict computes it"""
+    hidden = np.concatenate([user_embeddings[user], recipe_embeddings[recipe]])
+    for weights, bias, activation in dense_layers:
+        hidden = hidden @ weights + bias
+        hidden = np.maximum(hidden, 0) if activation == 'relu' else 1 / (1 + np.exp(-hidden))
+    return hidden[0]
+
+class TestNCFScorer(unittest.TestCase):
+
+    def setUp(self):
+        self.weights = random_ncf_weights()
+        self.scorer = NCFScorer(*self.weights)
+
+    def test_batched_forward_matches_per_pair(self):
+        """Test that the batched pass reproduces per-pair predictions"""
+        scores = self.scorer.score_users([0, 5, 11])
+
+        self.assertEqual(scores.shape, (3, 40))
+        for row, user in enumerate([0, 5, 11]):
+            expected = [reference_forward(*self.weights, user, recipe) for recipe in range(40)]
+            np.testing.assert_allclose(scores[row], expected, rtol=1e-4, atol=1e-6)
+
+    def test_memory_cap_chunks_give_same_scores(self):
+        """Test that tiny batch and memory caps only change the chunking"""
+        chunked = NCFScorer(*self.weights, batch_size=2, max_memory_mb=0.0005)
+
+        np.testing.assert_allclose(
+            chunked.score_users(range(12)),
+            self.scorer.score_users(range(12)),
+            rtol=1e-6
+        )
+
+    def test_scores_by_id(self):
+        """Test ID-keyed scoring and unknown-ID errors"""
+        scorer = NCFScorer(*self.weights,
+                           user_ids=[f'ZM{i:03d}' for i in range(12)],
+                           recipe_ids=[f'RCP{i:03d}' for i in range(40)])
+
+        scores = scorer.score_user_ids(['ZM003'], recipe_ids=['RCP010', 'RCP002'])
+
+        np.testing.assert_allclose(scores, self.scorer.score_users([3], [10, 2]))
+        with self.assertRaises(ValueError):
+            scorer.score_user_ids(['ZM999'])
+
+class TestTensorFlowFreeServing(unittest.TestCase):
+
+    def test_npz_roundtrip(self):
+        """Test that exported weights load back into an identical scorer"""
+        weights = random_ncf_weights(seed=3)
+        scorer = NCFScorer(*weights,
+                           user_ids=[f'ZM{i:03d}' for i in range(12)],
+                           recipe_ids=np.arange(100, 140))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'collaborative_model.npz')
+            scorer.save(path)
+            loaded = NCFScorer.load(path)
+
+        self.assertEqual(loaded.user_ids.tolist(), scorer.user_ids.tolist())
+        self.assertEqual(loaded.recipe_ids.tolist(), scorer.recipe_ids.tolist())
+        np.testing.assert_array_equal(
+            loaded.score_user_ids(['ZM007']), scorer.score_user_ids(['ZM007'])
+        )
+
+    def test_engine_import_does_not_load_tensorflow(self):
+        """Test that serving imports never pull in TensorFlow"""
+        module_dir = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, recommendation_engine; print("tensorflow" in sys.modules)'],
+            cwd=module_dir, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import io
+import json
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import MealDataPreprocessor, iter_json_array
+
+NUTRITIONAL_DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '2. source_code', 'database', 'nutritional_data.json'
+)
+
+def food_records(n_foods=25):
+    foods = []
+    for i in range(n_foods):
+        nutrients = {'calories': 100 + i, 'protein': i / 4}
+        if i % 3:
+            nutrients['iron'] = 1.5
+        food = {'id': f'F{i:03d}', 'name': f'Food {i}', 'nutrients_per_100g': nutrients}
+        if i % 2:
+            food['common_serving_sizes'] = {'cup': {'weight_g': 200 + i, 'description': '1 cup'}}
+        foods.append(food)
+    return foods
+
+class TestLoadZambianFoods(unittest.TestCase):
+
+    def setUp(self):
+        self.preprocessor = MealDataPreprocessor()
+        self.foods = food_records()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'foods.json')
+        with open(self.path, 'w') as f:
+            json.dump({'version': '1.0', 'note': 'the "foods": [] key is below', 'foods': self.foods,
+                       'nutrient_reference_values': {'iron': 18}}, f, indent=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_missing_values_are_nan_on_the_right_rows(self):
+        """Test that nutrients and serving sizes stay aligned with their food"""
+        foods_df = self.preprocessor.load_zambian_foods(self.path)
+
+        self.assertEqual(len(foods_df), 25)
+        self.assertNotIn('nutrients_per_100g', foods_df.columns)
+        np.testing.assert_array_equal(foods_df['nutrient_calories'], np.arange(100, 125))
+        iron = foods_df['nutrient_iron'].to_numpy()
+        np.testing.assert_array_equal(np.isnan(iron), np.arange(25) % 3 == 0)
+        weights = foods_df['serving_cup_weight_g'].to_numpy()
+        self.assertTrue(np.isnan(weights[0]))
+        self.assertEqual(weights[1], 201)
+        self.assertEqual(foods_df.loc[3, 'serving_cup_description'], '1 cup')
+        self.assertEqual(foods_df['nutrient_calories'].dtype, np.float64)
+
+    def test_streaming_matches_full_load(self):
+        """Test that chunked parsing gives the same table and bounded chunks"""
+        expected = self.preprocessor.load_zambian_foods(self.path)
+        pd.testing.assert_frame_equal(self.preprocessor.load_zambian_foods(self.path, chunk_size=4), expected)
+
+        chunks = list(self.preprocessor.iter_zambian_foods(self.path, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+
+        sample = self.preprocessor.load_zambian_foods(NUTRITIONAL_DATA)
+        pd.testing.assert_frame_equal(self.preprocessor.load_zambian_foods(NUTRITIONAL_DATA, chunk_size=3), sample)
+        self.assertIn('nutrient_calories', sample.columns)
+        with self.assertRaises(ValueError):
+            list(self.preprocessor.iter_zambian_foods(self.path, chunk_size=0))
+
+    def test_cooked_nutrients_in_real_data(self):
+        """Test that the real food table's cooked nutrients get their own numeric columns"""
+        foods_df = self.preprocessor.load_zambian_foods(NUTRITIONAL_DATA).set_index('id')
+
+        self.assertFalse([column for column in foods_df.columns if column.startswith('nutrients_')])
+        nutrients = [column for column in foods_df.columns if column.startswith('nutrient_')]
+        self.assertTrue((foods_df[nutrients].dtypes == np.float64).all())
+        self.assertEqual(foods_df.loc['ZM006', 'nutrient_cooked_calories'], 127)
+        self.assertTrue(np.isnan(foods_df.loc['ZM006', 'nutrient_calories']))
+        self.assertTrue(np.isnan(foods_df.loc['ZM001', 'nutrient_cooked_calories']))
+
+class TestIterJsonArray(unittest.TestCase):
+
+    def test_tiny_reads(self):
+        """Test values split across reads, including numbers at a read boundary"""
+        text = json.dumps({'skip': {'foods': [1, 2]}, 'foods': [12345, 'a b', {'x': [1.25, None]}, True]})
+        for read_size in (1, 2, 3, 7, 1000):
+            self.assertEqual(list(iter_json_array(io.StringIO(text), 'foods', read_size=read_size)),
+                             [12345, 'a b', {'x': [1.25, None]}, True])
+        self.assertEqual(list(iter_json_array(io.StringIO('{"foods": [ ]}'), 'foods')), [])
+        self.assertEqual(list(iter_json_array(io.StringIO('[1, {"a": 2}]'), 'foods')), [1, {'a': 2}])
+
+        text = '{"a": 1.5e10, "b": -0.25E-3, "foods": [12.5e+2, 7]}'
+        for read_size in (1, 2, 3):
+            self.assertEqual(list(iter_json_array(io.StringIO(text), 'foods', read_size=read_size)), [1250.0, 7])
+
+    def test_malformed_input(self):
+        """Test missing keys, non-objects and truncated files"""
+        for text in ('{"other": []}', '{}', '"foods"', '{"foods": [1, 2'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(text), 'foods'))
+
+        # An unterminated value stops at the buffer cap instead of reading the rest of the file
+        text = '{"foods": [{"name": "' + 'x' * 10000
+        stream = io.StringIO(text)
+        with self.assertRaises(ValueError):
+            list(iter_json_array(stream, 'foods', read_size=100, max_buffer=1000))
+        self.assertLess(stream.tell(), 1200)
+        self.assertEqual(list(iter_json_array(io.StringIO('[' + '1, ' * 2000 + '2]'), 'foods', read_size=10,
+                                              max_buffer=100))[-2:], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
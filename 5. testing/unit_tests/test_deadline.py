@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import time
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+from unittest.mock import patch
+
+from recommendation_engine import ZambianMealRecommender
+from deadline import DEADLINE_TIERS, TierLatency
+from fixtures import random_recipes
+
+class TestDeadlineTiers(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = ZambianMealRecommender()
+        self.recommender.build_content_based_model(random_recipes(120, seed=16, id_width=3, cycle_meals=True))
+        self.recommender.set_popularity({f'R{i:03d}': 120 - i for i in range(0, 120, 2)})
+        self.preferences = {'budget_range': 'medium', 'dietary_restrictions': ['vegetarian']}
+
+    def slow(self, name, seconds=0.3):
+        original = getattr(self.recommender, name)
+
+        def slow_call(*args, **kwargs):
+            time.sleep(seconds)
+            return original(*args, **kwargs)
+        return patch.object(self.recommender, name, side_effect=slow_call)
+
+    def test_full_tier_when_in_time(self):
+        """Test that a generous deadline returns the full result from the 'content' tier"""
+        expected = self.recommender.hybrid_recommendations(None, self.preferences, top_n=8)
+        actual = self.recommender.hybrid_recommendations_within_deadline(None, self.preferences, 5000, top_n=8)
+
+        self.assertEqual(actual, {'tier': 'content', 'recommendations': expected})
+
+        # The tier is response metadata, so it survives an empty answer
+        impossible = {'allergies': ['nuts'], 'dietary_restrictions': ['vegan']}
+        response = self.recommender.hybrid_recommendations_within_deadline(None, impossible, 5000)
+        self.assertEqual(response, {'tier': 'content', 'recommendations': []})
+
+    def test_slow_scoring_falls_back_to_popular(self):
+        """Test that a slow model call is abandoned and later skipped"""
+        with self.slow('full_hybrid_recommendations'):
+            start = time.perf_counter()
+            response = self.recommender.hybrid_recommendations_within_deadline(
+                None, self.preferences, 30, top_n=5
+            )
+            self.assertLess(time.perf_counter() - start, 0.25)
+
+            self.assertEqual(response['tier'], 'popular')
+            recommendations = response['recommendations']
+            allowed = self.recommender.recipe_catalog.filter(dietary=['vegetarian'])
+            allowed_ids = set(self.recommender.recipe_catalog.recipe_ids[allowed])
+            self.assertTrue({rec['recipe_id'] for rec in recommendations} <= allowed_ids)
+            popularity = [120 - int(rec['recipe_id'][1:]) for rec in recommendations]
+            self.assertEqual(popularity, sorted(popularity, reverse=True))
+
+            # Once the abandoned call finishes, its latency rules the tier out up front
+            time.sleep(0.35)
+            counts = self.recommender.tier_latency['hybrid'].counts['content']
+            self.assertEqual(counts['timeouts'], 1)
+            self.recommender.hybrid_recommendations_within_deadline(None, self.preferences, 30, top_n=5)
+            self.assertEqual(counts['skipped'], 1)
+            self.assertEqual(counts['timeouts'], 1)
+
+    def test_segment_tier_and_cache_tier(self):
+        """Test the cold-start segment fallback and serving cached full results"""
+        self.recommender.enable_cold_start(depth=20)
+        warm = dict(self.preferences, preferred_recipes=['R001'])
+        with self.slow('full_hybrid_recommendations'):
+            response = self.recommender.hybrid_recommendations_within_deadline(None, warm, 30, top_n=5)
+        self.assertEqual(response['tier'], 'segment')
+        self.assertEqual(len(response['recommendations']), 5)
+        time.sleep(0.35)
+
+        self.recommender.enable_result_cache()
+        first = self.recommender.hybrid_recommendations_within_deadline(None, warm, 5000, top_n=5)
+        second = self.recommender.hybrid_recommendations_within_deadline(None, warm, 5000, top_n=5)
+        self.assertEqual(first['tier'], 'content')
+        self.assertEqual(second, {'tier': 'cache',
+                                  'recommendations': self.recommender.hybrid_recommendations(None, warm, top_n=5)})
+
+    def test_weekly_plan_deadline(self):
+        """Test weekly plans from the full tier and from the popularity fallback"""
+        expected = self.recommender.generate_weekly_plan(self.preferences)
+        self.assertEqual(self.recommender.weekly_plan_within_deadline(self.preferences, 5000),
+                         {'tier': 'content', 'weekly_plan': expected})
+
+        with self.slow('build_weekly_plan'):
+            response = self.recommender.weekly_plan_within_deadline(self.preferences, 30)
+        self.assertEqual(response['tier'], 'popular')
+        weekly_plan = response['weekly_plan']
+        self.assertEqual(list(weekly_plan), ZambianMealRecommender.DAYS)
+        self.assertTrue(all(len(weekly_plan['monday'][meal]) for meal in weekly_plan['monday']))
+        time.sleep(0.35)
+
+    def test_popular_tier_without_popularity_uses_prior(self):
+        """Test that the 'popular' tier ranks by the default-preference score, not catalog order"""
+        recommender = ZambianMealRecommender()
+        recommender.build_content_based_model(random_recipes(120, seed=16, id_width=3, cycle_meals=True))
+        self.recommender = recommender
+        with self.slow('full_hybrid_recommendations'):
+            response = recommender.hybrid_recommendations_within_deadline(None, self.preferences, 30, top_n=10)
+        time.sleep(0.35)
+
+        self.assertEqual(response['tier'], 'popular')
+        self.assertIn(response['tier'], DEADLINE_TIERS)
+        recommendations = response['recommendations']
+        positions = recommender.get_recipe_positions([rec['recipe_id'] for rec in recommendations])
+        prior = recommender.calculate_recipe_scores({})
+        self.assertEqual([rec['score'] for rec in recommendations], prior[positions].tolist())
+
+        allowed = recommender.constrained_positions(self.preferences)
+        self.assertEqual(sorted(prior[positions], reverse=True), sorted(prior[allowed], reverse=True)[:10])
+
+class TestTierLatency(unittest.TestCase):
+
+    def test_estimates_decay_while_skipped(self):
+        """Test the moving average and the decay that lets a skipped tier retry"""
+        latency = TierLatency(smoothing=0.5, skip_decay=0.5)
+        latency.started()
+        latency.finished('content', 0.1)
+        latency.started()
+        latency.finished('content', 0.2)
+        self.assertAlmostEqual(latency.estimates_ms['content'], 150)
+        self.assertEqual(latency.in_flight, 0)
+
+        self.assertTrue(latency.should_skip('content', 0.1))
+        self.assertFalse(latency.should_skip('content', 0.1))
+        self.assertTrue(latency.should_skip('hybrid', 0))
+        self.assertEqual(latency.summary()['content']['skipped'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+
+from recommendation_engine import ZambianMealRecommender
+from similarity_search import mmr_rerank, normalize_rows
+from fixtures import recipe_families
+
+def naive_mmr(relevance, vectors, k, diversity):
+    scaled = (relevance - relevance.min()) / np.ptp(relevance)
+    picks = []
+    for _ in range(k):
+        best = max(
+            (candidate for candidate in range(len(relevance)) if candidate not in picks),
+            key=lambda c: (1 - diversity) * scaled[c]
+            - diversity * max((vectors[c] @ vectors[p] for p in picks), default=0.0)
+        )
+        picks.append(best)
+    return picks
+
+class TestMMRRerank(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.vectors = normalize_rows(rng.normal(size=(200, 8)))
+        self.relevance = rng.random(200)
+
+    def test_matches_naive_pairwise_mmr(self):
+        """Test the running max-similarity update against the pairwise definition"""
+        for diversity in (0.2, 0.5, 0.9):
+            expected = naive_mmr(self.relevance, self.vectors, 15, diversity)
+            self.assertEqual(mmr_rerank(self.relevance, 15, diversity, vectors=self.vectors).tolist(), expected)
+            self.assertEqual(mmr_rerank(self.relevance, 15, diversity,
+                                        similarity=self.vectors @ self.vectors.T).tolist(), expected)
+
+    def test_zero_diversity_is_top_k(self):
+        """Test that diversity=0 is the stable top-k and k is clipped to the candidates"""
+        relevance = np.array([0.5, 0.9, 0.5, 0.1])
+        vectors = normalize_rows(np.eye(4))
+        self.assertEqual(mmr_rerank(relevance, 3, 0.0, vectors=vectors).tolist(), [1, 0, 2])
+        self.assertEqual(len(mmr_rerank(relevance, 10, 0.5, vectors=vectors)), 4)
+
+        with self.assertRaises(ValueError):
+            mmr_rerank(relevance, 3, 1.5, vectors=vectors)
+        with self.assertRaises(ValueError):
+            mmr_rerank(relevance, 3, 0.5)
+
+class TestDiversityParameter(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = ZambianMealRecommender()
+        self.recommender.build_content_based_model(recipe_families())
+        self.preferences = {'budget_range': 'medium', 'preferred_recipes': ['R001', 'R002']}
+
+    def redundancy(self, recommendations):
+        """Mean pairwise cosine similarity of the recommended recipes"""
+        positions = self.recommender.get_recipe_positions([rec['recipe_id'] for rec in recommendations])
+        vectors = self.recommender.content_features[positions]
+        similarity = vectors @ vectors.T
+        return (similarity.sum() - np.trace(similarity)) / (len(positions) * (len(positions) - 1))
+
+    def test_hybrid_recommendations(self):
+        """Test that diversity keeps the top pick and lowers redundancy"""
+        plain = self.recommender.hybrid_recommendations(None, self.preferences, top_n=10)
+        self.assertEqual(self.recommender.hybrid_recommendations(None, self.preferences, top_n=10, diversity=0.0),
+                         plain)
+
+        diverse = self.recommender.hybrid_recommendations(None, self.preferences, top_n=10, diversity=0.5)
+        self.assertEqual(len(diverse), 10)
+        self.assertEqual(diverse[0], plain[0])
+        self.assertLess(self.redundancy(diverse), self.redundancy(plain))
+
+        requests = [{'user_id': None, 'user_preferences': self.preferences, 'top_n': 10, 'diversity': 0.5},
+                    {'user_id': None, 'user_preferences': self.preferences, 'top_n': 10}]
+        self.assertEqual(self.recommender.batch_hybrid_recommendations(requests), [diverse, plain])
+
+        self.recommender.enable_result_cache()
+        self.assertEqual(self.recommender.hybrid_recommendations(None, self.preferences, top_n=10), plain)
+        self.assertEqual(self.recommender.hybrid_recommendations(None, self.preferences, top_n=10, diversity=0.5),
+                         diverse)
+
+    def test_content_based_recommendations(self):
+        """Test diverse neighbours of a seed recipe"""
+        plain = self.recommender.content_based_recommendations('R005', top_n=8)
+        diverse = self.recommender.content_based_recommendations('R005', top_n=8, diversity=0.7)
+
+        self.assertEqual(diverse[0], plain[0])
+        self.assertNotIn('R005', [rec['recipe_id'] for rec in diverse])
+        self.assertLess(self.redundancy(diverse), self.redundancy(plain))
+
+    def test_weekly_plan(self):
+        """Test that a diverse weekly plan still follows the meal filters"""
+        plain = self.recommender.generate_weekly_plan(self.preferences)
+        diverse = self.recommender.generate_weekly_plan(self.preferences, diversity=0.5)
+        self.assertEqual(list(diverse), ZambianMealRecommender.DAYS)
+
+        for meal in ('lunch', 'dinner'):
+            diverse_meals = [day_plan[meal][0] for day_plan in diverse.values()]
+            plain_meals = [day_plan[meal][0] for day_plan in plain.values()]
+            self.assertEqual({rec['meal_type'] for rec in diverse_meals}, {meal})
+            self.assertLess(self.redundancy(diverse_meals), self.redundancy(plain_meals))
+
+if __name__ == '__main__':
+    unittest.main()
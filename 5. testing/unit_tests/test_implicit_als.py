@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from implicit_als import ImplicitALS, confidence_matrix, interaction_strength
+from recommendation_engine import HybridRecommendationEngine
+from fixtures import random_recipes
+
+def grouped_interactions(n_users=60, n_recipes=40, per_user=8, seed=3):
+    """Even users interact with the first half of the recipes, odd users with the second"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for user in range(n_users):
+        half = np.arange(n_recipes // 2) + (user % 2) * (n_recipes // 2)
+        for recipe in rng.choice(half, per_user, replace=False):
+            rows.append({
+                'user_id': f'ZM{user:03d}',
+                'recipe_id': f'R{recipe:04d}',
+                'interaction_type': rng.choice(['view', 'save', 'cook', 'rate']),
+                'rating': int(rng.integers(0, 6))
+            })
+    return pd.DataFrame(rows)
+
+class TestConfidence(unittest.TestCase):
+
+    def test_strength_and_duplicates(self):
+        """Test interaction weights, rating scaling and summed duplicates"""
+        interactions = pd.DataFrame({
+            'user_id': ['u1', 'u1', 'u1', 'u2'],
+            'recipe_id': ['a', 'a', 'b', 'b'],
+            'interaction_type': ['view', 'cook', 'rate', 'unknown'],
+            'rating': [0, 0, 6, 0]
+        })
+
+        np.testing.assert_allclose(interaction_strength(interactions), [1.0, 4.0, 4.0, 1.0])
+        matrix, user_ids, recipe_ids = confidence_matrix(interactions)
+        self.assertEqual(list(user_ids), ['u1', 'u2'])
+        np.testing.assert_allclose(matrix.toarray(), [[5.0, 4.0], [0.0, 1.0]])
+
+class TestImplicitALS(unittest.TestCase):
+
+    def setUp(self):
+        self.interactions = grouped_interactions()
+        self.model = ImplicitALS(factors=8, iterations=8, num_threads=2, max_memory_mb=0.01).fit(
+            self.interactions
+        )
+
+    def test_vectorized_solve_matches_dense_formula(self):
+        """Test the batched half-step against the per-user normal equations"""
+        matrix, _, _ = confidence_matrix(self.interactions, self.model.user_ids, self.model.recipe_ids)
+        confidence = matrix * self.model.alpha
+        fixed = self.model.recipe_factors.astype(float)
+
+        solved = self.model.solve_factors(confidence, fixed)
+
+        dense = confidence.toarray()
+        for user in (0, 1, 37):
+            weights = 1 + dense[user]
+            preference = (dense[user] > 0).astype(float)
+            lhs = fixed.T @ (weights[:, None] * fixed) + self.model.regularization * np.eye(8)
+            expected = np.linalg.solve(lhs, fixed.T @ (weights * preference))
+            np.testing.assert_allclose(solved[user], expected, rtol=1e-8, atol=1e-10)
+        self.assertGreater(len(self.model.row_chunks(confidence.indptr, 8 * 8 * 8)), 1)
+
+    def test_conjugate_gradient_converges_to_exact(self):
+        """Test that enough CG steps reach the exact half-step solution"""
+        matrix, _, _ = confidence_matrix(self.interactions, self.model.user_ids, self.model.recipe_ids)
+        confidence = matrix * self.model.alpha
+        fixed = self.model.recipe_factors
+        exact = ImplicitALS(factors=8, solver='exact').solve_factors(confidence, fixed)
+
+        self.model.cg_steps = 8  # CG is exact after factors steps
+        solved = self.model.solve_factors(confidence, fixed, np.zeros_like(exact))
+
+        np.testing.assert_allclose(solved, exact, rtol=1e-4, atol=1e-6)
+        with self.assertRaises(ValueError):
+            ImplicitALS(solver='lu')
+
+    def test_threads_do_not_change_the_result(self):
+        """Test that parallel row chunks give the serial factors"""
+        serial = ImplicitALS(factors=8, iterations=8, num_threads=1, max_memory_mb=0.01).fit(
+            self.interactions
+        )
+
+        np.testing.assert_allclose(serial.user_factors, self.model.user_factors, rtol=1e-5, atol=1e-6)
+
+    def test_recovers_groups_and_folds_in_users(self):
+        """Test that users prefer their group and that fold-in needs no retraining"""
+        scores = self.model.score_users(self.model.user_positions(['ZM000', 'ZM001']),
+                                        self.model.recipe_positions([f'R{i:04d}' for i in range(40)]))
+        self.assertGreater(scores[0, :20].mean(), scores[0, 20:].mean() + 0.3)
+        self.assertGreater(scores[1, 20:].mean(), scores[1, :20].mean() + 0.3)
+
+        recipe_factors = self.model.recipe_factors.copy()
+        new_user = pd.DataFrame({'user_id': 'NEW', 'recipe_id': ['R0021', 'R0025', 'R0030', 'R9999'],
+                                 'interaction_type': 'cook'})
+        position = self.model.add_users(new_user)[0]
+
+        np.testing.assert_array_equal(self.model.recipe_factors, recipe_factors)
+        self.assertEqual(self.model.user_ids[position], 'NEW')
+        scores = self.model.score_users([position])[0]
+        self.assertGreater(scores[self.model.recipe_positions([f'R{i:04d}' for i in range(20, 40)])].mean(),
+                           scores[self.model.recipe_positions([f'R{i:04d}' for i in range(20)])].mean())
+
+class TestALSBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(40, seed=7)
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_based_model(self.recipe_features)
+        self.engine.build_als_model(grouped_interactions(), factors=8, iterations=8)
+
+    @staticmethod
+    def in_group(recommendations):
+        return sum(int(rec['recipe_id'][1:]) >= 20 for rec in recommendations)
+
+    def test_backend_serves_hybrid_recommendations(self):
+        """Test ALS scores in the hybrid ranking and a save/load roundtrip"""
+        self.assertEqual(self.engine.collaborative_backend, 'als')
+        recommendations = self.engine.hybrid_recommendations('ZM001', {}, top_n=10)
+        plain = HybridRecommendationEngine()
+        plain.build_content_based_model(self.recipe_features)
+        # ZM001 only interacted with recipes R0020-R0039
+        self.assertGreater(self.in_group(recommendations),
+                           self.in_group(plain.hybrid_recommendations('ZM001', {}, top_n=10)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'als.npz')
+            self.engine.collaborative_scorer.save(file_path)
+            loaded = HybridRecommendationEngine()
+            loaded.build_content_based_model(self.recipe_features)
+            loaded.load_collaborative_model(file_path)
+
+        self.assertEqual(loaded.collaborative_backend, 'als')
+        self.assertEqual(loaded.hybrid_recommendations('ZM001', {}, top_n=10), recommendations)
+
+    def test_fold_in_users(self):
+        """Test serving a folded-in user and the backend check"""
+        self.assertIsNone(self.engine.collaborative_scores('NEW', np.arange(40)))
+        self.engine.fold_in_users(pd.DataFrame({
+            'user_id': 'NEW', 'recipe_id': ['R0001', 'R0002', 'R0005'], 'interaction_type': 'save'
+        }))
+        self.assertIsNotNone(self.engine.collaborative_scores('NEW', np.arange(40)))
+
+        with self.assertRaises(ValueError):
+            HybridRecommendationEngine().fold_in_users(pd.DataFrame())
+
+if __name__ == '__main__':
+    unittest.main()
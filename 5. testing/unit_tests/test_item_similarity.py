@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from implicit_als import confidence_matrix
+from item_similarity import CoInteractionIndex
+from recommendation_engine import HybridRecommendationEngine
+
+def random_interactions(n_rows, n_users=50, n_recipes=80, seed=0, user_prefix='ZM'):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': [f'{user_prefix}{i:03d}' for i in rng.integers(0, n_users, n_rows)],
+        'recipe_id': [f'R{i:04d}' for i in rng.integers(0, n_recipes, n_rows)],
+        'interaction_type': rng.choice(['view', 'save', 'cook'], n_rows),
+        'rating': rng.integers(0, 6, n_rows)
+    })
+
+def brute_force_neighbours(interactions, recipe_ids, k):
+    """Full dense cosine matrix over recipe columns, pruned to positive top-k sets"""
+    matrix, _, _ = confidence_matrix(interactions, recipe_ids=recipe_ids)
+    columns = matrix.toarray().T
+    norms = np.linalg.norm(columns, axis=1)
+    similarity = columns @ columns.T / np.outer(norms, norms)
+    np.fill_diagonal(similarity, 0)
+    expected = {}
+    for row in range(len(similarity)):
+        order = np.lexsort((np.arange(len(similarity)), -similarity[row]))[:k]
+        expected[row] = {(int(col), round(similarity[row, col], 5)) for col in order if similarity[row, col] > 0}
+    return expected
+
+class TestCoInteractionIndex(unittest.TestCase):
+
+    def assertMatchesBruteForce(self, index, interactions):
+        expected = brute_force_neighbours(interactions, index.recipe_ids, index.top_k)
+        for row, neighbours in expected.items():
+            linked = index.neighbour_idx[row] >= 0
+            actual = {(int(col), round(float(score), 5)) for col, score in
+                      zip(index.neighbour_idx[row][linked], index.neighbour_scores[row][linked])}
+            self.assertEqual(actual, neighbours, f"row {row}")
+
+    def test_chunked_products_match_dense_cosine(self):
+        """Test blocked sparse products against the full cosine matrix"""
+        interactions = random_interactions(400)
+        index = CoInteractionIndex(top_k=6, block_size=7).fit(interactions)
+
+        self.assertEqual(index.neighbour_idx.shape, (len(index.recipe_ids), 6))
+        self.assertMatchesBruteForce(index, interactions)
+
+    def test_incremental_updates_match_a_rebuild(self):
+        """Test that added interactions, users and recipes give the rebuilt neighbours"""
+        first = random_interactions(400)
+        index = CoInteractionIndex(top_k=6, block_size=16).fit(first)
+        seen = len(index.recipe_ids)
+
+        for seed in (1, 2):
+            batch = random_interactions(30, n_recipes=90, seed=seed, user_prefix='NEW')
+            recomputed = index.add_interactions(batch)
+            first = pd.concat([first, batch], ignore_index=True)
+            self.assertLess(recomputed, len(index.recipe_ids))
+
+        self.assertGreater(len(index.recipe_ids), seen)
+        self.assertMatchesBruteForce(index, first)
+
+class TestCoInteractionRecommendations(unittest.TestCase):
+
+    def setUp(self):
+        # Users cook either the first or the second half of the recipes
+        rows = []
+        for user in range(20):
+            half = range(10) if user % 2 == 0 else range(10, 20)
+            rows += [{'user_id': f'ZM{user:03d}', 'recipe_id': f'R{recipe:04d}', 'interaction_type': 'cook'}
+                     for recipe in half if (recipe + user) % 3]
+        self.interactions = pd.DataFrame(rows)
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_co_interaction_model(self.interactions, top_k=5)
+
+    def test_recommends_co_cooked_recipes(self):
+        """Test seed aggregation, seed exclusion and ordering"""
+        recommendations = self.engine.co_interaction_recommendations(['R0001', 'R0002', 'UNKNOWN'], top_n=4)
+
+        recipe_ids = [rec['recipe_id'] for rec in recommendations]
+        self.assertEqual(len(recipe_ids), 4)
+        self.assertTrue(all(int(recipe_id[1:]) < 10 for recipe_id in recipe_ids))
+        self.assertNotIn('R0001', recipe_ids)
+        self.assertNotIn('R0002', recipe_ids)
+        scores = [rec['similarity_score'] for rec in recommendations]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(self.engine.co_interaction_recommendations(['UNKNOWN']), [])
+
+    def test_update_and_catalog_filter(self):
+        """Test incremental updates through the engine and skipping recipes outside the catalog"""
+        version = self.engine.versions['model']
+        self.engine.update_co_interaction_model(pd.DataFrame({
+            'user_id': 'ZM000', 'recipe_id': ['R0001', 'R0099'], 'interaction_type': 'cook'
+        }))
+        self.assertGreater(self.engine.versions['model'], version)
+        self.assertIn('R0099', [rec['recipe_id'] for rec in
+                                self.engine.co_interaction_recommendations(['R0001'], top_n=20)])
+
+        self.engine.build_recipe_index([f'R{i:04d}' for i in range(20)])
+        self.assertNotIn('R0099', [rec['recipe_id'] for rec in
+                                   self.engine.co_interaction_recommendations(['R0001'], top_n=20)])
+        with self.assertRaises(ValueError):
+            HybridRecommendationEngine().co_interaction_recommendations(['R0001'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from ncf_training import InteractionVocabulary, add_negative_samples, training_batches
+
+INTERACTIONS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'data', 'raw', 'user_interactions.csv'
+)
+
+class TestInteractionStreaming(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        n_rows = 500
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, 'interactions.csv')
+        pd.DataFrame({
+            'user_id': [f'ZM{i:03d}' for i in rng.integers(0, 40, n_rows)],
+            'recipe_id': [f'RCP{i:03d}' for i in rng.integers(0, 60, n_rows)],
+            'interaction_type': rng.choice(['view', 'cook'], n_rows),
+            'timestamp': pd.date_range('2024-01-01', periods=n_rows, freq='h').strftime('%Y-%m-%dT%H:%M:%SZ')
+        }).to_csv(self.path, index=False)
+        self.vocabulary, self.stats = InteractionVocabulary.from_interactions(
+            self.path, recipe_ids=['RCP999'], chunksize=64
+        )
+        self.train_end = self.stats['last_timestamp'] - pd.Timedelta(days=3)
+
+    def test_vocabulary_is_contiguous_and_persistent(self):
+        """Test the streamed vocabulary, its stats and a save/load roundtrip"""
+        self.assertEqual(self.stats['rows'], 500)
+        self.assertEqual(self.vocabulary.recipe_ids[0], 'RCP999')
+        self.assertEqual(self.vocabulary.num_users, len(set(self.vocabulary.user_ids)))
+
+        file_path = os.path.join(self.tmp_dir.name, 'vocabulary.json')
+        self.vocabulary.save(file_path)
+        loaded = InteractionVocabulary.load(file_path)
+        self.assertEqual(list(loaded.user_ids), list(self.vocabulary.user_ids))
+        self.assertEqual(list(loaded.recipe_ids), list(self.vocabulary.recipe_ids))
+
+    def test_negative_samples(self):
+        """Test labels and shapes of negative-sampled examples"""
+        users, recipes, labels = add_negative_samples(
+            np.array([0, 1, 2]), np.array([5, 6, 7]), 60, 4, np.random.default_rng(0)
+        )
+
+        self.assertEqual(len(users), 15)
+        self.assertEqual(labels.sum(), 3)
+        np.testing.assert_array_equal(users[3:], np.repeat([0, 1, 2], 4))
+        self.assertTrue(((recipes >= 0) & (recipes < 60)).all())
+
+    def test_time_split_and_batches(self):
+        """Test that batches are bounded, split by time and cover every interaction once"""
+        train = list(training_batches(self.path, self.vocabulary, self.train_end, 'train',
+                                      negatives_per_positive=2, batch_size=50, chunksize=64))
+        validation = list(training_batches(self.path, self.vocabulary, self.train_end, 'validation',
+                                           negatives_per_positive=2, batch_size=50, chunksize=64))
+
+        self.assertTrue(all(len(labels) <= 50 for _, _, labels in train + validation))
+        positives = sum(labels.sum() for _, _, labels in train + validation)
+        self.assertEqual(positives, 500)
+        # Hourly log: the last 72 hours plus the boundary hour are held out
+        self.assertEqual(sum(labels.sum() for _, _, labels in validation), 73)
+
+        again = list(training_batches(self.path, self.vocabulary, self.train_end, 'train',
+                                      negatives_per_positive=2, batch_size=50, chunksize=64))
+        np.testing.assert_array_equal(np.concatenate([b[1] for b in again]),
+                                      np.concatenate([b[1] for b in train]))
+        with self.assertRaises(ValueError):
+            next(training_batches(self.path, self.vocabulary, self.train_end, 'test'))
+
+    def test_unknown_ids_are_skipped(self):
+        """Test that IDs missing from a resumed vocabulary are counted, not trained on"""
+        vocabulary = InteractionVocabulary(['ZM001'], self.vocabulary.recipe_ids)
+        stats = {}
+        batches = list(training_batches(INTERACTIONS_PATH, vocabulary, pd.Timestamp('2030-01-01', tz='UTC'),
+                                        stats=stats))
+
+        interactions = pd.read_csv(INTERACTIONS_PATH)
+        known = (interactions['user_id'] == 'ZM001') & interactions['recipe_id'].isin(vocabulary.recipe_ids)
+        self.assertEqual(sum(labels.sum() for _, _, labels in batches), known.sum())
+        self.assertEqual(stats['unknown'], len(interactions) - known.sum())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from recipe_catalog import RecipeCatalog, pack_mask, unpack_bitmap
+
+RECIPE_FEATURES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'data', 'processed', 'recipe_features.csv'
+)
+
+class TestBitmaps(unittest.TestCase):
+
+    def test_pack_roundtrip(self):
+        """Test packing and unpacking masks that do not fill a whole word"""
+        mask = np.random.default_rng(0).integers(0, 2, 131).astype(bool)
+
+        bitmap = pack_mask(mask)
+
+        self.assertEqual(bitmap.dtype, np.uint64)
+        self.assertEqual(len(bitmap), 3)
+        np.testing.assert_array_equal(unpack_bitmap(bitmap, len(mask)), mask)
+
+class TestRecipeCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.recipes_df = pd.read_csv(RECIPE_FEATURES_PATH)
+        self.catalog = RecipeCatalog.from_dataframe(self.recipes_df)
+
+    def test_meal_type_filter(self):
+        """Test filtering by one or several meal types"""
+        positions = self.catalog.filter(meal_types=['breakfast'])
+
+        expected = np.flatnonzero(self.recipes_df['meal_type'] == 'breakfast')
+        np.testing.assert_array_equal(positions, expected)
+
+        positions = self.catalog.filter(meal_types=['breakfast', 'lunch'])
+        expected = np.flatnonzero(self.recipes_df['meal_type'].isin(['breakfast', 'lunch']))
+        np.testing.assert_array_equal(positions, expected)
+
+    def test_combined_filters_match_dataframe_query(self):
+        """Test AND/OR combinations against the equivalent pandas query"""
+        positions = self.catalog.filter(
+            meal_types=['dinner'],
+            cultural_tags=['traditional', 'modern'],
+            cost_buckets=['high'],
+            max_preparation_time=40
+        )
+
+        df = self.recipes_df
+        expected = np.flatnonzero(
+            (df['meal_type'] == 'dinner') &
+            ((df['is_traditional'] == 1) | (df['is_modern'] == 1)) &
+            (df['cost_per_serving'] > 25) &
+            (df['preparation_time'] <= 40)
+        )
+        np.testing.assert_array_equal(positions, expected)
+
+    def test_allergen_exclusion(self):
+        """Test excluding recipes that contain an allergen"""
+        recipes_df = pd.DataFrame({
+            'id': [1, 2, 3],
+            'name': ['Nshima with Ifisashi', 'Fruit Salad with Yogurt', 'Kapenta with Nshima'],
+            'meal_type': ['dinner', 'breakfast', 'lunch'],
+            'cultural_tags': [['zambian'], ['modern'], ['zambian']],
+            'allergens': [['nuts'], ['dairy'], []],
+            'nutrition_facts': [{'calories': 450}, {'calories': 180}, {'calories': 380}]
+        })
+        catalog = RecipeCatalog.from_dataframe(recipes_df)
+
+        positions = catalog.filter(exclude_allergens=['dairy', 'nuts'])
+
+        self.assertEqual(positions.tolist(), [2])
+        self.assertEqual(catalog.to_records(positions)[0]['nutrition_facts']['calories'], 380)
+
+    def test_missing_sodium_is_not_low_sodium(self):
+        """Test that a recipe without a sodium value gets no low_sodium flag"""
+        recipes_df = pd.DataFrame({
+            'id': [1, 2, 3],
+            'meal_type': ['dinner', 'lunch', 'breakfast'],
+            'sodium': [np.nan, 500, 100]
+        })
+        catalog = RecipeCatalog.from_dataframe(recipes_df)
+
+        self.assertEqual(catalog.dietary_flags, [[], [], ['low_sodium']])
+        self.assertEqual(catalog.filter(dietary=['low_sodium']).tolist(), [2])
+
+    def test_unknown_value_matches_nothing(self):
+        """Test that an unknown required dietary flag filters everything out"""
+        self.assertEqual(len(self.catalog.filter(dietary=['vegan'])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
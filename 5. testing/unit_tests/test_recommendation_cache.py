@@ -0,0 +1,198 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import pandas as pd
+
+from unittest.mock import patch
+
+from recommendation_cache import (
+    RecommendationCache, SQLiteCacheBackend, digest_state, normalize_preferences
+)
+from recommendation_engine import ZambianMealRecommender
+
+RECIPE_FEATURES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'data', 'processed', 'recipe_features.csv'
+)
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestPreferenceFingerprint(unittest.TestCase):
+
+    def test_equivalent_preferences_share_a_key(self):
+        """Test that ordering, duplicates and defaults do not change the key"""
+        cache = RecommendationCache()
+        first = {'health_goals': ['weight_loss', 'muscle_gain'], 'budget_range': 'medium',
+                 'allergies': [], 'strict_budget': False}
+        second = {'health_goals': ['muscle_gain', 'weight_loss', 'weight_loss']}
+
+        self.assertEqual(normalize_preferences(first), normalize_preferences(second))
+        self.assertEqual(cache.key('hybrid', first), cache.key('hybrid', second))
+        self.assertNotEqual(
+            cache.key('hybrid', first), cache.key('hybrid', dict(second, budget_range='low'))
+        )
+        self.assertNotEqual(cache.key('hybrid', first, 15), cache.key('hybrid', first, 10))
+
+class CacheBehaviour:
+
+    def make_cache(self, **kwargs):
+        raise NotImplementedError
+
+    def test_lru_eviction_and_counters(self):
+        """Test that the least recently used entry is evicted at the size bound"""
+        cache = self.make_cache(max_entries=2)
+        cache.set('a', [1])
+        cache.set('b', [2])
+        self.assertEqual(cache.get('a'), [1])
+        cache.set('c', [3])
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), [3])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats['hits'], 2)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are treated as misses"""
+        clock = FakeClock()
+        cache = self.make_cache(ttl_seconds=60, clock=clock)
+        cache.set('a', {'score': 0.5})
+
+        clock.now += 59
+        self.assertEqual(cache.get('a'), {'score': 0.5})
+        clock.now += 2
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats['expired'], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_cached_values_are_copies(self):
+        """Test that mutating a returned value does not corrupt the cache"""
+        cache = self.make_cache()
+        cache.set('a', [{'score': 1.0}])
+        cache.get('a')[0]['score'] = 0.0
+
+        self.assertEqual(cache.get('a'), [{'score': 1.0}])
+
+class TestInMemoryCache(CacheBehaviour, unittest.TestCase):
+
+    def make_cache(self, **kwargs):
+        return RecommendationCache(**kwargs)
+
+class TestSQLiteCache(CacheBehaviour, unittest.TestCase):
+
+    def make_cache(self, **kwargs):
+        return RecommendationCache(backend=SQLiteCacheBackend(), **kwargs)
+
+class TestEngineResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = ZambianMealRecommender()
+        self.recommender.build_content_based_model(pd.read_csv(RECIPE_FEATURES_PATH))
+        self.cache = self.recommender.enable_result_cache(max_entries=100)
+        self.preferences = {'budget_range': 'medium', 'health_goals': ['weight_loss'],
+                            'available_time': 'medium'}
+
+    def test_repeated_requests_are_served_from_cache(self):
+        """Test that equivalent requests score the catalog only once"""
+        with patch.object(self.recommender, 'score_candidates',
+                          wraps=self.recommender.score_candidates) as score_candidates:
+            first = self.recommender.hybrid_recommendations('ZM001', self.preferences, top_n=5)
+            second = self.recommender.hybrid_recommendations(
+                'ZM002', dict(self.preferences, health_goals=['weight_loss', 'weight_loss']), top_n=5
+            )
+            self.recommender.generate_weekly_plan(self.preferences)
+            self.recommender.generate_weekly_plan(self.preferences)
+
+        self.assertEqual(first, second)
+        self.assertEqual(score_candidates.call_count, 2)
+        self.assertEqual(self.cache.stats['hits'], 2)
+        self.assertEqual(first, self.recommender.rank_hybrid_recommendations(
+            'ZM001', self.preferences, top_n=5
+        ))
+
+    def test_price_update_invalidates(self):
+        """Test that a price change is visible on the next request"""
+        before = self.recommender.hybrid_recommendations(None, self.preferences, top_n=10)
+        recipe_id = before[0]['recipe_id']
+
+        self.recommender.update_prices({recipe_id: 99.0})
+        after = self.recommender.hybrid_recommendations(None, self.preferences, top_n=10)
+
+        self.assertEqual(self.cache.stats['hits'], 0)
+        costs = {rec['recipe_id']: rec['cost_per_serving'] for rec in after}
+        self.assertNotEqual(after[0]['recipe_id'], recipe_id)
+        self.assertEqual(costs.get(recipe_id, 99.0), 99.0)
+
+    def test_shared_backend_keys_follow_content(self):
+        """Test that engines sharing a cache file only share results for the same catalog"""
+        recipe_features = pd.read_csv(RECIPE_FEATURES_PATH)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'cache.sqlite')
+            engines = []
+            for costs in (recipe_features['cost_per_serving'], recipe_features['cost_per_serving'] * 10,
+                          recipe_features['cost_per_serving']):
+                engine = ZambianMealRecommender()
+                engine.build_content_based_model(recipe_features.assign(cost_per_serving=costs))
+                engine.enable_result_cache(backend=SQLiteCacheBackend(path))
+                engines.append(engine)
+
+            first, expensive, same = [
+                engine.hybrid_recommendations(None, self.preferences, top_n=5) for engine in engines
+            ]
+            self.assertEqual(engines[1].result_cache.stats['hits'], 0)
+            self.assertEqual(expensive, engines[1].rank_hybrid_recommendations(None, self.preferences, top_n=5))
+            self.assertEqual(engines[2].result_cache.stats['hits'], 1)
+            self.assertEqual(same, first)
+
+    def test_state_hashes_are_computed_on_change_only(self):
+        """Test that keys reuse build-time hashes and follow updates, artifacts and MMR depth"""
+        key = self.recommender.result_cache_key('hybrid', self.preferences, None)
+        with patch('recommendation_engine.digest_state') as digest:
+            self.recommender.hybrid_recommendations(None, self.preferences, top_n=5)
+            self.assertEqual(self.recommender.result_cache_key('hybrid', self.preferences, None), key)
+        digest.assert_not_called()
+
+        other = ZambianMealRecommender()
+        other.build_content_based_model(pd.read_csv(RECIPE_FEATURES_PATH))
+        other.enable_result_cache()
+        self.assertEqual(other.result_cache_key('hybrid', self.preferences, None), key)
+        other.mmr_candidates = 50
+        self.assertNotEqual(other.result_cache_key('hybrid', self.preferences, None), key)
+        other.mmr_candidates = self.recommender.mmr_candidates
+
+        recipe_id = self.recommender.recipe_ids[0]
+        for engine in (self.recommender, other):
+            engine.update_prices({recipe_id: 99.0})
+        updated = self.recommender.result_cache_key('hybrid', self.preferences, None)
+        self.assertNotEqual(updated, key)
+        self.assertEqual(other.result_cache_key('hybrid', self.preferences, None), updated)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.recommender.save_content_model(tmp_dir)
+            loaded = [ZambianMealRecommender().load_content_model(tmp_dir) for _ in range(2)]
+            for engine in loaded:
+                engine.enable_result_cache()
+            self.assertEqual(*[engine.result_cache_key('hybrid', self.preferences, None) for engine in loaded])
+
+    def test_state_digest(self):
+        """Test that digests follow content, not identity or back-references"""
+        frame = pd.DataFrame({'a': [1.0, 2.0], 'tags': [['x'], []]})
+        self.assertEqual(digest_state(frame, {'b': 1, 'a': 2}), digest_state(frame.copy(), {'a': 2, 'b': 1}))
+        self.assertNotEqual(digest_state(frame), digest_state(frame.assign(a=[1.0, 2.5])))
+        self.assertNotEqual(digest_state([1]), digest_state((1,)))
+
+if __name__ == '__main__':
+    unittest.main()
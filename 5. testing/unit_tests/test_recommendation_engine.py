@@ -0,0 +1,533 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+
+from unittest.mock import patch
+
+from recommendation_engine import HybridRecommendationEngine, ZambianMealRecommender
+from model_evaluation import evaluate_similarity_precision
+from collaborative_inference import NCFScorer
+from recipe_catalog import RecipeCatalog, unpack_bitmap
+from similarity_search import top_k_indices, build_top_k_graph, quantize_scores, dequantize_scores
+from fixtures import random_recipes
+
+RECIPE_FEATURES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'data', 'processed', 'recipe_features.csv'
+)
+
+class TestTopKSelection(unittest.TestCase):
+
+    def test_matches_full_sort(self):
+        """Test partial top-k selection against a full stable sort"""
+        rng = np.random.default_rng(7)
+        scores = rng.integers(0, 5, size=(4, 50)).astype(float)
+
+        indices, top_scores = top_k_indices(scores, 6)
+
+        for row in range(scores.shape[0]):
+            expected = sorted(enumerate(scores[row]), key=lambda x: x[1], reverse=True)[:6]
+            self.assertEqual(indices[row].tolist(), [i for i, _ in expected])
+            self.assertEqual(top_scores[row].tolist(), [s for _, s in expected])
+
+    def test_excluded_column_is_skipped(self):
+        """Test that the excluded column never appears in the result"""
+        scores = np.array([[1.0, 0.9, 0.8], [0.2, 1.0, 0.5]])
+
+        indices, _ = top_k_indices(scores, 5, exclude=[0, 1])
+
+        self.assertEqual(indices.tolist(), [[1, 2], [2, 0]])
+
+class TestContentBasedRecommendations(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = HybridRecommendationEngine()
+        self.recipe_features = pd.read_csv(RECIPE_FEATURES_PATH)
+        self.engine.build_content_based_model(self.recipe_features)
+
+    def test_single_recommendations_exclude_seed(self):
+        """Test that a recipe is not recommended as similar to itself"""
+        recommendations = self.engine.content_based_recommendations('RCP001', top_n=5)
+
+        self.assertEqual(len(recommendations), 5)
+        self.assertNotIn('RCP001', [rec['recipe_id'] for rec in recommendations])
+        scores = [rec['similarity_score'] for rec in recommendations]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_batch_matches_single_queries(self):
+        """Test that the batched API returns the same rows as single queries"""
+        seeds = ['RCP001', 'RCP006', 'RCP010']
+
+        neighbour_ids, scores = self.engine.batch_content_based_recommendations(seeds, top_n=4)
+
+        self.assertEqual(neighbour_ids.shape, (3, 4))
+        for row, seed in enumerate(seeds):
+            single = self.engine.content_based_recommendations(seed, top_n=4)
+            self.assertEqual(neighbour_ids[row].tolist(), [rec['recipe_id'] for rec in single])
+            np.testing.assert_allclose(scores[row], [rec['similarity_score'] for rec in single])
+
+    def test_unknown_recipe_id_raises(self):
+        """Test that unknown recipe IDs give a clear error"""
+        with self.assertRaises(ValueError) as context:
+            self.engine.content_based_recommendations('RCP999')
+
+        self.assertIn('RCP999', str(context.exception))
+
+    def test_non_range_index(self):
+        """Test lookups when the DataFrame index is not 0..N-1"""
+        shuffled = self.recipe_features.sample(frac=1, random_state=3)
+        shuffled.index = shuffled.index + 100
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(shuffled)
+
+        expected = self.engine.content_based_recommendations('RCP004', top_n=3)
+        actual = engine.content_based_recommendations('RCP004', top_n=3)
+
+        self.assertEqual(
+            sorted(rec['recipe_id'] for rec in actual),
+            sorted(rec['recipe_id'] for rec in expected)
+        )
+
+class TestDenseFreeSimilarity(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(300, seed=11)
+        self.dense_engine = HybridRecommendationEngine()
+        self.dense_engine.build_content_based_model(self.recipe_features)
+        self.seeds = ['R0000', 'R0150', 'R0299']
+
+    def assert_matches_dense(self, engine, top_n):
+        expected_ids, expected_scores = self.dense_engine.batch_content_based_recommendations(
+            self.seeds, top_n=top_n
+        )
+        actual_ids, actual_scores = engine.batch_content_based_recommendations(
+            self.seeds, top_n=top_n
+        )
+        np.testing.assert_allclose(actual_scores, expected_scores, atol=1e-12)
+        self.assertEqual(actual_ids.tolist(), expected_ids.tolist())
+
+    def test_blocked_mode_matches_dense(self):
+        """Test blocked on-demand scoring against the dense matrix"""
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(self.recipe_features, similarity_mode='blocked', block_size=64)
+
+        self.assertIsNone(engine.content_similarity_matrix)
+        self.assert_matches_dense(engine, top_n=10)
+
+    def test_top_k_mode_matches_dense(self):
+        """Test precomputed CSR neighbour lists against the dense matrix"""
+        engine = HybridRecommendationEngine()
+        neighbours = engine.build_content_based_model(
+            self.recipe_features, similarity_mode='top_k', top_k_neighbours=20, block_size=64
+        )
+
+        self.assertEqual(neighbours.nnz, len(self.recipe_features) * 20)
+        self.assert_matches_dense(engine, top_n=10)
+        # Requests deeper than the stored lists fall back to blocked scoring
+        self.assert_matches_dense(engine, top_n=40)
+
+class TestIncrementalUpdates(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(300, seed=5)
+
+    def build_engine(self, similarity_mode):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(
+            self.recipe_features, similarity_mode=similarity_mode, top_k_neighbours=15, block_size=64
+        )
+        engine.rescale_threshold = np.inf
+        return engine
+
+    def apply_edits(self, engine):
+        added = random_recipes(12, seed=6, start=300)
+        self.assertEqual(engine.add_recipes(added), 'incremental')
+        edited = pd.DataFrame({
+            'recipe_id': ['R0003', 'R0100', 'R0305'],
+            'calories': [650, 180, 420],
+            'is_vegetarian': [1, 0, 1]
+        })
+        self.assertEqual(engine.update_recipes(edited), 'incremental')
+        self.assertEqual(engine.remove_recipes(['R0000', 'R0150', 'R0301']), 'incremental')
+
+    def assert_features_current(self, engine):
+        raw = engine.recipe_features[engine.content_feature_columns].to_numpy(dtype=float)
+        scaled = engine.scaler.transform(raw)
+        expected = scaled / np.linalg.norm(scaled, axis=1, keepdims=True)
+        np.testing.assert_allclose(engine.content_features, expected, atol=1e-6)
+        self.assertEqual(engine.recipe_ids.tolist(), engine.recipe_features['recipe_id'].tolist())
+
+    def test_top_k_graph_matches_rebuild(self):
+        """Test that patched neighbour lists equal a rebuild over the same features"""
+        engine = self.build_engine('top_k')
+        self.apply_edits(engine)
+
+        self.assert_features_current(engine)
+        expected = build_top_k_graph(engine.content_features, 15)
+        k = engine.content_neighbours_k()
+        self.assertEqual(k, 15)
+        self.assertEqual(engine.content_neighbours.nnz, len(engine.recipe_ids) * 15)
+        np.testing.assert_array_equal(
+            engine.content_neighbours.indices.reshape(-1, k), expected.indices.reshape(-1, k)
+        )
+        np.testing.assert_allclose(engine.content_neighbours.data, expected.data, atol=1e-12)
+
+    def test_dense_matrix_matches_rebuild(self):
+        """Test that patched similarity rows and columns equal a full recomputation"""
+        engine = self.build_engine('dense')
+        self.apply_edits(engine)
+
+        self.assert_features_current(engine)
+        np.testing.assert_allclose(
+            engine.content_similarity_matrix,
+            engine.content_features @ engine.content_features.T,
+            atol=1e-12
+        )
+
+    def test_catalog_matches_rebuild(self):
+        """Test that catalog rows and bitmaps follow the edits"""
+        engine = self.build_engine('blocked')
+        self.apply_edits(engine)
+
+        catalog = engine.recipe_catalog
+        expected = RecipeCatalog.from_dataframe(engine.recipe_features)
+        self.assertEqual(catalog.recipe_ids.tolist(), expected.recipe_ids.tolist())
+        np.testing.assert_array_equal(catalog.columns['calories'], expected.columns['calories'])
+        for field in RecipeCatalog.INDEXED_FIELDS:
+            for value in set(catalog.bitmaps[field]) | set(expected.bitmaps[field]):
+                np.testing.assert_array_equal(
+                    unpack_bitmap(catalog.bitmap(field, value), catalog.size),
+                    unpack_bitmap(expected.bitmap(field, value), expected.size)
+                )
+        self.assertIn('R0003', catalog.recipe_ids[catalog.filter(dietary=['vegetarian'])])
+
+    def test_feature_drift_triggers_rebuild(self):
+        """Test that a batch that shifts the feature statistics refits the scaler"""
+        engine = self.build_engine('top_k')
+        engine.rescale_threshold = 0.1
+        outliers = random_recipes(100, seed=7, start=300)
+        outliers['calories'] = 5000
+
+        self.assertEqual(engine.add_recipes(outliers), 'rebuild')
+        self.assertGreater(engine.scaler.mean_[engine.content_feature_columns.index('calories')], 1000)
+        self.assertEqual(engine.content_neighbours.nnz, 400 * 15)
+
+    def test_invalid_edits_raise(self):
+        """Test that duplicate additions and unknown IDs are rejected without side effects"""
+        engine = self.build_engine('top_k')
+
+        with self.assertRaises(ValueError):
+            engine.add_recipes(self.recipe_features.iloc[:2])
+        with self.assertRaises(ValueError):
+            engine.update_recipes([{'recipe_id': 'R9999', 'calories': 100}])
+        with self.assertRaises(ValueError):
+            engine.remove_recipes(['R9999'])
+        self.assertEqual(len(engine.recipe_ids), 300)
+
+class TestContentModelArtifact(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(200, seed=8)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.seeds = ['R0001', 'R0042', 'R0199']
+
+    def roundtrip(self, similarity_mode, **kwargs):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(
+            self.recipe_features, similarity_mode=similarity_mode, top_k_neighbours=12
+        )
+        engine.save_content_model(self.tmp_dir.name)
+        loaded = HybridRecommendationEngine().load_content_model(self.tmp_dir.name, **kwargs)
+        return engine, loaded
+
+    def assert_same_recommendations(self, expected, actual, top_n=8):
+        expected_ids, expected_scores = expected.batch_content_based_recommendations(self.seeds, top_n)
+        actual_ids, actual_scores = actual.batch_content_based_recommendations(self.seeds, top_n)
+        self.assertEqual(actual_ids.tolist(), expected_ids.tolist())
+        np.testing.assert_allclose(actual_scores, expected_scores)
+
+    def test_modes_roundtrip_memory_mapped(self):
+        """Test that every similarity mode reloads as memory maps with identical results"""
+        for similarity_mode in ('dense', 'blocked', 'top_k'):
+            with self.subTest(similarity_mode=similarity_mode):
+                engine, loaded = self.roundtrip(similarity_mode)
+
+                self.assertIsInstance(loaded.content_features, np.memmap)
+                self.assertEqual(loaded.similarity_mode, similarity_mode)
+                self.assert_same_recommendations(engine, loaded)
+                np.testing.assert_allclose(loaded.scaler.mean_, engine.scaler.mean_)
+
+    def test_top_k_graph_is_not_copied(self):
+        """Test that the CSR neighbour lists are views over the mapped files"""
+        _, loaded = self.roundtrip('top_k')
+
+        for array in (loaded.content_neighbours.data, loaded.content_neighbours.indices):
+            while not isinstance(array, np.memmap):
+                self.assertIsNotNone(array.base)
+                array = array.base
+
+    def test_loaded_model_scores_and_updates(self):
+        """Test hybrid scoring and incremental updates on a read-only loaded model"""
+        engine, loaded = self.roundtrip('top_k')
+        preferences = {'budget_range': 'low', 'preferred_recipes': ['R0005']}
+
+        self.assertEqual(
+            loaded.hybrid_recommendations(None, preferences),
+            engine.hybrid_recommendations(None, preferences)
+        )
+        loaded.rescale_threshold = np.inf
+        self.assertEqual(loaded.update_recipes([{'recipe_id': 'R0042', 'calories': 690}]), 'incremental')
+        self.assertEqual(loaded.recipe_catalog.columns['calories'][42], 690)
+
+    def test_missing_artifact_raises(self):
+        """Test that loading from an empty directory fails clearly"""
+        with self.assertRaises(ValueError):
+            HybridRecommendationEngine().load_content_model(self.tmp_dir.name)
+
+class TestReducedPrecision(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(400, seed=9)
+        self.seeds = ['R0001', 'R0042', 'R0399']
+
+    def build_engine(self, similarity_mode, **kwargs):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(
+            self.recipe_features, similarity_mode=similarity_mode, top_k_neighbours=20, **kwargs
+        )
+        return engine
+
+    def test_quantized_scores_roundtrip(self):
+        """Test the float16 and int8 score encodings and their error bounds"""
+        scores = np.random.default_rng(2).uniform(-1, 1, (50, 20))
+
+        self.assertIs(quantize_scores(scores, None), scores)
+        for quantization, tolerance in (('float16', 1e-3), ('int8', 0.5 / 127)):
+            with self.subTest(quantization=quantization):
+                encoded = quantize_scores(scores, quantization)
+                decoded = dequantize_scores(encoded, quantization)
+
+                self.assertEqual(decoded.dtype, np.float32)
+                np.testing.assert_allclose(decoded, scores, atol=tolerance + 1e-7)
+        self.assertEqual(quantize_scores(scores, 'int8').dtype, np.int8)
+        with self.assertRaises(ValueError):
+            quantize_scores(scores, 'int4')
+
+    def test_precision_settings_shrink_the_model(self):
+        """Test stored dtypes and memory for each precision setting"""
+        baseline = self.build_engine('top_k', precision='float64')
+        single = self.build_engine('top_k')
+        quantized = self.build_engine('top_k', score_quantization='int8')
+
+        self.assertEqual(baseline.content_features.dtype, np.float64)
+        self.assertEqual(single.content_features.dtype, np.float32)
+        self.assertEqual(quantized.content_neighbours.data.dtype, np.int8)
+        self.assertLess(single.content_model_nbytes(), baseline.content_model_nbytes())
+        self.assertLess(quantized.content_model_nbytes(), single.content_model_nbytes())
+        with self.assertRaises(ValueError):
+            self.build_engine('top_k', precision='float16')
+
+    def test_quantized_model_recommendations(self):
+        """Test that quantized models keep the float64 neighbours and survive save, load and updates"""
+        expected_ids, expected_scores = self.build_engine('dense', precision='float64') \
+            .batch_content_based_recommendations(self.seeds, top_n=5)
+
+        for similarity_mode in ('dense', 'top_k'):
+            with self.subTest(similarity_mode=similarity_mode):
+                engine = self.build_engine(similarity_mode, score_quantization='float16')
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    engine.save_content_model(tmp_dir)
+                    loaded = HybridRecommendationEngine().load_content_model(tmp_dir)
+                    neighbour_ids, scores = loaded.batch_content_based_recommendations(self.seeds, top_n=5)
+
+                    self.assertEqual(loaded.score_quantization, 'float16')
+                    self.assertEqual(
+                        [set(row) for row in neighbour_ids.tolist()],
+                        [set(row) for row in expected_ids.tolist()]
+                    )
+                    np.testing.assert_allclose(scores, expected_scores, atol=1e-3)
+
+                    loaded.rescale_threshold = np.inf
+                    self.assertEqual(loaded.update_recipes([{'recipe_id': 'R0042', 'calories': 690}]),
+                                     'incremental')
+                    self.assertEqual(loaded.batch_content_based_recommendations(['R0042'], top_n=5)[1].shape,
+                                     (1, 5))
+
+    def test_precision_report(self):
+        """Test the top-k overlap report against the float64 baseline"""
+        report = evaluate_similarity_precision(self.recipe_features, k=5, top_k_neighbours=20,
+                                               sample_size=50)
+
+        self.assertEqual(report['configuration'].tolist(),
+                         ['float64', 'float32', 'float32 + float16 scores', 'float32 + int8 scores'])
+        self.assertTrue((report['mean_overlap@k'] >= 0.9).all())
+        self.assertEqual(report['mean_overlap@k'][1], 1.0)
+        self.assertTrue(report['memory_ratio'].is_monotonic_decreasing)
+        self.assertLess(report['max_score_error'].iloc[-1], 0.01)
+
+class TestVectorizedScoring(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        n_recipes = 400
+        self.recipe_features = pd.DataFrame({
+            'recipe_id': np.arange(n_recipes),
+            'name': [f'Recipe {i}' for i in range(n_recipes)],
+            'meal_type': rng.choice(['breakfast', 'lunch', 'dinner'], n_recipes),
+            'preparation_time': rng.integers(5, 90, n_recipes),
+            'cost_per_serving': rng.choice([10, 15, 20, 25, 30, 60], n_recipes),
+            'calories': rng.choice([300, 400, 500, 600, 700], n_recipes),
+            'protein': rng.choice([10, 15, 20, 25, 30], n_recipes),
+            'carbs': rng.choice([20, 30, 40, 50, 60, 70], n_recipes),
+            'fats': rng.choice([10, 20, 30, 40, 50], n_recipes),
+            'fiber': rng.choice([2, 3, 5, 8], n_recipes),
+            'sugar': rng.choice([5, 10, 15], n_recipes),
+            'is_traditional': rng.integers(0, 2, n_recipes),
+            'is_zambian': rng.integers(0, 2, n_recipes)
+        })
+        self.engine = HybridRecommendationEngine()
+        self.engine.build_content_based_model(self.recipe_features)
+        self.records = self.engine.recipe_catalog.to_records(range(n_recipes))
+
+    def test_vectorized_scores_match_scalar(self):
+        """Test that array kernels reproduce the scalar scores exactly"""
+        goal_sets = [[], ['weight_loss'], ['muscle_gain', 'diabetes_management'],
+                     ['weight_loss', 'muscle_gain', 'diabetes_management', 'general_health']]
+
+        for budget in ['low', 'medium', 'high', 'unknown']:
+            for available_time in ['low', 'medium', 'high']:
+                for health_goals in goal_sets:
+                    user_preferences = {
+                        'budget_range': budget,
+                        'available_time': available_time,
+                        'health_goals': health_goals
+                    }
+                    recipe_scores = self.engine.calculate_recipe_scores(user_preferences)
+                    nutrition_scores = self.engine.calculate_nutrition_scores(user_preferences)
+
+                    self.assertEqual(recipe_scores.tolist(), [
+                        self.engine.calculate_recipe_score(recipe, user_preferences)
+                        for recipe in self.records
+                    ])
+                    self.assertEqual(nutrition_scores.tolist(), [
+                        self.engine.calculate_nutrition_score(recipe, user_preferences)
+                        for recipe in self.records
+                    ])
+
+    def test_hybrid_recommendations_rank_constrained_recipes(self):
+        """Test that hybrid recommendations match a scalar score-and-sort"""
+        user_preferences = {
+            'health_goals': ['weight_loss'],
+            'budget_range': 'medium',
+            'meal_type': 'lunch'
+        }
+
+        recommendations = self.engine.hybrid_recommendations(1, user_preferences, top_n=10)
+
+        lunches = [recipe for recipe in self.records if recipe['meal_type'] == 'lunch']
+        expected = sorted(
+            lunches,
+            key=lambda recipe: self.engine.calculate_recipe_score(recipe, user_preferences),
+            reverse=True
+        )[:10]
+        self.assertEqual(
+            [rec['recipe_id'] for rec in recommendations],
+            [recipe['id'] for recipe in expected]
+        )
+
+    def test_collaborative_component_reranks(self):
+        """Test that NCF predictions are blended into hybrid scores"""
+        user_preferences = {'health_goals': [], 'budget_range': 'high', 'available_time': 'high'}
+        n_recipes = len(self.recipe_features)
+        rng = np.random.default_rng(1)
+        # A one-layer "network" whose output is driven by the recipe embedding
+        scorer = NCFScorer(
+            user_embeddings=np.ones((1, 1)),
+            recipe_embeddings=rng.normal(size=(n_recipes, 1)),
+            dense_layers=[(np.array([[0.0], [5.0]]), np.zeros(1), 'sigmoid')],
+            user_ids=['ZM001'],
+            recipe_ids=self.recipe_features['recipe_id'].to_numpy()
+        )
+        self.engine.collaborative_scorer = scorer
+
+        recommendations = self.engine.hybrid_recommendations('ZM001', user_preferences, top_n=5)
+
+        base = self.engine.calculate_recipe_scores(user_preferences)
+        collaborative = scorer.score_users([0])[0]
+        expected = base + self.engine.hybrid_weights['collaborative'] * collaborative
+        self.assertEqual(
+            [rec['recipe_id'] for rec in recommendations],
+            np.argsort(-expected, kind='stable')[:5].tolist()
+        )
+
+        # Unknown users fall back to the non-collaborative ranking
+        anonymous = self.engine.hybrid_recommendations('ZM999', user_preferences, top_n=5)
+        self.assertEqual([rec['score'] for rec in anonymous], sorted(base, reverse=True)[:5])
+
+class TestWeeklyPlanning(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(120, seed=9, id_width=3, cycle_meals=True)
+        self.recommender = ZambianMealRecommender()
+        self.recommender.build_content_based_model(self.recipe_features)
+        self.user_preferences = {'health_goals': ['weight_loss'], 'budget_range': 'medium'}
+
+    def test_plan_is_scored_once(self):
+        """Test that a weekly plan costs a single scoring pass"""
+        with patch.object(self.recommender, 'calculate_recipe_scores',
+                          wraps=self.recommender.calculate_recipe_scores) as scorer:
+            weekly_plan = self.recommender.generate_weekly_plan(self.user_preferences)
+
+        self.assertEqual(scorer.call_count, 1)
+        self.assertEqual(list(weekly_plan), ZambianMealRecommender.DAYS)
+        for day_plan in weekly_plan.values():
+            self.assertEqual(list(day_plan), ['breakfast', 'lunch', 'dinner'])
+
+    def test_meals_respect_filters_and_do_not_repeat(self):
+        """Test meal filters, weekly no-repeat and same-day diversity"""
+        weekly_plan = self.recommender.generate_weekly_plan(self.user_preferences)
+        features = self.recipe_features.set_index('recipe_id')
+
+        seen = {meal: [] for meal in ZambianMealRecommender.MEAL_FILTERS}
+        for day_plan in weekly_plan.values():
+            day_ids = [rec['recipe_id'] for options in day_plan.values() for rec in options]
+            self.assertEqual(len(day_ids), len(set(day_ids)))
+
+            for meal, options in day_plan.items():
+                for rec in options:
+                    self.assertEqual(rec['meal_type'], meal)
+                    seen[meal].append(rec['recipe_id'])
+
+            for rec in day_plan['breakfast']:
+                recipe = features.loc[rec['recipe_id']]
+                self.assertLessEqual(recipe['preparation_time'], 20)
+                self.assertTrue(recipe['is_zambian'] or recipe['is_quick'])
+
+        for meal, recipe_ids in seen.items():
+            distinct = len(set(recipe_ids))
+            # Repeats only once the meal's pool has been used up
+            pool_size = len(self.recommender.constrained_positions(
+                self.user_preferences, ZambianMealRecommender.MEAL_FILTERS[meal]
+            ))
+            self.assertEqual(distinct, min(len(recipe_ids), pool_size))
+
+    def test_single_meal_matches_plan_ranking(self):
+        """Test that the first day of the plan equals the per-meal top 3"""
+        weekly_plan = self.recommender.generate_weekly_plan(self.user_preferences)
+
+        self.assertEqual(
+            [rec['recipe_id'] for rec in weekly_plan['monday']['dinner']],
+            [rec['recipe_id'] for rec in self.recommender.recommend_dinner(self.user_preferences)]
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+
+from collaborative_inference import NCFScorer
+from recommendation_engine import ZambianMealRecommender
+from recommendation_service import MicroBatcher, RecommendationService
+from fixtures import random_recipes
+
+def build_recommender(n_recipes=300, n_users=20, seed=4):
+    recipe_features = random_recipes(n_recipes, seed, flags=('is_traditional',))
+    rng = np.random.default_rng(seed)
+    recommender = ZambianMealRecommender()
+    recommender.build_content_based_model(recipe_features)
+    recommender.collaborative_scorer = NCFScorer(
+        rng.normal(size=(n_users, 8)),
+        rng.normal(size=(n_recipes, 8)),
+        [(rng.normal(size=(16, 8)), rng.normal(size=8), 'relu'),
+         (rng.normal(size=(8, 1)), rng.normal(size=1), 'sigmoid')],
+        user_ids=[f'ZM{i:03d}' for i in range(n_users)],
+        recipe_ids=recipe_features['recipe_id']
+    )
+    return recommender
+
+REQUESTS = [
+    {'user_id': 'ZM001', 'user_preferences': {'budget_range': 'low', 'health_goals': ['weight_loss']}},
+    {'user_id': 'ZM007', 'user_preferences': {'preferred_recipes': ['R0010', 'R0200']}, 'top_n': 5},
+    {'user_id': 'UNKNOWN', 'user_preferences': {'available_time': 'low'},
+     'filters': {'meal_type': 'dinner'}},
+    {'user_id': None, 'user_preferences': {'dietary_restrictions': ['vegan']}, 'top_n': 3}
+]
+
+class TestBatchHybridRecommendations(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = build_recommender()
+
+    def assert_matches_single_requests(self, results):
+        for request, result in zip(REQUESTS, results):
+            expected = self.recommender.hybrid_recommendations(
+                request['user_id'], request['user_preferences'],
+                top_n=request.get('top_n', 15), filters=request.get('filters')
+            )
+            self.assertEqual([rec['recipe_id'] for rec in result],
+                             [rec['recipe_id'] for rec in expected])
+            np.testing.assert_allclose([rec['score'] for rec in result],
+                                       [rec['score'] for rec in expected], rtol=1e-6)
+
+    def test_batch_matches_single_requests(self):
+        """Test that one batched pass returns what separate calls return"""
+        results = self.recommender.batch_hybrid_recommendations(REQUESTS)
+
+        self.assertEqual(len(results), len(REQUESTS))
+        self.assertEqual(results[3], [])  # no recipe carries a vegan flag
+        self.assert_matches_single_requests(results)
+
+    def test_batch_uses_result_cache(self):
+        """Test that cached requests are skipped and misses are stored"""
+        cache = self.recommender.enable_result_cache()
+        self.recommender.batch_hybrid_recommendations(REQUESTS[:2])
+        results = self.recommender.batch_hybrid_recommendations(REQUESTS)
+
+        self.assertEqual(cache.stats['hits'], 2)
+        self.assert_matches_single_requests(results)
+
+    def test_batch_within_deadline(self):
+        """Test tier metadata of a batch scored in time and of one that is not"""
+        responses = self.recommender.batch_hybrid_recommendations_within_deadline(REQUESTS, 5000)
+        self.assertEqual([response['tier'] for response in responses], ['hybrid', 'hybrid', 'content', 'content'])
+        self.assert_matches_single_requests([response['recommendations'] for response in responses])
+
+        self.recommender.score_hybrid_batch = lambda requests: time.sleep(0.3)
+        start = time.perf_counter()
+        responses = self.recommender.batch_hybrid_recommendations_within_deadline(REQUESTS, 30)
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual({response['tier'] for response in responses}, {'popular'})
+        self.assertEqual([len(response['recommendations']) for response in responses], [15, 5, 15, 0])
+        self.assertEqual({rec['meal_type'] for rec in responses[2]['recommendations']}, {'dinner'})
+        self.assertEqual(self.recommender.tier_latency['hybrid'].counts['batch']['timeouts'], 1)
+        time.sleep(0.35)
+
+class TestBatchWeeklyPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.recommender = build_recommender()
+        self.requests = [
+            {'user_id': request['user_id'], 'user_preferences': request['user_preferences'],
+             'options_per_meal': 2 + i % 2}
+            for i, request in enumerate(REQUESTS)
+        ]
+        self.requests.append({'user_id': 'ZM003', 'user_preferences': {'budget_range': 'medium'},
+                              'diversity': 0.5})
+
+    def test_batch_matches_single_plans(self):
+        """Test that one batched pass plans what separate calls plan"""
+        cache = self.recommender.enable_result_cache()
+        plans = self.recommender.batch_weekly_plans(self.requests)
+
+        self.assertEqual(len(plans), len(self.requests))
+        for request, plan in zip(self.requests, plans):
+            expected = self.recommender.build_weekly_plan(
+                request['user_preferences'], user_id=request['user_id'],
+                options_per_meal=request.get('options_per_meal', 3),
+                diversity=request.get('diversity', 0.0)
+            )
+            self.assertEqual(list(plan), ZambianMealRecommender.DAYS)
+            for day in ZambianMealRecommender.DAYS:
+                for meal in expected[day]:
+                    self.assertEqual([rec['recipe_id'] for rec in plan[day][meal]],
+                                     [rec['recipe_id'] for rec in expected[day][meal]])
+
+        self.assertEqual(self.recommender.batch_weekly_plans(self.requests), plans)
+        self.assertEqual(cache.stats['hits'], len(self.requests))
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_share_batches(self):
+        """Test that requests arriving together are processed as one batch"""
+        batches = []
+
+        def process(payloads):
+            batches.append(len(payloads))
+            return [payload * 2 for payload in payloads]
+
+        async def scenario():
+            batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+            await batcher.stop()
+            return results, batcher.metrics()
+
+        results, metrics = asyncio.run(scenario())
+
+        self.assertEqual(results, [i * 2 for i in range(20)])
+        self.assertEqual(batches, [8, 8, 4])
+        self.assertEqual(metrics['max_batch_size'], 8)
+        self.assertEqual(metrics['completed'], 20)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_deadline_and_queue_limits(self):
+        """Test that slow batches time out callers and full queues reject requests"""
+        def slow(payloads):
+            time.sleep(0.05)
+            return payloads
+
+        async def scenario():
+            batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+            outcomes = await asyncio.gather(
+                *(batcher.submit(i, deadline_ms=20) for i in range(4)), return_exceptions=True
+            )
+            await batcher.stop()
+            return outcomes, batcher.metrics()
+
+        outcomes, metrics = asyncio.run(scenario())
+
+        self.assertTrue(all(isinstance(outcome, (asyncio.TimeoutError, asyncio.QueueFull))
+                            for outcome in outcomes))
+        self.assertEqual(metrics['rejected'], 2)
+        self.assertEqual(metrics['timeouts'], 2)
+
+class TestRecommendationService(unittest.TestCase):
+
+    def test_concurrent_service_calls(self):
+        """Test batched service results and per-request error isolation"""
+        recommender = build_recommender()
+        service = RecommendationService(recommender, max_wait_ms=10)
+        requests = REQUESTS + [{'user_id': 'ZM002', 'user_preferences': {'preferred_recipes': ['R9999']}}]
+
+        async def scenario():
+            outcomes = await asyncio.gather(
+                *(service.recommend(request['user_id'], request['user_preferences'],
+                                    top_n=request.get('top_n', 15), filters=request.get('filters'))
+                  for request in requests),
+                service.weekly_plan('ZM001', {'budget_range': 'medium'}),
+                return_exceptions=True
+            )
+            await service.stop()
+            return outcomes
+
+        outcomes = asyncio.run(scenario())
+
+        self.assertIsInstance(outcomes[len(REQUESTS)], ValueError)
+        expected = recommender.hybrid_recommendations('ZM001', REQUESTS[0]['user_preferences'])
+        self.assertEqual(outcomes[0]['tier'], 'hybrid')
+        self.assertEqual([rec['recipe_id'] for rec in outcomes[0]['recommendations']],
+                         [rec['recipe_id'] for rec in expected])
+        self.assertEqual(outcomes[-1]['tier'], 'hybrid')
+        self.assertEqual(set(outcomes[-1]['weekly_plan']), set(ZambianMealRecommender.DAYS))
+        self.assertEqual(service.metrics()['recommendations']['batches'], 1)
+
+    def test_explicit_zero_deadline_is_kept(self):
+        """Test that deadline_ms=0 is not replaced by the default deadline"""
+        service = RecommendationService(build_recommender(), max_wait_ms=5, default_deadline_ms=5000)
+
+        async def scenario():
+            try:
+                return await asyncio.gather(service.recommend('ZM001', {}, deadline_ms=0),
+                                            return_exceptions=True)
+            finally:
+                await service.stop()
+
+        outcome, = asyncio.run(scenario())
+        self.assertIsInstance(outcome, asyncio.TimeoutError)
+
+    def test_slow_batches_degrade_instead_of_timing_out(self):
+        """Test that a request deadline reaches the recommender's fallback tiers"""
+        recommender = build_recommender()
+        recommender.score_hybrid_batch = lambda requests: time.sleep(0.5)
+        recommender.score_weekly_plan_batch = lambda requests: time.sleep(0.5)
+        service = RecommendationService(recommender, max_wait_ms=5)
+
+        async def scenario():
+            outcomes = await asyncio.gather(
+                service.recommend('ZM001', {'budget_range': 'low'}, top_n=5, deadline_ms=100),
+                service.weekly_plan('ZM002', {'budget_range': 'medium'}, deadline_ms=100),
+                return_exceptions=True
+            )
+            await service.stop()
+            return outcomes
+
+        recommendations, weekly_plan = asyncio.run(scenario())
+
+        self.assertEqual(recommendations['tier'], 'popular')
+        self.assertEqual(len(recommendations['recommendations']), 5)
+        self.assertEqual(weekly_plan['tier'], 'popular')
+        self.assertEqual(set(weekly_plan['weekly_plan']), set(ZambianMealRecommender.DAYS))
+        self.assertEqual(service.metrics()['recommendations']['timeouts'], 0)
+        time.sleep(0.5)
+
+if __name__ == '__main__':
+    unittest.main()
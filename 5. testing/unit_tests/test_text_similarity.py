@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '3. AI_ML_modules', 'meal_recommendation'
+))
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from recommendation_engine import HybridRecommendationEngine
+from similarity_search import blended_top_k, top_k_indices
+from text_similarity import RecipeTextIndex, recipe_text
+from fixtures import random_recipes
+
+class TestBlendedTopK(unittest.TestCase):
+
+    def test_sparse_channel_matches_dense_scores(self):
+        """Test blended block scoring against the full dense score matrix"""
+        rng = np.random.default_rng(3)
+        dense = rng.normal(size=(120, 6))
+        sparse = csr_matrix(rng.random((120, 40)) * (rng.random((120, 40)) < 0.1))
+        queries = np.array([0, 17, 119])
+
+        expected_scores = 0.7 * dense[queries] @ dense.T + 0.3 * (sparse[queries] @ sparse.T).toarray()
+        expected = top_k_indices(expected_scores, 10, exclude=queries)
+        actual = blended_top_k(
+            [(0.7, dense[queries], dense), (0.3, sparse[queries], sparse)],
+            10, exclude=queries, block_size=32
+        )
+
+        np.testing.assert_array_equal(actual[0], expected[0])
+        np.testing.assert_allclose(actual[1], expected[1])
+
+class TestRecipeTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(250, seed=12, text=True)
+        self.index = RecipeTextIndex().fit(self.recipe_features)
+
+    def test_recipe_text_flattens_ingredients(self):
+        """Test the text document built from names and ingredient lists"""
+        frame = pd.DataFrame({'name': ['Ifisashi'], 'ingredients': [[{'name': 'Rape Leaves'}, 'groundnuts']]})
+
+        self.assertEqual(recipe_text(frame).tolist(), ['Ifisashi Rape Leaves groundnuts'])
+
+    def test_updates_keep_the_fitted_vocabulary(self):
+        """Test that edits and new recipes are vectorized without a refit"""
+        vocabulary = dict(self.index.vectorizer.vocabulary_)
+        added = random_recipes(5, seed=13, start=250, text=True)
+        added.loc[0, 'name'] = 'Chikanda'  # unseen term
+        recipe_features = pd.concat([self.recipe_features.drop(index=[3, 40]), added], ignore_index=True)
+        recipe_features.loc[10, 'ingredients'] = [{'name': 'okra'}]
+
+        self.index.update(recipe_features, changed=[10], removed=[3, 40])
+
+        self.assertEqual(self.index.vectorizer.vocabulary_, vocabulary)
+        self.assertEqual(self.index.size, len(recipe_features))
+        expected = self.index.transform(recipe_features)
+        self.assertEqual((self.index.matrix != expected).nnz, 0)
+
+    def test_save_and_load_memory_mapped(self):
+        """Test that a saved index reloads as memory maps with the same vectors"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.index.save(tmp_dir)
+            loaded = RecipeTextIndex.load(tmp_dir)
+
+            array = loaded.matrix.data
+            while not isinstance(array, np.memmap):
+                self.assertIsNotNone(array.base)
+                array = array.base
+            self.assertEqual((loaded.matrix != self.index.matrix).nnz, 0)
+            new_rows = random_recipes(3, seed=14, start=300, text=True)
+            self.assertEqual((loaded.transform(new_rows) != self.index.transform(new_rows)).nnz, 0)
+
+class TestTextChannel(unittest.TestCase):
+
+    def setUp(self):
+        self.recipe_features = random_recipes(250, seed=12, text=True)
+        self.seeds = ['R0000', 'R0100', 'R0249']
+
+    def build_engine(self, similarity_mode='top_k', text_weight=0.4):
+        engine = HybridRecommendationEngine()
+        engine.build_content_based_model(self.recipe_features, similarity_mode=similarity_mode,
+                                         top_k_neighbours=20, block_size=64)
+        engine.build_text_model(text_weight=text_weight)
+        return engine
+
+    def expected_neighbours(self, engine, top_n):
+        positions = engine.get_recipe_positions(self.seeds)
+        features = engine.content_features
+        text = engine.text_index.matrix
+        scores = ((1 - engine.text_weight) * features[positions] @ features.T
+                  + engine.text_weight * (text[positions] @ text.T).toarray())
+        neighbour_idx, neighbour_scores = top_k_indices(scores, top_n, exclude=positions)
+        return engine.recipe_ids[neighbour_idx], neighbour_scores
+
+    def test_blend_matches_brute_force_in_every_mode(self):
+        """Test blended neighbours against a dense blend of both channels"""
+        for similarity_mode in ('dense', 'blocked', 'top_k'):
+            with self.subTest(similarity_mode=similarity_mode):
+                engine = self.build_engine(similarity_mode)
+                neighbour_ids, scores = engine.batch_content_based_recommendations(self.seeds, top_n=8)
+                expected_ids, expected_scores = self.expected_neighbours(engine, 8)
+
+                self.assertEqual(neighbour_ids.tolist(), expected_ids.tolist())
+                np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+    def test_zero_weight_keeps_feature_similarity(self):
+        """Test that text_weight=0 serves the stored feature-only neighbours"""
+        engine = self.build_engine(text_weight=0.0)
+        plain = HybridRecommendationEngine()
+        plain.build_content_based_model(self.recipe_features, similarity_mode='top_k', top_k_neighbours=20)
+
+        self.assertEqual(engine.batch_content_based_recommendations(self.seeds)[0].tolist(),
+                         plain.batch_content_based_recommendations(self.seeds)[0].tolist())
+        with self.assertRaises(ValueError):
+            engine.build_text_model(text_weight=1.5)
+
+    def test_catalog_edits_and_artifact(self):
+        """Test text rows after incremental edits and a save/load roundtrip"""
+        engine = self.build_engine()
+        engine.rescale_threshold = np.inf
+        engine.add_recipes(random_recipes(4, seed=15, start=250, text=True))
+        engine.update_recipes([{'recipe_id': 'R0100', 'name': 'Okra relish'}])
+        engine.remove_recipes(['R0001'])
+
+        expected = engine.text_index.transform(engine.recipe_features)
+        self.assertEqual((engine.text_index.matrix != expected).nnz, 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engine.save_content_model(tmp_dir)
+            loaded = HybridRecommendationEngine().load_content_model(tmp_dir)
+
+            self.assertEqual(loaded.text_weight, engine.text_weight)
+            self.assertEqual(
+                loaded.batch_content_based_recommendations(['R0100', 'R0252'])[0].tolist(),
+                engine.batch_content_based_recommendations(['R0100', 'R0252'])[0].tolist()
+            )
+
+if __name__ == '__main__':
+    unittest.main()